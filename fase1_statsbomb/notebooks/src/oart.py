@@ -220,6 +220,61 @@ class OARTCalculator:
                 - mean_prob: Probabilidad media de opciones
                 - prob_rank: Ranking de la opción elegida
         """
+        return self.calculate_events_oart([pass_event])[0]
+    
+    def calculate_events_oart(self, pass_events: List[Dict],
+                              include_options: bool = False) -> List[Dict]:
+        """
+        Calcula OART para varios eventos con una sola llamada al modelo.
+        
+        Las opciones de todos los eventos (compañeros + pase elegido) se
+        apilan en una matriz de features y se predicen juntas.
+        
+        Args:
+            pass_events: Lista de eventos de pase (ver calculate_event_oart)
+            include_options: Añadir 'option_probs' con la probabilidad de
+                cada compañero, en el orden del freeze frame
+        
+        Returns:
+            Lista de resultados en el mismo orden que pass_events
+        """
+        rows = []
+        spans = []
+        
+        for pass_event in pass_events:
+            options = self._event_options(pass_event)
+            if isinstance(options, dict):
+                spans.append(options)
+                continue
+            spans.append((len(rows), len(options)))
+            rows.extend([features.get(f, 0) for f in self.feature_list] for features in options)
+        
+        probs = self.model.predict_proba(np.array(rows))[:, 1] if rows else np.array([])
+        
+        results = []
+        for span in spans:
+            if isinstance(span, dict):
+                results.append(dict(span, option_probs=[]) if include_options else span)
+                continue
+            
+            start, n_rows = span
+            # La última fila de cada evento es el pase elegido
+            option_probs = probs[start:start + n_rows - 1]
+            chosen_prob = probs[start + n_rows - 1]
+            
+            result = self._oart_from_probs(option_probs, chosen_prob)
+            if include_options:
+                result['option_probs'] = option_probs.tolist()
+            results.append(result)
+        
+        return results
+    
+    def _event_options(self, pass_event: Dict):
+        """
+        Features de cada opción de un evento, con el pase elegido al final.
+        
+        Devuelve el resultado vacío si OART no puede calcularse.
+        """
         freeze_frame = pass_event.get('freeze_frame')
         
         # Validar freeze frame
@@ -243,41 +298,35 @@ class OARTCalculator:
         under_pressure = pass_event.get('under_pressure', False)
         play_pattern = pass_event.get('play_pattern', 'Regular Play')
         
-        # Calcular probabilidad para cada opción
-        option_probs = []
-        for teammate in teammates:
-            features = self.extractor.extract_all_features(
-                passer_location, teammate['location'], freeze_frame,
+        targets = [teammate['location'] for teammate in teammates] + [chosen_location]
+        return [
+            self.extractor.extract_all_features(
+                passer_location, target, freeze_frame,
                 minute, period, under_pressure, play_pattern
             )
-            prob = self.predict_pass_success(features)
-            option_probs.append(prob)
-        
-        # Probabilidad del receptor elegido
-        chosen_features = self.extractor.extract_all_features(
-            passer_location, chosen_location, freeze_frame,
-            minute, period, under_pressure, play_pattern
-        )
-        chosen_prob = self.predict_pass_success(chosen_features)
+            for target in targets
+        ]
+    
+    @staticmethod
+    def _oart_from_probs(option_probs: np.ndarray, chosen_prob: float) -> Dict[str, float]:
+        """Calcula OART a partir de las probabilidades de las opciones."""
         
         # === CALCULAR OART ===
-        alternatives_better = sum(1 for p in option_probs if p > chosen_prob)
-        alternatives_tied = sum(1 for p in option_probs if p == chosen_prob)
+        alternatives_better = int(np.sum(option_probs > chosen_prob))
+        alternatives_tied = int(np.sum(option_probs == chosen_prob))
         n_alternatives = len(option_probs)
         
         oart = (alternatives_better + 0.5 * alternatives_tied) / n_alternatives
         
         # Ranking de la opción elegida
-        all_probs = option_probs + [chosen_prob]
-        sorted_probs = sorted(all_probs, reverse=True)
-        prob_rank = sorted_probs.index(chosen_prob) + 1
+        prob_rank = int(np.sum(option_probs > chosen_prob)) + 1
         
         return {
             'oart': oart,
-            'option_set_size': len(teammates),
-            'chosen_prob': chosen_prob,
-            'max_prob': max(option_probs),
-            'mean_prob': np.mean(option_probs),
+            'option_set_size': n_alternatives,
+            'chosen_prob': float(chosen_prob),
+            'max_prob': float(np.max(option_probs)),
+            'mean_prob': float(np.mean(option_probs)),
             'prob_rank': prob_rank
         }
     
@@ -293,12 +342,10 @@ class OARTCalculator:
         Returns:
             Dict con estadísticas agregadas de OART
         """
-        oart_scores = []
-        
-        for event in events:
-            result = self.calculate_event_oart(event)
-            if not np.isnan(result['oart']):
-                oart_scores.append(result['oart'])
+        oart_scores = [
+            result['oart'] for result in self.calculate_events_oart(events)
+            if not np.isnan(result['oart'])
+        ]
         
         if len(oart_scores) < min_events:
             return {
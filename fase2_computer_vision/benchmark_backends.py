@@ -0,0 +1,156 @@
+"""
+Compara los backends del detector en un clip de referencia.
+
+Para cada backend mide la velocidad de inferencia (frames/s) y la precisión
+frente a las detecciones de PyTorch en los mismos frames: una detección
+coincide con la de referencia si es de la misma clase y su IoU es >= 0.5.
+
+Uso:
+    python benchmark_backends.py [video] [frames] [backends]
+
+    backends: lista separada por comas (por defecto torch,onnx,onnx-int8)
+"""
+
+import sys
+import time
+
+import cv2
+import numpy as np
+import pandas as pd
+
+sys.path.append('src')
+from chunked_tracking import box_iou
+from detectors import BACKENDS, load_detector
+from video_pipeline import BATCH_SIZE, detect_batch
+
+IOU_MATCH = 0.5
+
+
+def read_frames(video_path: str, max_frames: int) -> list:
+    """Decodifica los primeros frames del clip (una sola vez para todos los backends)."""
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def run_backend(backend: str, frames: list, conf: float, classes: list) -> tuple:
+    """
+    Detecta en todos los frames con un backend.
+
+    Returns:
+        (detecciones por frame, frames/s)
+    """
+    model = load_detector('yolov8n.pt', backend=backend)
+    detect_batch(model, frames[:BATCH_SIZE], conf, classes)  # calentamiento
+
+    start = time.perf_counter()
+    detections = []
+    for i in range(0, len(frames), BATCH_SIZE):
+        detections.extend(detect_batch(model, frames[i:i + BATCH_SIZE], conf, classes))
+    elapsed = time.perf_counter() - start
+    return detections, len(frames) / elapsed
+
+
+def match_frame(reference, candidate) -> tuple:
+    """
+    Empareja las detecciones de un frame con las de referencia (greedy por IoU).
+
+    Returns:
+        (coincidencias, IoU de cada coincidencia, |Δconf| de cada coincidencia)
+    """
+    if len(reference) == 0 or len(candidate) == 0:
+        return 0, [], []
+
+    iou = box_iou(reference.xyxy, candidate.xyxy)
+    iou[reference.class_id[:, None] != candidate.class_id[None, :]] = 0
+
+    ious, conf_deltas = [], []
+    while True:
+        i, j = np.unravel_index(np.argmax(iou), iou.shape)
+        if iou[i, j] < IOU_MATCH:
+            break
+        ious.append(float(iou[i, j]))
+        conf_deltas.append(abs(float(reference.confidence[i]) - float(candidate.confidence[j])))
+        iou[i, :] = 0
+        iou[:, j] = 0
+    return len(ious), ious, conf_deltas
+
+
+def compare(reference: list, candidate: list) -> dict:
+    """Precisión y recall de un backend frente a las detecciones de referencia."""
+    matched, n_ref, n_cand = 0, 0, 0
+    ious, conf_deltas = [], []
+    for ref, cand in zip(reference, candidate):
+        m, frame_ious, frame_deltas = match_frame(ref, cand)
+        matched += m
+        n_ref += len(ref)
+        n_cand += len(cand)
+        ious.extend(frame_ious)
+        conf_deltas.extend(frame_deltas)
+
+    precision = matched / n_cand if n_cand else 1.0
+    recall = matched / n_ref if n_ref else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {
+        'detections': n_cand,
+        'precision': round(precision, 3),
+        'recall': round(recall, 3),
+        'f1': round(f1, 3),
+        'mean_iou': round(float(np.mean(ious)), 3) if ious else None,
+        'mean_conf_delta': round(float(np.mean(conf_deltas)), 4) if conf_deltas else None
+    }
+
+
+def main():
+    video_path = sys.argv[1] if len(sys.argv) > 1 else "football_test.mp4"
+    max_frames = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    backends = sys.argv[3].split(',') if len(sys.argv) > 3 else list(BACKENDS)
+
+    unknown = [b for b in backends if b not in BACKENDS]
+    if unknown:
+        print(f"❌ Backends desconocidos: {', '.join(unknown)} (opciones: {', '.join(BACKENDS)})")
+        sys.exit(1)
+
+    frames = read_frames(video_path, max_frames)
+    print(f"🎬 Comparando backends del detector...")
+    print(f"   Video: {video_path}")
+    print(f"   Frames: {len(frames)}")
+    print(f"   Backends: {', '.join(backends)}")
+
+    conf, classes = 0.3, [0, 32]
+
+    # Referencia: PyTorch
+    print(f"\n⏱️  torch (referencia)...")
+    reference, torch_fps = run_backend('torch', frames, conf, classes)
+
+    rows = []
+    for backend in backends:
+        if backend == 'torch':
+            detections, fps = reference, torch_fps
+        else:
+            print(f"⏱️  {backend}...")
+            detections, fps = run_backend(backend, frames, conf, classes)
+
+        rows.append({
+            'backend': backend,
+            'fps': round(fps, 1),
+            'speedup': round(fps / torch_fps, 2),
+            **compare(reference, detections)
+        })
+
+    report = pd.DataFrame(rows)
+    report.to_csv('backend_report.csv', index=False)
+
+    print(f"\n📊 Resultados (referencia: torch):")
+    print(report.to_string(index=False))
+    print(f"\n✅ Reporte guardado: backend_report.csv")
+
+
+if __name__ == "__main__":
+    main()
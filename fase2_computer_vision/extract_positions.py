@@ -1,9 +1,16 @@
-from ultralytics import YOLO
 import cv2
-import pandas as pd
+import sys
 
-# Cargar modelo
-model = YOLO('yolov8n.pt')
+sys.path.append('src')
+from video_pipeline import track_frames, is_keyframe
+from detection_buffer import DetectionBuffer
+from detectors import load_detector, DETECTOR_BACKEND
+
+# Detectar cada 5 frames (para ir más rápido); el resto se interpola
+STRIDE = 5
+
+# Cargar modelo (backend según YOLO_BACKEND)
+model = load_detector('yolov8n.pt')
 video_path = "football_test.mp4"
 
 # Abrir video
@@ -13,60 +20,34 @@ total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
 
 print(f"📹 Video: {video_path}")
 print(f"   FPS: {fps}")
+print(f"   Backend: {DETECTOR_BACKEND}")
 print(f"   Frames totales: {total_frames}")
 print(f"   Duración: {total_frames/fps:.1f} segundos")
 
 # Almacenar detecciones
-all_detections = []
+buffer = DetectionBuffer()
 
 print(f"\n🔍 Extrayendo posiciones...")
 
-frame_num = 0
-while cap.isOpened():
-    ret, frame = cap.read()
-    if not ret:
-        break
-    
-    # Detectar cada 5 frames (para ir más rápido)
-    if frame_num % 5 == 0:
-        results = model(frame, verbose=False, conf=0.3, classes=[0, 32])
-        
-        for box in results[0].boxes:
-            x1, y1, x2, y2 = box.xyxy[0].tolist()
-            confidence = box.conf[0].item()
-            class_id = int(box.cls[0].item())
-            class_name = model.names[class_id]
-            
-            # Calcular centro del objeto
-            center_x = (x1 + x2) / 2
-            center_y = (y1 + y2) / 2
-            
-            all_detections.append({
-                'frame': frame_num,
-                'time_sec': frame_num / fps,
-                'class': class_name,
-                'confidence': round(confidence, 3),
-                'center_x': round(center_x, 1),
-                'center_y': round(center_y, 1),
-                'width': round(x2 - x1, 1),
-                'height': round(y2 - y1, 1)
-            })
-    
-    frame_num += 1
+# YOLO en los keyframes; en el resto las cajas se mueven con flujo óptico
+for frame_num, frame, detections in track_frames(cap, model, None, conf=0.3, classes=[0, 32],
+                                                 stride=STRIDE):
+    buffer.append(frame_num, detections, is_keyframe(frame_num, STRIDE))
     
     # Mostrar progreso
-    if frame_num % 50 == 0:
-        print(f"   Procesado: {frame_num}/{total_frames} frames")
+    if (frame_num + 1) % 50 == 0:
+        print(f"   Procesado: {frame_num + 1}/{total_frames} frames")
 
 cap.release()
 
 # Crear DataFrame
-df = pd.DataFrame(all_detections)
+df = buffer.to_detection_table(model.names, fps)
 
 print(f"\n📊 Resultados:")
 print(f"   Detecciones totales: {len(df)}")
 print(f"   Personas detectadas: {len(df[df['class'] == 'person'])}")
 print(f"   Balones detectados: {len(df[df['class'] == 'sports ball'])}")
+print(f"   Filas interpoladas: {len(df[df['source'] == 'interpolated'])}")
 
 # Guardar a CSV
 df.to_csv('detections.csv', index=False)
@@ -1,10 +1,14 @@
-from ultralytics import YOLO
 import supervision as sv
 import cv2
-import pandas as pd
+import sys
+
+sys.path.append('src')
+from video_pipeline import track_frames, is_keyframe, KEYFRAME_STRIDE
+from detection_buffer import DetectionBuffer
+from detectors import load_detector, DETECTOR_BACKEND
 
 # Cargar modelo y tracker
-model = YOLO('yolov8n.pt')
+model = load_detector('yolov8n.pt')
 tracker = sv.ByteTrack()
 
 # Abrir video
@@ -13,48 +17,23 @@ cap = cv2.VideoCapture(video_path)
 fps = cap.get(cv2.CAP_PROP_FPS)
 
 print(f"🎬 Extrayendo datos de tracking...")
+print(f"   Backend: {DETECTOR_BACKEND}")
+print(f"   Keyframes: 1 de cada {KEYFRAME_STRIDE} frames (el resto se interpola)")
 
-# Almacenar datos
-tracking_data = []
+# Almacenar datos (en columnas)
+buffer = DetectionBuffer()
 
-frame_num = 0
-while cap.isOpened():
-    ret, frame = cap.read()
-    if not ret:
-        break
-    
-    # Detectar
-    results = model(frame, verbose=False, conf=0.3, classes=[0, 32])[0]
-    detections = sv.Detections.from_ultralytics(results)
-    
-    # Aplicar tracking
-    detections = tracker.update_with_detections(detections)
-    
-    # Guardar cada detección
-    for i in range(len(detections)):
-        x1, y1, x2, y2 = detections.xyxy[i]
-        tracker_id = detections.tracker_id[i]
-        class_id = detections.class_id[i]
-        confidence = detections.confidence[i]
-        
-        tracking_data.append({
-            'frame': frame_num,
-            'time_sec': round(frame_num / fps, 2),
-            'tracker_id': tracker_id,
-            'class': model.names[class_id],
-            'confidence': round(confidence, 3),
-            'center_x': round((x1 + x2) / 2, 1),
-            'center_y': round((y1 + y2) / 2, 1)
-        })
+# Detectar por lotes y aplicar tracking frame a frame
+for frame_num, frame, detections in track_frames(cap, model, tracker, conf=0.3, classes=[0, 32]):
+    buffer.append(frame_num, detections, is_keyframe(frame_num))
     
-    frame_num += 1
-    if frame_num % 100 == 0:
-        print(f"   Procesados: {frame_num} frames")
+    if (frame_num + 1) % 100 == 0:
+        print(f"   Procesados: {frame_num + 1} frames")
 
 cap.release()
 
 # Crear DataFrame
-df = pd.DataFrame(tracking_data)
+df = buffer.to_tracking_table(model.names, fps)
 df.to_csv('tracking_data.csv', index=False)
 
 print(f"\n✅ Datos guardados: tracking_data.csv")
@@ -62,6 +41,7 @@ print(f"\n📊 Resumen:")
 print(f"   Total detecciones: {len(df)}")
 print(f"   Jugadores únicos (IDs): {df[df['class']=='person']['tracker_id'].nunique()}")
 print(f"   Frames procesados: {df['frame'].nunique()}")
+print(f"   Filas interpoladas: {(df['source'] == 'interpolated').sum()}")
 
 # Mostrar ejemplo
 print(f"\n📋 Ejemplo de datos:")
@@ -0,0 +1,62 @@
+"""
+Genera todas las salidas de un video en una sola pasada de YOLO.
+
+Sustituye a correr por separado extract_positions.py, extract_tracking_data.py,
+track_players.py y 05_detect_teams.py: el video se decodifica e infiere una
+vez y cada salida se produce a la vez.
+
+Uso:
+    python process_all.py [video] [salidas]
+
+    salidas: lista separada por comas entre detections, tracking, teams,
+    video y summary (por defecto todas)
+"""
+
+import json
+import sys
+
+sys.path.append('src')
+from sinks import (
+    DetectionTableSink, TrackingTableSink, TeamColorSink, AnnotatedVideoSink, SummarySink,
+    run_pipeline
+)
+from video_pipeline import BATCH_SIZE, KEYFRAME_STRIDE
+from detectors import load_detector, DETECTOR_BACKEND
+
+SINKS = {
+    'detections': lambda: DetectionTableSink('detections.csv'),
+    'tracking': lambda: TrackingTableSink('tracking_data.csv'),
+    'teams': lambda: TeamColorSink('team_detections_v2.csv'),
+    'video': lambda: AnnotatedVideoSink('football_tracked.mp4'),
+    'summary': lambda: SummarySink('summary.json')
+}
+
+
+def main():
+    video_path = sys.argv[1] if len(sys.argv) > 1 else "football_test.mp4"
+    outputs = sys.argv[2].split(',') if len(sys.argv) > 2 else list(SINKS)
+
+    unknown = [name for name in outputs if name not in SINKS]
+    if unknown:
+        print(f"❌ Salidas desconocidas: {', '.join(unknown)} (opciones: {', '.join(SINKS)})")
+        sys.exit(1)
+
+    print(f"🎬 Procesando video en una sola pasada...")
+    print(f"   Video: {video_path}")
+    print(f"   Salidas: {', '.join(outputs)}")
+    print(f"   Lote YOLO: {BATCH_SIZE} frames, keyframes: 1 de cada {KEYFRAME_STRIDE}")
+    print(f"   Backend: {DETECTOR_BACKEND}")
+
+    model = load_detector('yolov8n.pt')
+    summaries = run_pipeline(video_path, model, [SINKS[name]() for name in outputs],
+                             conf=0.3, classes=[0, 32])
+
+    print(f"\n✅ Listo en {summaries.pop('elapsed_sec')}s")
+    for name, summary in summaries.items():
+        if 'track_teams' in summary:
+            summary = {k: v for k, v in summary.items() if k != 'track_teams'}
+        print(f"   {name}: {json.dumps(summary, ensure_ascii=False)}")
+
+
+if __name__ == "__main__":
+    main()
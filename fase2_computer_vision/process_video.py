@@ -1,8 +1,11 @@
-from ultralytics import YOLO
 import cv2
+import sys
 
-# Cargar modelo
-model = YOLO('yolov8n.pt')
+sys.path.append('src')
+from detectors import load_detector
+
+# Cargar modelo (backend según YOLO_BACKEND)
+model = load_detector('yolov8n.pt')
 
 # Rutas
 video_path = "football_test.mp4"
@@ -0,0 +1,169 @@
+"""
+Puntos de control para reanudar análisis de video largos.
+
+Cada pocos segundos se guarda en un directorio el siguiente frame a procesar,
+el estado serializado del tracker y las detecciones nuevas desde el punto
+anterior (un segmento .npz por punto de control). Si el proceso muere, el
+análisis se reanuda desde el último punto con los mismos IDs de tracking y
+solo se pierde el trabajo hecho desde entonces.
+
+El estado se escribe en un archivo temporal y se renombra, así un corte a
+mitad de escritura deja intacto el punto anterior. Un punto de control solo
+vale para el mismo video y la misma configuración de detección (huella).
+"""
+
+import hashlib
+import os
+import pickle
+import shutil
+import time
+
+import numpy as np
+
+from detection_buffer import DetectionBuffer
+
+# Segundos entre puntos de control
+CHECKPOINT_EVERY_SEC = float(os.environ.get("CHECKPOINT_EVERY_SEC", 10))
+
+STATE_FILE = "state.pkl"
+
+# Bytes del inicio y del final del video que entran en la huella
+FINGERPRINT_SAMPLE_BYTES = 1024 * 1024
+
+
+def video_fingerprint(video_path: str, **config) -> dict:
+    """
+    Identifica un video y la configuración del análisis.
+
+    Usa el tamaño y un hash del primer y último MiB, no la fecha de
+    modificación: volver a subir el mismo contenido toca la fecha del archivo
+    compartido y no debe invalidar el punto de control.
+    """
+    size = os.path.getsize(video_path)
+    sha = hashlib.sha256()
+    with open(video_path, 'rb') as f:
+        sha.update(f.read(FINGERPRINT_SAMPLE_BYTES))
+        if size > FINGERPRINT_SAMPLE_BYTES:
+            f.seek(max(size - FINGERPRINT_SAMPLE_BYTES, FINGERPRINT_SAMPLE_BYTES))
+            sha.update(f.read())
+    return {'size': size, 'sample_sha256': sha.hexdigest(), **config}
+
+
+def _id_counter():
+    """
+    Contador global de IDs de ByteTrack en versiones de supervision que lo
+    guardan a nivel de clase (en las nuevas viaja dentro del tracker).
+    """
+    try:
+        from supervision.tracker.byte_tracker.basetrack import BaseTrack
+    except ImportError:
+        return None
+    return BaseTrack if hasattr(BaseTrack, '_count') else None
+
+
+class Checkpointer:
+    """
+    Guarda y restaura el estado de un análisis.
+
+    Args:
+        directory: Carpeta de los puntos de control
+        fingerprint: Huella del video y la configuración (video_fingerprint)
+        every_sec: Segundos mínimos entre dos puntos de control
+    """
+
+    def __init__(self, directory: str, fingerprint: dict, every_sec: float = CHECKPOINT_EVERY_SEC):
+        self.directory = directory
+        self.fingerprint = fingerprint
+        self.every_sec = every_sec
+        self.segments = 0
+        self.flushed = 0
+        self.last_save = time.monotonic()
+
+    def load(self):
+        """
+        Último punto de control válido.
+
+        Returns:
+            (siguiente frame, tracker, DetectionBuffer) o None si no hay punto
+            de control o es de otro video/configuración
+        """
+        path = os.path.join(self.directory, STATE_FILE)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, 'rb') as f:
+                state = pickle.load(f)
+            if state.get('fingerprint') != self.fingerprint:
+                return None
+
+            buffer = DetectionBuffer(capacity=max(state['rows'], 4096))
+            for k in range(state['segments']):
+                with np.load(self._segment_path(k)) as segment:
+                    buffer.extend({name: segment[name] for name in segment.files})
+        except Exception:
+            # Punto de control dañado o de otra versión: se empieza de cero
+            return None
+        if len(buffer) != state['rows']:
+            return None
+
+        counter = _id_counter()
+        if counter is not None and state.get('id_count') is not None:
+            counter._count = state['id_count']
+
+        self.segments, self.flushed = state['segments'], state['rows']
+        self.last_save = time.monotonic()
+        return state['next_frame'], state['tracker'], buffer
+
+    def maybe_save(self, next_frame: int, tracker, buffer: DetectionBuffer) -> bool:
+        """Guarda un punto de control si pasó every_sec desde el anterior."""
+        if time.monotonic() - self.last_save < self.every_sec:
+            return False
+        self.save(next_frame, tracker, buffer)
+        return True
+
+    def save(self, next_frame: int, tracker, buffer: DetectionBuffer):
+        """
+        Guarda un punto de control.
+
+        Args:
+            next_frame: Primer frame que falta procesar
+            tracker: Tracker con el estado hasta next_frame - 1
+            buffer: Detecciones hasta next_frame - 1
+        """
+        os.makedirs(self.directory, exist_ok=True)
+
+        # Solo las filas nuevas desde el punto anterior
+        segments = self.segments
+        if len(buffer) > self.flushed:
+            columns = {name: column[self.flushed:] for name, column in buffer.columns().items()}
+            tmp = self._segment_path(segments) + '.tmp'
+            with open(tmp, 'wb') as f:
+                np.savez(f, **columns)
+            os.replace(tmp, self._segment_path(segments))
+            segments += 1
+
+        counter = _id_counter()
+        state = {
+            'fingerprint': self.fingerprint,
+            'next_frame': next_frame,
+            'segments': segments,
+            'rows': len(buffer),
+            'tracker': tracker,
+            'id_count': counter._count if counter is not None else None
+        }
+        tmp = os.path.join(self.directory, STATE_FILE + '.tmp')
+        with open(tmp, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, os.path.join(self.directory, STATE_FILE))
+
+        self.segments, self.flushed = segments, len(buffer)
+        self.last_save = time.monotonic()
+
+    def clear(self):
+        """Borra los puntos de control (al terminar o cancelar el análisis)."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.segments = self.flushed = 0
+
+    def _segment_path(self, k: int) -> str:
+        return os.path.join(self.directory, f"detections-{k:05d}.npz")
@@ -0,0 +1,271 @@
+"""
+Tracking de videos largos en paralelo por tramos.
+
+El video se divide en tramos de tiempo y cada tramo se procesa en su propio
+proceso, con su modelo YOLO y su ByteTrack. Cada tramo empieza `overlap`
+frames antes de su inicio; en esa ventana se solapa con el tramo anterior y
+sus tracks se emparejan por IoU para unir los IDs. El resultado es una sola
+tabla de tracking con IDs globales.
+
+Cada tramo es dueño de los frames [inicio, fin): los frames de solape se
+toman del tramo anterior, que ya tiene el tracker caliente.
+
+Al cancelar, una señal compartida hace que los tramos en curso se detengan en
+el siguiente frame en lugar de seguir ocupando la CPU hasta terminar.
+"""
+
+import multiprocessing as mp
+import os
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from detection_buffer import DetectionBuffer
+from detectors import DETECTOR_BACKEND, load_detector, resolve_weights
+from video_pipeline import BATCH_SIZE, KEYFRAME_STRIDE, is_keyframe, track_frames
+
+# Frames de solape entre tramos consecutivos
+CHUNK_OVERLAP = int(os.environ.get("CHUNK_OVERLAP_FRAMES", 30))
+
+# IoU mínimo para considerar que dos cajas del solape son el mismo objeto
+STITCH_IOU = 0.5
+
+# Columnas de las filas devueltas por cada tramo (detected: 1 = YOLO, 0 = interpolada)
+COLUMNS = ['frame', 'tracker_id', 'class_id', 'confidence', 'x1', 'y1', 'x2', 'y2', 'detected']
+
+# Cada cuántos segundos se consulta should_stop mientras se espera a los tramos
+CANCEL_POLL_SEC = 0.5
+
+# Modelo de cada proceso worker y señal de cancelación (se fijan en _init_worker)
+_model = None
+_stop = None
+
+
+class TrackingCancelled(Exception):
+    """should_stop pidió detener el tracking por tramos."""
+
+
+def plan_chunks(total_frames: int, n_chunks: int, overlap: int = CHUNK_OVERLAP) -> list:
+    """
+    Divide un video en tramos.
+
+    Returns:
+        Lista de (lectura_desde, inicio, fin): el tramo lee desde
+        lectura_desde y es dueño de [inicio, fin). El último tramo tiene
+        fin=None (hasta el final del video).
+    """
+    n_chunks = max(1, min(n_chunks, total_frames // max(overlap * 2, 1) or 1))
+    bounds = [round(i * total_frames / n_chunks) for i in range(n_chunks)] + [None]
+    return [
+        (max(0, bounds[i] - overlap), bounds[i], bounds[i + 1])
+        for i in range(n_chunks)
+    ]
+
+
+def _init_worker(weights: str, device: str, backend: str, stop):
+    global _model, _stop
+    _model = load_detector(weights, backend, device)
+    _stop = stop
+
+
+def track_chunk(video_path: str, read_from: int, stop: int, conf: float, classes: list,
+                batch_size: int, stride: int = KEYFRAME_STRIDE) -> tuple:
+    """
+    Detecta y hace tracking de un tramo en el proceso actual.
+
+    Returns:
+        (filas np.ndarray con COLUMNS, nombres de clases del modelo); si se
+        cancela, las filas hasta ese momento
+    """
+    import cv2
+    import supervision as sv
+    from contextlib import closing
+
+    cap = cv2.VideoCapture(video_path)
+    cap.set(cv2.CAP_PROP_POS_FRAMES, read_from)
+    max_frames = stop - read_from if stop is not None else None
+
+    buffer = DetectionBuffer()
+    with closing(track_frames(cap, _model, sv.ByteTrack(), conf, classes, batch_size,
+                              start_frame=read_from, max_frames=max_frames, stride=stride)) as tracked:
+        for frame_num, _, detections in tracked:
+            if _stop is not None and _stop.is_set():
+                break
+            if detections.tracker_id is None:
+                continue
+            buffer.append(frame_num, detections, is_keyframe(frame_num, stride, read_from))
+    cap.release()
+
+    columns = buffer.columns()
+    rows = np.column_stack([columns[name] for name in COLUMNS]).astype(np.float64)
+    return rows.reshape(-1, len(COLUMNS)), _model.names
+
+
+def stitch_chunks(chunks: list, overlap: int = CHUNK_OVERLAP, iou_threshold: float = STITCH_IOU) -> np.ndarray:
+    """
+    Une los tramos en una sola tabla con IDs de tracking globales.
+
+    Args:
+        chunks: Lista ordenada de (inicio, filas) de cada tramo
+        overlap: Frames de solape con el tramo anterior
+        iou_threshold: IoU mínimo para emparejar cajas
+
+    Returns:
+        Filas con COLUMNS, ordenadas por frame, con tracker_id global
+    """
+    next_id = 1
+    prev_rows = prev_map = None
+    stitched = []
+
+    for start, rows in chunks:
+        # IDs locales del tramo -> IDs globales
+        id_map = {}
+        if prev_rows is not None:
+            window = (start - overlap, start)
+            for prev_id, cur_id in match_tracks(prev_rows, rows, window, iou_threshold):
+                id_map[cur_id] = prev_map[prev_id]
+
+        for local_id in np.unique(rows[:, 1]).astype(int):
+            if local_id not in id_map:
+                id_map[local_id] = next_id
+                next_id += 1
+
+        global_rows = rows.copy()
+        global_rows[:, 1] = [id_map[int(t)] for t in rows[:, 1]]
+        stitched.append(global_rows)
+        prev_rows, prev_map = rows, id_map
+
+    # Cada tramo conserva solo los frames de los que es dueño
+    owned = []
+    for k, (start, _) in enumerate(chunks):
+        rows = stitched[k]
+        end = chunks[k + 1][0] if k + 1 < len(chunks) else None
+        mask = rows[:, 0] >= start
+        if end is not None:
+            mask &= rows[:, 0] < end
+        owned.append(rows[mask])
+
+    return np.concatenate(owned) if owned else np.empty((0, len(COLUMNS)))
+
+
+def match_tracks(prev_rows: np.ndarray, cur_rows: np.ndarray, window: tuple,
+                 iou_threshold: float = STITCH_IOU) -> list:
+    """
+    Empareja tracks de dos tramos en su ventana de solape.
+
+    Cada frame del solape vota por los pares (id anterior, id actual) de la
+    misma clase con IoU >= iou_threshold; los pares se asignan de mayor a
+    menor número de votos, uno a uno.
+
+    Returns:
+        Lista de (id anterior, id actual)
+    """
+    start, stop = window
+    prev_rows = prev_rows[(prev_rows[:, 0] >= start) & (prev_rows[:, 0] < stop)]
+    cur_rows = cur_rows[(cur_rows[:, 0] >= start) & (cur_rows[:, 0] < stop)]
+
+    votes = Counter()
+    for frame in np.intersect1d(prev_rows[:, 0], cur_rows[:, 0]):
+        a = prev_rows[prev_rows[:, 0] == frame]
+        b = cur_rows[cur_rows[:, 0] == frame]
+        iou = box_iou(a[:, 4:8], b[:, 4:8])
+        iou[a[:, 2][:, None] != b[:, 2][None, :]] = 0
+        for i, j in zip(*np.nonzero(iou >= iou_threshold)):
+            votes[(int(a[i, 1]), int(b[j, 1]))] += 1
+
+    matched_prev, matched_cur, pairs = set(), set(), []
+    for (prev_id, cur_id), _ in votes.most_common():
+        if prev_id not in matched_prev and cur_id not in matched_cur:
+            matched_prev.add(prev_id)
+            matched_cur.add(cur_id)
+            pairs.append((prev_id, cur_id))
+    return pairs
+
+
+def box_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """IoU entre dos conjuntos de cajas xyxy (matriz len(a) x len(b))."""
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def track_video_parallel(video_path: str, weights: str, workers: int = None, device: str = "cpu",
+                         backend: str = DETECTOR_BACKEND, conf: float = 0.3, classes: list = [0, 32],
+                         batch_size: int = BATCH_SIZE, overlap: int = CHUNK_OVERLAP,
+                         stride: int = KEYFRAME_STRIDE, on_chunk=None, should_stop=None) -> tuple:
+    """
+    Tracking de un video repartido en tramos entre varios procesos.
+
+    Args:
+        video_path: Ruta al video
+        weights: Pesos YOLO que carga cada proceso
+        workers: Procesos (y tramos); por defecto uno por núcleo
+        device: Dispositivo de inferencia
+        backend: Backend del detector (ver detectors.py)
+        conf: Confianza mínima de detección
+        classes: Clases de COCO a detectar
+        batch_size: Frames por llamada al modelo
+        overlap: Frames de solape entre tramos
+        stride: Paso de keyframes (1 = detectar en todos los frames)
+        on_chunk: Función (frames del tramo, filas del tramo) llamada al
+            terminar cada tramo; si lanza una excepción se cancela el resto
+        should_stop: Función que indica si hay que cancelar (se consulta cada
+            CANCEL_POLL_SEC)
+
+    Returns:
+        (filas con COLUMNS e IDs globales, nombres de clases del modelo)
+
+    Raises:
+        TrackingCancelled: Si should_stop devolvió True
+    """
+    import cv2
+
+    cap = cv2.VideoCapture(video_path)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+
+    workers = workers or os.cpu_count() or 1
+
+    # Exportar el modelo (si hace falta) una sola vez, antes de repartir
+    weights = resolve_weights(weights, backend)
+    plan = plan_chunks(total_frames, workers, overlap)
+
+    ctx = mp.get_context("spawn")
+    stop_event = ctx.Event()
+    executor = ProcessPoolExecutor(
+        max_workers=len(plan),
+        mp_context=ctx,
+        initializer=_init_worker,
+        initargs=(weights, device, backend, stop_event)
+    )
+    results, names = {}, None
+    try:
+        futures = {
+            executor.submit(track_chunk, video_path, read_from, stop, conf, classes, batch_size, stride): k
+            for k, (read_from, _, stop) in enumerate(plan)
+        }
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=CANCEL_POLL_SEC, return_when=FIRST_COMPLETED)
+            for future in done:
+                k = futures[future]
+                rows, names = future.result()
+                results[k] = rows
+                if on_chunk is not None:
+                    read_from, start, stop = plan[k]
+                    on_chunk((stop if stop is not None else total_frames) - start, rows[rows[:, 0] >= start])
+            if pending and should_stop is not None and should_stop():
+                raise TrackingCancelled()
+    finally:
+        # Los tramos en curso ven la señal y terminan en el siguiente frame
+        stop_event.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    chunks = [(plan[k][1], results[k]) for k in range(len(plan))]
+    return stitch_chunks(chunks, overlap), names
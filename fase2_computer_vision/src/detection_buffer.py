@@ -0,0 +1,198 @@
+"""
+Almacenamiento columnar de detecciones.
+
+DetectionBuffer guarda las detecciones de todo un video en arreglos NumPy por
+columna que crecen duplicando su capacidad, en lugar de un dict de Python por
+detección. Cada frame se añade con una sola copia vectorizada. columns()
+devuelve vistas sin copia de los arreglos; to_dataframe y to_arrow construyen
+una tabla nueva (una copia por video, no una por detección).
+
+track_stats calcula las métricas por jugador ordenando una vez por
+(tracker_id, frame) y reduciendo por grupos, sin recorrer las detecciones una
+vez por jugador.
+"""
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+
+# Columna -> tipo
+COLUMNS = {
+    'frame': np.int32,
+    'tracker_id': np.int32,
+    'class_id': np.int16,
+    'confidence': np.float32,
+    'x1': np.float32,
+    'y1': np.float32,
+    'x2': np.float32,
+    'y2': np.float32,
+    'detected': np.bool_
+}
+
+
+class DetectionBuffer:
+    """
+    Detecciones de un video en columnas NumPy.
+
+    Args:
+        capacity: Filas reservadas al inicio (se duplica al llenarse)
+    """
+
+    def __init__(self, capacity: int = 4096):
+        self._data = {name: np.empty(capacity, dtype=dtype) for name, dtype in COLUMNS.items()}
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, frame_num: int, detections, detected: bool = True):
+        """
+        Añade las detecciones de un frame.
+
+        Args:
+            frame_num: Número de frame
+            detections: sv.Detections (sin tracker_id se numeran 0..n-1)
+            detected: False si las cajas se interpolaron
+        """
+        n = len(detections)
+        if n == 0:
+            return
+        self._reserve(self._size + n)
+
+        rows = slice(self._size, self._size + n)
+        data = self._data
+        data['frame'][rows] = frame_num
+        data['tracker_id'][rows] = (
+            detections.tracker_id if detections.tracker_id is not None else np.arange(n)
+        )
+        data['class_id'][rows] = detections.class_id
+        data['confidence'][rows] = detections.confidence if detections.confidence is not None else np.nan
+        xyxy = detections.xyxy
+        data['x1'][rows] = xyxy[:, 0]
+        data['y1'][rows] = xyxy[:, 1]
+        data['x2'][rows] = xyxy[:, 2]
+        data['y2'][rows] = xyxy[:, 3]
+        data['detected'][rows] = detected
+        self._size += n
+
+    def extend(self, columns: dict):
+        """Añade filas ya en columnas (mismas claves que COLUMNS)."""
+        n = len(columns['frame'])
+        self._reserve(self._size + n)
+        for name in COLUMNS:
+            self._data[name][self._size:self._size + n] = columns[name]
+        self._size += n
+
+    def _reserve(self, size: int):
+        capacity = len(self._data['frame'])
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        for name, column in self._data.items():
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._data[name] = grown
+
+    def columns(self) -> dict:
+        """Vistas (sin copia) de las filas ocupadas de cada columna."""
+        return {name: column[:self._size] for name, column in self._data.items()}
+
+    def centers(self) -> tuple:
+        """(center_x, center_y) de cada caja."""
+        data = self.columns()
+        return (data['x1'] + data['x2']) / 2, (data['y1'] + data['y2']) / 2
+
+    def to_dataframe(self, names: dict = None, fps: float = None):
+        """
+        DataFrame de pandas con las columnas del buffer.
+
+        Copia los datos: pandas agrupa las columnas del mismo tipo en bloques
+        nuevos y los centros se calculan aparte. Para leer sin copiar, usar
+        columns().
+
+        Args:
+            names: Nombres de clase del modelo (añade la columna class)
+            fps: FPS del video (añade la columna time_sec)
+        """
+        import pandas as pd
+
+        data = self.columns()
+        center_x, center_y = self.centers()
+        frame = {
+            'frame': data['frame'],
+            'tracker_id': data['tracker_id'],
+            'class_id': data['class_id'],
+            'confidence': data['confidence'],
+            'center_x': center_x,
+            'center_y': center_y,
+            'source': np.where(data['detected'], 'detected', 'interpolated')
+        }
+        if fps:
+            frame['time_sec'] = data['frame'] / fps
+        df = pd.DataFrame(frame)
+        if names is not None:
+            df['class'] = pd.Categorical.from_codes(
+                data['class_id'], categories=[names[i] for i in range(len(names))]
+            )
+        return df
+
+    def to_tracking_table(self, names: dict, fps: float):
+        """Tabla con las columnas de tracking_data.csv (valores redondeados)."""
+        df = self.to_dataframe(names, fps)
+        return df.assign(
+            time_sec=df['time_sec'].round(2),
+            confidence=df['confidence'].round(3),
+            center_x=df['center_x'].round(1),
+            center_y=df['center_y'].round(1)
+        )[['frame', 'time_sec', 'tracker_id', 'class', 'confidence', 'center_x', 'center_y', 'source']]
+
+    def to_detection_table(self, names: dict, fps: float):
+        """Tabla con las columnas de detections.csv (centro y tamaño de cada caja)."""
+        data = self.columns()
+        df = self.to_dataframe(names, fps)
+        return df.assign(
+            confidence=df['confidence'].round(3),
+            center_x=df['center_x'].round(1),
+            center_y=df['center_y'].round(1),
+            width=(data['x2'] - data['x1']).round(1),
+            height=(data['y2'] - data['y1']).round(1)
+        )[['frame', 'time_sec', 'class', 'confidence', 'center_x', 'center_y', 'width', 'height', 'source']]
+
+    def to_arrow(self):
+        """Tabla Arrow con las columnas del buffer (requiere pyarrow)."""
+        if pa is None:
+            raise ImportError("pyarrow no está instalado")
+        return pa.table({name: pa.array(column) for name, column in self.columns().items()})
+
+
+def track_stats(tracker_id: np.ndarray, frame: np.ndarray, x: np.ndarray, y: np.ndarray) -> dict:
+    """
+    Frames seguidos y distancia recorrida de cada track.
+
+    Ordena una vez por (tracker_id, frame) y suma los desplazamientos entre
+    filas consecutivas del mismo track.
+
+    Returns:
+        dict con arreglos ids, frames y distance (uno por track)
+    """
+    if len(tracker_id) == 0:
+        empty = np.empty(0)
+        return {'ids': empty.astype(np.int32), 'frames': empty.astype(np.int64), 'distance': empty}
+
+    order = np.lexsort((frame, tracker_id))
+    ids, x, y = tracker_id[order], x[order].astype(np.float64), y[order].astype(np.float64)
+
+    # Pasos entre filas consecutivas; el primero de cada track no cuenta
+    step = np.hypot(np.diff(x), np.diff(y))
+    step[ids[1:] != ids[:-1]] = 0
+
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    frames = np.diff(np.r_[starts, len(ids)])
+    distance = np.add.reduceat(np.r_[0.0, step], starts)
+
+    return {'ids': ids[starts], 'frames': frames, 'distance': distance}
@@ -0,0 +1,120 @@
+"""
+Backends de inferencia del detector YOLO.
+
+Los mismos pesos se pueden ejecutar por varios caminos:
+
+- torch: PyTorch de ultralytics (por defecto)
+- onnx: grafo exportado a ONNX y ejecutado con ONNX Runtime en CPU
+- onnx-int8: el grafo ONNX con los pesos cuantizados a int8
+
+Los modelos exportados se guardan junto a los pesos (yolov8n.onnx,
+yolov8n-int8.onnx) y se reutilizan. En todos los casos se devuelve un objeto
+YOLO de ultralytics, así el resto del pipeline (detect_batch, supervision) no
+cambia. El backend se elige con la variable de entorno YOLO_BACKEND.
+
+onnx y onnxruntime son opcionales: solo se necesitan para los backends onnx.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+
+# Backend por defecto
+DETECTOR_BACKEND = os.environ.get("YOLO_BACKEND", "torch")
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+# Tamaño de entrada del grafo exportado
+EXPORT_IMGSZ = 640
+
+_export_lock = threading.Lock()
+
+
+def resolve_weights(weights: str, backend: str = DETECTOR_BACKEND) -> str:
+    """
+    Pesos a cargar para un backend, exportándolos la primera vez.
+
+    Args:
+        weights: Pesos de PyTorch (.pt) o un modelo ya exportado (.onnx)
+        backend: Uno de BACKENDS
+
+    Returns:
+        Ruta del modelo a cargar con YOLO()
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de detector desconocido: {backend} (opciones: {', '.join(BACKENDS)})")
+    if backend == "torch" or weights.endswith(".onnx"):
+        return weights
+
+    stem = os.path.splitext(weights)[0]
+    onnx_path = stem + ".onnx"
+    with _export_lock:
+        if not os.path.exists(onnx_path):
+            _export_onnx(weights, onnx_path)
+        if backend == "onnx":
+            return onnx_path
+
+        int8_path = stem + "-int8.onnx"
+        if not os.path.exists(int8_path):
+            _quantize_int8(onnx_path, int8_path)
+        return int8_path
+
+
+def load_detector(weights: str = "yolov8n.pt", backend: str = DETECTOR_BACKEND, device: str = "cpu"):
+    """
+    Carga el detector con el backend pedido.
+
+    Returns:
+        Instancia de ultralytics.YOLO (misma interfaz para todos los backends)
+    """
+    from ultralytics import YOLO
+
+    path = resolve_weights(weights, backend)
+    model = YOLO(path, task="detect")
+    model.overrides["device"] = device
+    return model
+
+
+def _export_onnx(weights: str, onnx_path: str):
+    """
+    Exporta a ONNX con tamaño de lote dinámico (para inferir por lotes).
+
+    Se exporta en un directorio temporal y se renombra al final, así otro
+    proceso nunca carga un archivo a medio escribir.
+    """
+    try:
+        import onnx  # noqa: F401
+        import onnxruntime  # noqa: F401
+    except ImportError:
+        raise ImportError("El backend onnx necesita los paquetes onnx y onnxruntime")
+
+    from ultralytics import YOLO
+
+    if not os.path.exists(weights):
+        YOLO(weights)  # descarga los pesos oficiales al directorio actual
+
+    tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(onnx_path)))
+    try:
+        tmp_weights = os.path.join(tmp_dir, os.path.basename(weights))
+        shutil.copy(weights, tmp_weights)
+        exported = YOLO(tmp_weights).export(format="onnx", imgsz=EXPORT_IMGSZ, dynamic=True, simplify=True)
+        os.replace(exported, onnx_path)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _quantize_int8(onnx_path: str, int8_path: str):
+    """Cuantiza los pesos del grafo ONNX a int8 (cuantización dinámica)."""
+    import onnx
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    tmp = f"{int8_path}.{os.getpid()}.tmp"
+    quantize_dynamic(onnx_path, tmp, weight_type=QuantType.QUInt8)
+
+    # ultralytics lee las clases y el tamaño de entrada de los metadatos
+    quantized = onnx.load(tmp)
+    if not quantized.metadata_props:
+        quantized.metadata_props.extend(onnx.load(onnx_path).metadata_props)
+        onnx.save(quantized, tmp)
+    os.replace(tmp, int8_path)
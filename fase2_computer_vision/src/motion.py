@@ -0,0 +1,96 @@
+"""
+Movimiento de las cajas entre keyframes.
+
+Cuando YOLO solo corre cada K frames, las posiciones de los frames intermedios
+se obtienen moviendo las cajas del último keyframe con flujo óptico disperso
+(Lucas-Kanade): se siguen esquinas dentro de cada caja y la caja se desplaza
+la mediana de sus desplazamientos. Las cajas sin puntos que seguir (p. ej. un
+balón muy pequeño) se quedan donde estaban.
+"""
+
+import dataclasses
+
+import cv2
+import numpy as np
+
+# Esquinas a seguir por caja
+POINTS_PER_BOX = 20
+
+LK_PARAMS = dict(
+    winSize=(15, 15),
+    maxLevel=2,
+    criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03)
+)
+
+
+def to_gray(frame: np.ndarray) -> np.ndarray:
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+
+def box_flow(prev_gray: np.ndarray, gray: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+    """
+    Desplazamiento (dx, dy) de cada caja entre dos frames.
+
+    Args:
+        prev_gray: Frame anterior en escala de grises
+        gray: Frame actual en escala de grises
+        boxes: Cajas xyxy en el frame anterior
+
+    Returns:
+        Matriz len(boxes) x 2 (ceros para las cajas sin puntos válidos)
+    """
+    shifts = np.zeros((len(boxes), 2), dtype=np.float32)
+    if len(boxes) == 0:
+        return shifts
+
+    # Una sola búsqueda de esquinas para todas las cajas
+    height, width = prev_gray.shape
+    mask = np.zeros_like(prev_gray)
+    for x1, y1, x2, y2 in boxes.astype(int):
+        mask[max(y1, 0):min(y2, height), max(x1, 0):min(x2, width)] = 255
+
+    points = cv2.goodFeaturesToTrack(
+        prev_gray, maxCorners=POINTS_PER_BOX * len(boxes), qualityLevel=0.01,
+        minDistance=3, mask=mask
+    )
+    if points is None:
+        return shifts
+
+    new_points, status, _ = cv2.calcOpticalFlowPyrLK(prev_gray, gray, points, None, **LK_PARAMS)
+    found = status.ravel() == 1
+    p0 = points.reshape(-1, 2)[found]
+    p1 = new_points.reshape(-1, 2)[found]
+
+    for i, (x1, y1, x2, y2) in enumerate(boxes):
+        inside = (p0[:, 0] >= x1) & (p0[:, 0] <= x2) & (p0[:, 1] >= y1) & (p0[:, 1] <= y2)
+        if inside.any():
+            shifts[i] = np.median(p1[inside] - p0[inside], axis=0)
+    return shifts
+
+
+class BoxPropagator:
+    """
+    Mueve las detecciones del último keyframe frame a frame.
+
+    reset() se llama en cada keyframe con sus detecciones (ya con tracker_id);
+    propagate() devuelve las detecciones movidas al frame siguiente, con los
+    mismos IDs, clases y confianzas.
+    """
+
+    def __init__(self):
+        self.prev_gray = None
+        self.detections = None
+
+    def reset(self, frame: np.ndarray, detections):
+        self.prev_gray = to_gray(frame)
+        self.detections = detections
+
+    def propagate(self, frame: np.ndarray):
+        gray = to_gray(frame)
+        detections = self.detections
+        if len(detections) > 0:
+            shifts = box_flow(self.prev_gray, gray, detections.xyxy)
+            detections = dataclasses.replace(detections, xyxy=detections.xyxy + np.hstack([shifts, shifts]))
+
+        self.prev_gray, self.detections = gray, detections
+        return detections
@@ -0,0 +1,292 @@
+"""
+Pipeline de video de una sola pasada con varias salidas.
+
+run_pipeline decodifica el video y ejecuta YOLO y el tracking una sola vez, y
+entrega cada frame a una lista de sinks. Cada sink produce una salida (tabla
+de detecciones, tabla de tracking, equipos por color, video anotado,
+resumen), así cualquier combinación de salidas cuesta lo mismo que una sola
+pasada de inferencia.
+
+Para añadir una salida basta con heredar de Sink e implementar write (y, si
+hace falta, open y close).
+"""
+
+import json
+import time
+from collections import Counter, defaultdict
+from contextlib import closing
+
+import cv2
+import pandas as pd
+import supervision as sv
+
+from chunked_tracking import STITCH_IOU, box_iou
+from detection_buffer import DetectionBuffer
+from team_colors import get_shirt_color, classify_team_v2
+from video_pipeline import BATCH_SIZE, KEYFRAME_STRIDE, detect_and_track
+
+
+class Sink:
+    """
+    Salida del pipeline.
+
+    open recibe la información del video (fps, tamaño, frames, nombres de
+    clases); write se llama con cada frame en orden; close termina la salida
+    y devuelve su resumen.
+    """
+
+    name = "sink"
+
+    def open(self, info: dict):
+        self.info = info
+
+    def write(self, frame_num: int, frame, detections, tracks):
+        """
+        Args:
+            frame_num: Número de frame
+            frame: Imagen BGR (no modificar: la comparten todos los sinks)
+            detections: Detecciones de YOLO, None si el frame se interpoló
+            tracks: Detecciones con tracker_id (detectadas o interpoladas)
+        """
+        raise NotImplementedError
+
+    def close(self) -> dict:
+        return {}
+
+
+class DetectionTableSink(Sink):
+    """Tabla con las detecciones de YOLO (mismas columnas que extract_positions.py)."""
+
+    name = "detections"
+
+    def __init__(self, path: str = "detections.csv"):
+        self.path = path
+        self.buffer = DetectionBuffer()
+
+    def write(self, frame_num, frame, detections, tracks):
+        if detections is not None:
+            self.buffer.append(frame_num, detections)
+
+    def close(self):
+        table = self.buffer.to_detection_table(self.info['names'], self.info['fps'])
+        table.drop(columns='source').to_csv(self.path, index=False)
+        return {'path': self.path, 'rows': len(self.buffer)}
+
+
+class TrackingTableSink(Sink):
+    """Tabla de tracking (mismas columnas que extract_tracking_data.py)."""
+
+    name = "tracking"
+
+    def __init__(self, path: str = "tracking_data.csv"):
+        self.path = path
+        self.buffer = DetectionBuffer()
+
+    def write(self, frame_num, frame, detections, tracks):
+        if tracks.tracker_id is None:
+            return
+        self.buffer.append(frame_num, tracks, detected=detections is not None)
+
+    def close(self):
+        self.buffer.to_tracking_table(self.info['names'], self.info['fps']).to_csv(self.path, index=False)
+        return {'path': self.path, 'rows': len(self.buffer)}
+
+
+class TeamColorSink(Sink):
+    """
+    Equipo de cada jugador por el color de la camiseta.
+
+    Como 05_detect_teams.py, clasifica cada `every` frames las detecciones de
+    personas de YOLO (no los tracks: ByteTrack descarta algunas y añade el
+    balón), así las filas coinciden con las del script. A cada detección se
+    le asigna el tracker_id del track con el que se solapa y cada tracker_id
+    recibe el equipo que más veces obtuvo. Con KEYFRAME_STRIDE > 1 solo se
+    clasifican los frames que además son keyframes.
+
+    Args:
+        path: CSV de salida (columnas de 05_detect_teams.py más tracker_id)
+        every: Cada cuántos frames clasificar
+    """
+
+    name = "teams"
+
+    def __init__(self, path: str = "team_detections_v2.csv", every: int = 10):
+        self.path = path
+        self.every = every
+        self.rows = []
+        self.votes = defaultdict(Counter)
+
+    def open(self, info):
+        super().open(info)
+        self.person_id = next(class_id for class_id, name in info['names'].items() if name == 'person')
+
+    def write(self, frame_num, frame, detections, tracks):
+        if frame_num % self.every != 0 or detections is None:
+            return
+        people = detections[detections.class_id == self.person_id]
+        tracker_ids = self._tracker_ids(people, tracks)
+
+        for i in range(len(people)):
+            bbox = people.xyxy[i].tolist()
+            color_info = get_shirt_color(frame, bbox)
+            team = classify_team_v2(color_info)
+            tracker_id = tracker_ids[i]
+
+            self.rows.append({
+                'frame': frame_num,
+                'time_sec': frame_num / self.info['fps'],
+                'tracker_id': tracker_id,
+                'center_x': (bbox[0] + bbox[2]) / 2,
+                'center_y': (bbox[1] + bbox[3]) / 2,
+                'team': team,
+                'brightness': color_info['brightness'] if color_info else 0,
+                'saturation': color_info['saturation'] if color_info else 0,
+                'hue': color_info['hue'] if color_info else 0
+            })
+            if tracker_id is not None and team != 'unknown':
+                self.votes[tracker_id][team] += 1
+
+    @staticmethod
+    def _tracker_ids(people, tracks) -> list:
+        """tracker_id del track que mejor se solapa con cada detección (None si ninguno)."""
+        ids = [None] * len(people)
+        if len(people) == 0 or len(tracks) == 0 or tracks.tracker_id is None:
+            return ids
+        iou = box_iou(people.xyxy, tracks.xyxy)
+        for i, j in enumerate(iou.argmax(axis=1)):
+            if iou[i, j] >= STITCH_IOU:
+                ids[i] = int(tracks.tracker_id[j])
+        return ids
+
+    def close(self):
+        pd.DataFrame(self.rows).to_csv(self.path, index=False)
+        track_teams = {tid: votes.most_common(1)[0][0] for tid, votes in self.votes.items()}
+        return {
+            'path': self.path,
+            'rows': len(self.rows),
+            'track_teams': track_teams,
+            'players_per_team': dict(Counter(track_teams.values()))
+        }
+
+
+class AnnotatedVideoSink(Sink):
+    """Video con cajas e IDs de tracking."""
+
+    name = "video"
+
+    def __init__(self, path: str = "football_tracked.mp4"):
+        self.path = path
+        self.writer = None
+        self.frames = 0
+
+    def open(self, info):
+        super().open(info)
+        self.writer = cv2.VideoWriter(
+            self.path, cv2.VideoWriter_fourcc(*'mp4v'), info['fps'], (info['width'], info['height'])
+        )
+        self.box_annotator = sv.BoxAnnotator()
+        self.label_annotator = sv.LabelAnnotator()
+
+    def write(self, frame_num, frame, detections, tracks):
+        labels = [f"#{tracker_id}" for tracker_id in tracks.tracker_id] if tracks.tracker_id is not None else None
+        annotated = self.box_annotator.annotate(frame.copy(), detections=tracks)
+        annotated = self.label_annotator.annotate(annotated, detections=tracks, labels=labels)
+        self.writer.write(annotated)
+        self.frames += 1
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.release()
+        return {'path': self.path, 'frames': self.frames}
+
+
+class SummarySink(Sink):
+    """Métricas resumen del video (opcionalmente guardadas en JSON)."""
+
+    name = "summary"
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self.frames = 0
+        self.keyframes = 0
+        self.player_rows = 0
+        self.ball_frames = 0
+        self.player_ids = set()
+
+    def write(self, frame_num, frame, detections, tracks):
+        self.frames += 1
+        self.keyframes += detections is not None
+
+        names = [self.info['names'][int(c)] for c in tracks.class_id]
+        players = [i for i, name in enumerate(names) if name == 'person']
+        self.player_rows += len(players)
+        self.ball_frames += 'sports ball' in names
+        if tracks.tracker_id is not None:
+            self.player_ids.update(int(tracks.tracker_id[i]) for i in players)
+
+    def close(self):
+        summary = {
+            'frames': self.frames,
+            'keyframes': self.keyframes,
+            'duration_sec': round(self.frames / self.info['fps'], 2) if self.info['fps'] else None,
+            'unique_players': len(self.player_ids),
+            'avg_players_per_frame': round(self.player_rows / self.frames, 2) if self.frames else 0,
+            'ball_visible_pct': round(100 * self.ball_frames / self.frames, 1) if self.frames else 0
+        }
+        if self.path:
+            with open(self.path, 'w') as f:
+                json.dump(summary, f, indent=2)
+        return summary
+
+
+def run_pipeline(video_path: str, model, sinks: list, tracker=None, conf: float = 0.3,
+                 classes: list = [0, 32], batch_size: int = BATCH_SIZE,
+                 stride: int = KEYFRAME_STRIDE, progress_every: int = 100) -> dict:
+    """
+    Pasa un video una sola vez por YOLO y el tracker y alimenta todos los sinks.
+
+    Args:
+        video_path: Ruta al video
+        model: Modelo YOLO
+        sinks: Salidas a producir
+        tracker: Tracker de supervision (por defecto sv.ByteTrack())
+        conf: Confianza mínima de detección
+        classes: Clases de COCO a detectar
+        batch_size: Frames por llamada al modelo
+        stride: Paso de keyframes (1 = detectar en todos los frames)
+        progress_every: Cada cuántos frames imprimir el progreso (0 = nunca)
+
+    Returns:
+        Resumen de cada sink por nombre, más el tiempo total
+    """
+    cap = cv2.VideoCapture(video_path)
+    info = {
+        'video_path': video_path,
+        'fps': cap.get(cv2.CAP_PROP_FPS),
+        'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        'total_frames': int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+        'names': model.names
+    }
+    tracker = tracker if tracker is not None else sv.ByteTrack()
+
+    start = time.perf_counter()
+    opened = []
+    try:
+        for sink in sinks:
+            sink.open(info)
+            opened.append(sink)
+
+        with closing(detect_and_track(cap, model, tracker, conf, classes, batch_size,
+                                      stride=stride)) as tracked:
+            for frame_num, frame, detections, tracks in tracked:
+                for sink in sinks:
+                    sink.write(frame_num, frame, detections, tracks)
+                if progress_every and (frame_num + 1) % progress_every == 0:
+                    print(f"   Procesados: {frame_num + 1}/{info['total_frames']} frames")
+    finally:
+        cap.release()
+        summaries = {sink.name: sink.close() for sink in opened}
+
+    summaries['elapsed_sec'] = round(time.perf_counter() - start, 2)
+    return summaries
@@ -0,0 +1,268 @@
+"""
+Pipeline de video compartido: lectura de frames, detección YOLO y tracking.
+
+YOLO se ejecuta sobre lotes de frames (una sola llamada al modelo por lote),
+lo que reparte el coste fijo de cada inferencia y aprovecha mejor los núcleos
+de la CPU. ByteTrack recibe las detecciones frame a frame y en orden, así el
+tracking es idéntico al de procesar los frames de uno en uno.
+
+Por defecto las etapas corren en paralelo: un hilo decodifica, otro ejecuta
+YOLO y el hilo que consume el generador hace el tracking y el resto del
+trabajo. Las etapas se comunican por colas acotadas, así un consumidor lento
+frena al decodificador en lugar de llenar la memoria de frames.
+
+Con un paso de keyframes K > 1, YOLO solo corre en uno de cada K frames; en
+los frames intermedios las cajas del último keyframe se mueven con flujo
+óptico (ver motion.py), conservando sus IDs de tracking.
+"""
+
+import os
+import queue
+import threading
+
+import supervision as sv
+
+from motion import BoxPropagator
+
+# Frames por llamada al modelo
+BATCH_SIZE = int(os.environ.get("YOLO_BATCH_SIZE", 8))
+
+# Ejecutar decodificación, inferencia y tracking en etapas paralelas
+PIPELINED = os.environ.get("VIDEO_PIPELINED", "1") == "1"
+
+# Detectar solo en uno de cada K frames (1 = todos)
+KEYFRAME_STRIDE = int(os.environ.get("KEYFRAME_STRIDE", 1))
+
+# Lotes en espera entre dos etapas
+QUEUE_SIZE = int(os.environ.get("VIDEO_PIPELINE_QUEUE", 4))
+
+# Marca de fin de video entre etapas
+_DONE = object()
+
+
+class _Failure:
+    """Error de una etapa, reenviado al consumidor."""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def read_batches(cap, batch_size: int = BATCH_SIZE, max_frames: int = None):
+    """
+    Lee un video en lotes de frames.
+    
+    Args:
+        cap: cv2.VideoCapture abierto
+        batch_size: Frames por lote (el último puede ser menor)
+        max_frames: Máximo de frames a leer (None = hasta el final)
+    
+    Yields:
+        Listas de frames en orden
+    """
+    batch = []
+    remaining = max_frames if max_frames is not None else float('inf')
+    while cap.isOpened() and remaining > 0:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        batch.append(frame)
+        remaining -= 1
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    
+    if batch:
+        yield batch
+
+
+def detect_batch(model, frames: list, conf: float, classes: list) -> list:
+    """Detecta objetos en un lote de frames con una sola inferencia."""
+    results = model(frames, verbose=False, conf=conf, classes=classes)
+    return [sv.Detections.from_ultralytics(r) for r in results]
+
+
+def detect_keyframes(model, frames: list, offset: int, stride: int, conf: float, classes: list) -> list:
+    """
+    Detecta solo en los keyframes de un lote, con una sola inferencia.
+    
+    Args:
+        offset: Posición del primer frame del lote desde el inicio del tracking
+        stride: Paso de keyframes
+    
+    Returns:
+        Detecciones por frame (None en los frames que no son keyframe)
+    """
+    keys = [i for i in range(len(frames)) if is_keyframe(offset + i, stride)]
+    detections = [None] * len(frames)
+    if keys:
+        for i, d in zip(keys, detect_batch(model, [frames[i] for i in keys], conf, classes)):
+            detections[i] = d
+    return detections
+
+
+def is_keyframe(frame_num: int, stride: int = KEYFRAME_STRIDE, start_frame: int = 0) -> bool:
+    """Indica si YOLO corre en un frame (las detecciones del resto se interpolan)."""
+    return (frame_num - start_frame) % stride == 0
+
+
+def track_frames(cap, model, tracker, conf: float = 0.3, classes: list = [0, 32],
+                 batch_size: int = BATCH_SIZE, pipelined: bool = PIPELINED,
+                 start_frame: int = 0, max_frames: int = None, stride: int = KEYFRAME_STRIDE):
+    """
+    Detecta por lotes y aplica tracking a cada frame en orden.
+    
+    Con stride > 1 el tracker solo recibe los keyframes; en el resto de
+    frames se devuelven las detecciones del keyframe anterior movidas con
+    flujo óptico (is_keyframe indica cuáles son detectadas).
+    
+    Si se deja el generador a medias (p. ej. al cancelar), hay que cerrarlo
+    (contextlib.closing) para detener los hilos y soltar el video.
+    
+    Args:
+        cap: cv2.VideoCapture abierto
+        model: Modelo YOLO
+        tracker: sv.ByteTrack (u otro tracker de supervision), o None para no hacer tracking
+        conf: Confianza mínima de detección
+        classes: Clases de COCO a detectar (0 = persona, 32 = balón)
+        batch_size: Frames por llamada al modelo
+        pipelined: Decodificar e inferir en hilos aparte
+        start_frame: Número del primer frame (el video ya debe estar posicionado)
+        max_frames: Máximo de frames a procesar (None = hasta el final)
+        stride: Paso de keyframes (1 = detectar en todos los frames)
+    
+    Yields:
+        (frame_num, frame, detections con tracker_id)
+    """
+    tracked = detect_and_track(cap, model, tracker, conf, classes, batch_size, pipelined,
+                               start_frame, max_frames, stride)
+    try:
+        for frame_num, frame, _, tracks in tracked:
+            yield frame_num, frame, tracks
+    finally:
+        tracked.close()
+
+
+def detect_and_track(cap, model, tracker, conf: float = 0.3, classes: list = [0, 32],
+                     batch_size: int = BATCH_SIZE, pipelined: bool = PIPELINED,
+                     start_frame: int = 0, max_frames: int = None, stride: int = KEYFRAME_STRIDE):
+    """
+    Igual que track_frames, pero entrega también las detecciones de YOLO.
+    
+    Sirve a quien necesita a la vez la salida del detector y la del tracker
+    (ver sinks.py) sin volver a pasar el video por el modelo.
+    
+    Yields:
+        (frame_num, frame, detecciones de YOLO o None si el frame se
+        interpoló, tracks)
+    """
+    if pipelined:
+        batches = _pipelined_batches(cap, model, conf, classes, batch_size, max_frames, stride)
+    else:
+        batches = _sequential_batches(cap, model, conf, classes, batch_size, max_frames, stride)
+    
+    propagator = BoxPropagator() if stride > 1 else None
+    frame_num = start_frame
+    try:
+        for frames, batch_detections in batches:
+            for frame, detections in zip(frames, batch_detections):
+                if detections is None:
+                    tracks = propagator.propagate(frame)
+                else:
+                    tracks = detections
+                    if tracker is not None:
+                        tracks = tracker.update_with_detections(detections)
+                    if propagator is not None:
+                        propagator.reset(frame, tracks)
+                yield frame_num, frame, detections, tracks
+                frame_num += 1
+    finally:
+        batches.close()
+
+
+def _sequential_batches(cap, model, conf: float, classes: list, batch_size: int,
+                        max_frames: int = None, stride: int = 1):
+    """Lotes (frames, detecciones) leídos e inferidos en el hilo que consume."""
+    offset = 0
+    for frames in read_batches(cap, batch_size, max_frames):
+        yield frames, detect_keyframes(model, frames, offset, stride, conf, classes)
+        offset += len(frames)
+
+
+def _pipelined_batches(cap, model, conf: float, classes: list, batch_size: int,
+                       max_frames: int = None, stride: int = 1):
+    """
+    Lotes (frames, detecciones) producidos por los hilos de decodificación e inferencia.
+    
+    Los errores de cualquier etapa se relanzan en el consumidor. Al cerrar el
+    generador se detienen ambos hilos.
+    """
+    stop = threading.Event()
+    decoded = queue.Queue(maxsize=QUEUE_SIZE)
+    detected = queue.Queue(maxsize=QUEUE_SIZE)
+    
+    def decode():
+        try:
+            for frames in read_batches(cap, batch_size, max_frames):
+                if not _put(decoded, frames, stop):
+                    return
+            _put(decoded, _DONE, stop)
+        except BaseException as e:
+            _put(decoded, _Failure(e), stop)
+    
+    def infer():
+        offset = 0
+        try:
+            while True:
+                item = _get(decoded, stop)
+                if item is None:
+                    return
+                if item is _DONE or isinstance(item, _Failure):
+                    _put(detected, item, stop)
+                    return
+                batch_detections = detect_keyframes(model, item, offset, stride, conf, classes)
+                offset += len(item)
+                if not _put(detected, (item, batch_detections), stop):
+                    return
+        except BaseException as e:
+            _put(detected, _Failure(e), stop)
+    
+    threads = [
+        threading.Thread(target=decode, name="video-decode", daemon=True),
+        threading.Thread(target=infer, name="video-infer", daemon=True)
+    ]
+    for thread in threads:
+        thread.start()
+    
+    try:
+        while True:
+            item = detected.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+
+def _put(q: queue.Queue, item, stop: threading.Event) -> bool:
+    """Encola esperando si la cola está llena; False si se pidió parar."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q: queue.Queue, stop: threading.Event):
+    """Desencola esperando; None si se pidió parar."""
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return None
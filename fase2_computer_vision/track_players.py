@@ -1,9 +1,13 @@
-from ultralytics import YOLO
 import supervision as sv
 import cv2
+import sys
 
-# Cargar modelo
-model = YOLO('yolov8n.pt')
+sys.path.append('src')
+from video_pipeline import track_frames, BATCH_SIZE
+from detectors import load_detector, DETECTOR_BACKEND
+
+# Cargar modelo (backend según YOLO_BACKEND)
+model = load_detector('yolov8n.pt')
 
 # Configurar tracker (ByteTrack)
 tracker = sv.ByteTrack()
@@ -29,22 +33,11 @@ out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
 print(f"🎬 Procesando video con tracking...")
 print(f"   Entrada: {video_path}")
 print(f"   Salida: {output_path}")
+print(f"   Lote YOLO: {BATCH_SIZE} frames ({DETECTOR_BACKEND})")
 
 frame_count = 0
-while cap.isOpened():
-    ret, frame = cap.read()
-    if not ret:
-        break
-    
-    # Detectar
-    results = model(frame, verbose=False, conf=0.3, classes=[0, 32])[0]
-    
-    # Convertir a formato Supervision
-    detections = sv.Detections.from_ultralytics(results)
-    
-    # Aplicar tracking (asigna IDs únicos)
-    detections = tracker.update_with_detections(detections)
-    
+# Detectar por lotes y aplicar tracking (asigna IDs únicos) frame a frame
+for _, frame, detections in track_frames(cap, model, tracker, conf=0.3, classes=[0, 32]):
     # Crear etiquetas con ID de tracking
     labels = [f"#{tracker_id}" for tracker_id in detections.tracker_id]
     
@@ -3,95 +3,16 @@ Detecta equipos por color - Versión mejorada.
 Toma región central del jugador para evitar el césped.
 """
 
-from ultralytics import YOLO
 import cv2
-import numpy as np
 import pandas as pd
+import sys
 
-model = YOLO('../fase2_computer_vision/models/yolov8n.pt')
-video_path = "../fase2_computer_vision/data/videos/football_test.mp4"
-
-
-def get_shirt_color(image, bbox):
-    """
-    Extrae el color de la camiseta tomando solo el centro del bounding box.
-    """
-    x1, y1, x2, y2 = map(int, bbox)
-    
-    # Calcular región central (evitar bordes con césped)
-    width = x2 - x1
-    height = y2 - y1
-    
-    # Tomar solo el centro: 30% central horizontalmente, 20-50% verticalmente (torso)
-    margin_x = int(width * 0.35)
-    top_y = y1 + int(height * 0.15)
-    bottom_y = y1 + int(height * 0.45)
-    
-    center_x1 = x1 + margin_x
-    center_x2 = x2 - margin_x
-    
-    # Verificar que la región sea válida
-    if center_x2 <= center_x1 or bottom_y <= top_y:
-        return None
-    
-    # Recortar región del torso
-    roi = image[top_y:bottom_y, center_x1:center_x2]
-    
-    if roi.size == 0 or roi.shape[0] < 5 or roi.shape[1] < 5:
-        return None
-    
-    # Convertir a HSV
-    hsv = cv2.cvtColor(roi, cv2.COLOR_BGR2HSV)
-    
-    # Calcular promedios
-    avg_hue = np.mean(hsv[:, :, 0])
-    avg_saturation = np.mean(hsv[:, :, 1])
-    avg_brightness = np.mean(hsv[:, :, 2])
-    
-    return {
-        'hue': avg_hue,
-        'saturation': avg_saturation,
-        'brightness': avg_brightness
-    }
-
+sys.path.append('../fase2_computer_vision/src')
+from team_colors import get_shirt_color, classify_team_v2
+from detectors import load_detector
 
-def classify_team_v2(color_info):
-    """
-    Clasifica equipo con umbrales ajustados - v3.
-    """
-    if color_info is None:
-        return 'unknown'
-    
-    hue = color_info['hue']
-    brightness = color_info['brightness']
-    saturation = color_info['saturation']
-    
-    # Real Madrid: Blanco (alto brillo, baja saturación)
-    if brightness > 160 and saturation < 70:
-        return 'real_madrid'
-    
-    # Barcelona: Azulgrana
-    # Rojo/Granate: hue 0-20 o 160-180
-    if (hue <= 20 or hue >= 160) and saturation > 100:
-        return 'barcelona'
-    
-    # Azul oscuro del Barcelona: hue 100-140
-    if 100 <= hue <= 140 and saturation > 80:
-        return 'barcelona'
-    
-    # Árbitro: Muy oscuro
-    if brightness < 60:
-        return 'referee'
-    
-    # Real Madrid alternativo: muy brillante aunque tenga algo de color
-    if brightness > 180:
-        return 'real_madrid'
-    
-    # Barcelona: saturación muy alta con brillo medio-bajo
-    if saturation > 140 and brightness < 130 and 40 <= hue <= 80:
-        return 'barcelona'
-    
-    return 'unknown'
+model = load_detector('../fase2_computer_vision/models/yolov8n.pt')
+video_path = "../fase2_computer_vision/data/videos/football_test.mp4"
 
 
 # Procesar video
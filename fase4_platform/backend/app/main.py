@@ -2,18 +2,45 @@
 Football Analytics Platform - Backend Principal
 """
 
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, HTTPException, Request, BackgroundTasks, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse, PlainTextResponse, JSONResponse, Response
+from pydantic import BaseModel
+from typing import List
+import asyncio
+import hashlib
+import socket
 import sys
 import os
+import threading
 import uuid
 from datetime import datetime
 
 # Añadir el directorio app al path para importar services
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from services import blocking
+from services.blocking import run_blocking, ServiceBusy, ServiceTimeout
+from services.job_queue import VideoJobQueue, QueueFull, ClientLimitReached
+from services.job_store import JobStore
+from services import metrics
+from services.compression import CompressionMiddleware
+from services.artifacts import ARTIFACTS_DIR, list_artifacts, artifact_path, RangeFileResponse
+from services.metrics import MetricsMiddleware
+from services.progress import ProgressBroker, format_sse
+from services.oart_scorer import get_calculator, score_events
+from services.warmup import Warmup, import_modules, wait_until
+from services.retention import RetentionManager
+from services.video_cache import (
+    VIDEO_CACHE_DIR, VIDEO_CACHE_QUOTA_BYTES, get_cached_results, save_cached_results, store_by_hash
+)
+from services.uploads import (
+    MAX_UPLOAD_BYTES, MULTIPART_OVERHEAD_BYTES, UPLOAD_CHUNK_SIZE, UploadTooLarge, OffsetMismatch,
+    InvalidMultipart, MultipartFile, save_upload, append_chunk, finish_upload, abort_upload, received_bytes
+)
+
 # Crear app
 app = FastAPI(
     title="⚽ Football Analytics Platform",
@@ -30,11 +57,50 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compresión gzip/brotli de respuestas grandes
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", 1024))
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESS_MIN_BYTES)
+
+# Métricas de latencia por ruta
+app.add_middleware(MetricsMiddleware)
+
 # Directorios (rutas relativas desde donde se ejecuta)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 STATIC_DIR = os.path.join(BASE_DIR, "static")
 UPLOAD_DIR = os.path.join(BASE_DIR, "uploads")
 RESULTS_DIR = os.path.join(BASE_DIR, "results")
+JOBS_DB = os.environ.get("JOBS_DB", os.path.join(RESULTS_DIR, "jobs.db"))
+
+# Procesos worker para análisis de video
+VIDEO_WORKERS = int(os.environ.get("VIDEO_WORKERS", 2))
+
+# Control de admisión de la cola de video
+VIDEO_QUEUE_MAX = int(os.environ.get("VIDEO_QUEUE_MAX", 4 * VIDEO_WORKERS))
+VIDEO_MAX_JOBS_PER_CLIENT = int(os.environ.get("VIDEO_MAX_JOBS_PER_CLIENT", 2))
+VIDEO_RETRY_AFTER_SEC = 30
+
+# Reintentos de un análisis cuyo worker murió (se reanuda desde su punto de control)
+VIDEO_MAX_RETRIES = int(os.environ.get("VIDEO_MAX_RETRIES", 2))
+
+# Identidad de este proceso del servidor y latido para recuperar trabajos huérfanos
+SERVER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+SERVER_HEARTBEAT_SEC = float(os.environ.get("SERVER_HEARTBEAT_SEC", 10))
+SERVER_DEAD_AFTER_SEC = 3 * SERVER_HEARTBEAT_SEC
+_recovery_stop = threading.Event()
+
+# Máximo de equipos/jugadores por comparación en lote
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", 16))
+
+# Calentamiento al arrancar
+WARMUP_COMPETITION = os.environ.get("WARMUP_COMPETITION", "worldcup_2022")
+WARMUP_CACHES = os.environ.get("WARMUP_CACHES", "1") == "1"
+WARMUP_MODEL_TIMEOUT_SEC = float(os.environ.get("WARMUP_MODEL_TIMEOUT_SEC", 300))
+
+# Máximo de pases por petición de OART
+MAX_OART_EVENTS = int(os.environ.get("MAX_OART_EVENTS", 1000))
+
+# Intervalo de keep-alive de los streams de progreso
+SSE_HEARTBEAT_SEC = 15
 
 # Crear directorios si no existen
 for dir_path in [UPLOAD_DIR, RESULTS_DIR]:
@@ -43,8 +109,211 @@ for dir_path in [UPLOAD_DIR, RESULTS_DIR]:
 # Montar archivos estáticos
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 
-# Base de datos en memoria
-jobs = {}
+# Estados finales de un trabajo
+FINAL_STATUSES = ("completed", "error", "cancelled")
+
+# Base de datos de trabajos (SQLite)
+job_store = JobStore(JOBS_DB)
+
+# Cuotas de disco (videos, artefactos y caché de resultados)
+retention = RetentionManager(job_store, UPLOAD_DIR, ARTIFACTS_DIR, VIDEO_CACHE_DIR, VIDEO_CACHE_QUOTA_BYTES)
+
+
+def get_job_or_404(job_id: str, include_results: bool = False) -> dict:
+    """Devuelve un trabajo o responde 404."""
+    job = job_store.get(job_id, include_results=include_results)
+    if job is None:
+        raise HTTPException(404, "Job no encontrado")
+    return job
+
+
+def on_video_event(job_id: str, kind: str, payload):
+    """
+    Actualiza un trabajo con los eventos de la cola de video.
+    
+    Un trabajo ya terminado no se toca: la comprobación va dentro de la misma
+    transacción que la escritura, así un progreso tardío no pisa el resultado.
+    """
+    job = job_store.get(job_id, include_results=False)
+    if job is None or job["status"] in FINAL_STATUSES:
+        return
+    
+    def update(**fields):
+        return job_store.update(job_id, unless_status=FINAL_STATUSES, **fields)
+    
+    results = None
+    if kind == "processing":
+        job = update(status="processing")
+    elif kind == "retrying":
+        # El intento reanuda desde su punto de control: el progreso anterior ya no vale
+        job = update(status="queued", retries=payload["attempt"], live=None)
+    elif kind == "progress":
+        # Tras un reintento (live=None) el worker reanuda desde start_frame
+        frames_before = (job.get("live") or {}).get("frames_processed", payload.get("start_frame", 0))
+        job = update(progress=payload["progress"], live=payload)
+        if job is not None:
+            # Un contador nunca baja (p. ej. si el worker reanuda desde un frame anterior)
+            metrics.video_frames.inc(max(0, payload["frames_processed"] - frames_before))
+            metrics.video_job_fps.set(payload["fps"], job_id=job_id)
+    elif kind == "completed":
+        results = payload
+        job = update(status="completed", progress=100, results=results,
+                     artifacts_job=artifacts_job(results))
+        if job is not None:
+            save_cached_results(job.get("sha256"), results)
+            # El video ya analizado pasa a ser candidato de desalojo
+            retention.enforce_uploads()
+    elif kind == "error":
+        job = update(status="error", error=payload)
+    elif kind == "cancelled":
+        job = update(status="cancelled")
+    
+    if kind in FINAL_STATUSES:
+        metrics.video_job_fps.remove(job_id=job_id)
+    
+    if job is None:
+        # Terminó (o se borró) entre la lectura y la escritura
+        return
+    
+    live = job.get("live") or {}
+    if kind == "completed" and live.get("fps"):
+        metrics.video_throughput.observe(live["fps"])
+    
+    progress_broker.publish(job_id, kind, job_event_data(job, results))
+
+
+def artifacts_job(results: dict):
+    """Trabajo que generó los artefactos de un resultado (puede venir de la caché)."""
+    return ((results or {}).get("artifacts") or {}).get("job_id")
+
+
+def job_event_data(job: dict, results: dict = None) -> dict:
+    """Datos que se envían a los clientes en cada evento de progreso."""
+    data = {"job_id": job["id"], "status": job["status"], "progress": job["progress"]}
+    data.update(job.get("live") or {})
+    if job["status"] == "completed":
+        data["results"] = results if results is not None else job_store.get_results(job["id"])
+    elif job["status"] == "error":
+        data["error"] = job.get("error")
+    return data
+
+
+video_queue = VideoJobQueue(
+    on_video_event,
+    max_workers=VIDEO_WORKERS,
+    max_pending=VIDEO_QUEUE_MAX,
+    max_per_client=VIDEO_MAX_JOBS_PER_CLIENT,
+    max_retries=VIDEO_MAX_RETRIES
+)
+progress_broker = ProgressBroker()
+warmup = Warmup()
+
+
+def workers_warm() -> bool:
+    """True cuando todos los workers de video tienen YOLO cargado."""
+    models = video_queue.model_status()
+    errors = [m["error"] for m in models if m.get("error")]
+    if errors:
+        raise RuntimeError(errors[0])
+    return len({m["pid"] for m in models if m.get("warm")}) >= VIDEO_WORKERS
+
+
+def warm_caches():
+    """Precarga la tabla de estilos y el índice de jugadores."""
+    from services.team_analyzer import warm_style_cache
+    from services.player_index import get_player_index
+    warm_style_cache(WARMUP_COMPETITION)
+    get_player_index(WARMUP_COMPETITION)
+
+
+warmup.add("imports", lambda: import_modules([
+    "statsbombpy", "services.statsbomb_data", "services.team_analyzer", "services.player_analyzer"
+]))
+warmup.add("video_workers", lambda: wait_until(workers_warm, WARMUP_MODEL_TIMEOUT_SEC))
+warmup.add("oart_model", lambda: get_calculator(), required=False)
+if WARMUP_CACHES:
+    # Depende de la red: si falla, las cachés se llenan con las primeras peticiones
+    warmup.add("caches", warm_caches, required=False)
+
+
+@app.on_event("startup")
+async def start_video_queue():
+    """Arranca el pool de workers de video y el calentamiento."""
+    progress_broker.bind(asyncio.get_running_loop())
+    video_queue.start()
+    job_store.heartbeat(SERVER_ID)
+    threading.Thread(target=recovery_loop, daemon=True).start()
+    warmup.start()
+    retention.start()
+
+
+def recovery_loop():
+    """Latido de este proceso y recuperación periódica de trabajos huérfanos."""
+    while not _recovery_stop.is_set():
+        try:
+            job_store.heartbeat(SERVER_ID)
+            recover_interrupted_jobs()
+        except Exception:
+            # Base de datos ocupada u otro error pasajero: se reintenta en el siguiente latido
+            pass
+        _recovery_stop.wait(SERVER_HEARTBEAT_SEC)
+
+
+def recover_interrupted_jobs():
+    """
+    Vuelve a encolar los análisis cuyo proceso dueño murió.
+    
+    Con varios workers de uvicorn cada proceso late en la tabla servers; un
+    trabajo en curso solo se recupera si su dueño dejó de latir, y claim()
+    garantiza que lo recupere un único proceso. Cada uno se reanuda desde
+    su último punto de control.
+    """
+    live_owners = job_store.live_servers(SERVER_DEAD_AFTER_SEC)
+    
+    interrupted, cursor = [], None
+    while True:
+        jobs, cursor = job_store.list(status="processing,queued", limit=100, cursor=cursor)
+        interrupted.extend(job for job in jobs if job.get("owner") not in live_owners)
+        if cursor is None:
+            break
+    
+    # En orden de llegada
+    for job in reversed(interrupted):
+        job = job_store.claim(job["id"], SERVER_ID, ("processing", "queued"), live_owners)
+        if job is None:
+            continue
+        if not job.get("filepath") or not os.path.exists(job["filepath"]):
+            job_store.update(job["id"], status="error", error="Análisis interrumpido y el video ya no existe")
+            continue
+        job_store.update(job["id"], status="queued", live=None)
+        try:
+            video_queue.submit(job["id"], job["filepath"])
+        except QueueFull:
+            job_store.update(job["id"], status="error",
+                             error="Análisis interrumpido por un reinicio; vuelve a lanzarlo")
+
+
+@app.on_event("shutdown")
+def stop_video_queue():
+    """Detiene el pool de workers de video."""
+    _recovery_stop.set()
+    video_queue.shutdown()
+    # Sin latido, otro proceso (o el siguiente arranque) recupera sus trabajos de inmediato
+    job_store.remove_server(SERVER_ID)
+    blocking.shutdown()
+    retention.stop()
+
+
+async def run_service(func, *args):
+    """Ejecuta un servicio bloqueante fuera del event loop y traduce sus errores."""
+    try:
+        return await run_blocking(func, *args)
+    except ServiceBusy:
+        raise HTTPException(503, "Servicio ocupado, inténtalo de nuevo en unos segundos")
+    except ServiceTimeout:
+        raise HTTPException(504, "El análisis tardó demasiado")
+    except Exception as e:
+        raise HTTPException(500, str(e))
 
 # ============================================================
 # PÁGINA PRINCIPAL
@@ -73,7 +342,8 @@ def api_info():
         "modules": {
             "video": "/api/video",
             "teams": "/api/teams", 
-            "players": "/api/players"
+            "players": "/api/players",
+            "oart": "/api/oart"
         }
     }
 
@@ -81,61 +351,234 @@ def api_info():
 # MÓDULO VIDEO
 # ============================================================
 
-@app.post("/api/video/upload")
-async def upload_video(file: UploadFile = File(...)):
-    """Sube un video para análisis."""
+ALLOWED_VIDEO_EXTENSIONS = ['.mp4', '.avi', '.mov', '.mkv']
+
+
+def create_video_job(filename: str, size_bytes: int = None) -> dict:
+    """Valida la extensión y crea el registro del trabajo antes de recibir datos."""
     
-    allowed = ['.mp4', '.avi', '.mov', '.mkv']
-    ext = os.path.splitext(file.filename)[1].lower()
+    ext = os.path.splitext(filename)[1].lower()
     
-    if ext not in allowed:
-        raise HTTPException(400, f"Formato no soportado. Use: {allowed}")
+    if ext not in ALLOWED_VIDEO_EXTENSIONS:
+        raise HTTPException(400, f"Formato no soportado. Use: {ALLOWED_VIDEO_EXTENSIONS}")
     
-    job_id = str(uuid.uuid4())[:8]
-    file_path = os.path.join(UPLOAD_DIR, f"{job_id}{ext}")
+    if size_bytes is not None and size_bytes > MAX_UPLOAD_BYTES:
+        raise HTTPException(413, f"Archivo demasiado grande (máx. {MAX_UPLOAD_BYTES} bytes)")
     
-    with open(file_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
+    job_id = str(uuid.uuid4())[:8]
     
-    jobs[job_id] = {
+    return job_store.create({
         "id": job_id,
         "type": "video",
-        "filename": file.filename,
-        "filepath": file_path,
-        "status": "uploaded",
+        "filename": filename,
+        "filepath": os.path.join(UPLOAD_DIR, f"{job_id}{ext}.part"),
+        "status": "uploading",
         "progress": 0,
-        "created_at": datetime.now().isoformat(),
-        "results": None
+        "size_bytes": size_bytes,
+        "created_at": datetime.now().isoformat()
+    })
+
+
+def finalize_upload(job: dict, info: dict) -> dict:
+    """
+    Guarda el video por su hash y reutiliza el resultado si ya se analizó.
+    
+    Un video repetido no se guarda dos veces y, si existe un resultado para
+    la misma configuración de detección, el trabajo queda completado.
+    
+    Bloquea (cuota de videos, copia por hash): desde los handlers async se
+    llama con run_in_threadpool.
+    """
+    ext = os.path.splitext(job["filename"])[1].lower()
+    filepath = store_by_hash(job["filepath"], UPLOAD_DIR, info["sha256"], ext)
+    
+    retention.enforce_uploads(keep=[filepath])
+    
+    cached = get_cached_results(info["sha256"])
+    if cached is not None:
+        return job_store.update(job["id"], status="completed", progress=100, filepath=filepath,
+                                results=cached, cached=True, artifacts_job=artifacts_job(cached),
+                                **info)
+    
+    return job_store.update(job["id"], status="uploaded", filepath=filepath, **info)
+
+
+def fail_upload(job: dict, status_code: int, message: str):
+    """Marca una subida como fallida y responde con el error."""
+    job_store.update(job["id"], status="error", error=message)
+    raise HTTPException(status_code, message)
+
+
+@app.post("/api/video/upload")
+async def upload_video(request: Request):
+    """
+    Sube un video para análisis (formulario multipart con el campo 'file').
+    
+    El archivo se escribe a disco por bloques a medida que llega, sin pasar
+    por el archivo temporal de UploadFile. Si Content-Length ya supera el
+    máximo, se rechaza antes de leer el cuerpo.
+    """
+    
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES:
+        raise HTTPException(413, f"Archivo demasiado grande (máx. {MAX_UPLOAD_BYTES} bytes)")
+    
+    try:
+        upload = MultipartFile(request.headers.get("content-type", ""), request.stream())
+        filename = await upload.start()
+    except InvalidMultipart as e:
+        raise HTTPException(400, str(e))
+    
+    job = create_video_job(filename)
+    
+    try:
+        info = await save_upload(upload.chunks(), job["filepath"])
+    except UploadTooLarge:
+        fail_upload(job, 413, f"Archivo demasiado grande (máx. {MAX_UPLOAD_BYTES} bytes)")
+    except InvalidMultipart as e:
+        fail_upload(job, 400, str(e))
+    except BaseException:
+        # Desconexión del cliente o error de disco: esta subida no se puede reanudar
+        job_store.update(job["id"], status="error", error="Subida interrumpida")
+        raise
+    
+    job = await run_in_threadpool(finalize_upload, job, info)
+    
+    return {
+        "success": True,
+        "job_id": job["id"],
+        "sha256": job["sha256"],
+        "status": job["status"],
+        "message": "Video subido"
+    }
+
+
+@app.post("/api/video/uploads")
+def start_resumable_upload(filename: str, size_bytes: int = Query(..., gt=0)):
+    """
+    Inicia una subida reanudable por bloques.
+    
+    Si un bloque se corta (desconexión, error de disco) la subida sigue
+    abierta para reanudarla; la que pasa UPLOAD_IDLE_HOURS sin recibir datos
+    se da por abandonada y se borra.
+    """
+    
+    job = create_video_job(filename, size_bytes)
+    
+    return {
+        "success": True,
+        "job_id": job["id"],
+        "chunk_size": UPLOAD_CHUNK_SIZE,
+        "received_bytes": 0
     }
+
+
+@app.get("/api/video/uploads/{job_id}")
+def get_resumable_upload(job_id: str):
+    """Consulta cuántos bytes se han recibido (para reanudar)."""
     
-    return {"success": True, "job_id": job_id, "message": "Video subido"}
+    job = get_job_or_404(job_id)
+    return {
+        "job_id": job_id,
+        "status": job["status"],
+        "size_bytes": job["size_bytes"],
+        "received_bytes": received_bytes(job["filepath"])
+    }
+
+
+@app.put("/api/video/uploads/{job_id}")
+async def upload_chunk(job_id: str, offset: int, request: Request):
+    """Recibe un bloque de una subida reanudable."""
+    
+    job = get_job_or_404(job_id)
+    if job["status"] != "uploading":
+        raise HTTPException(409, f"La subida no está en curso (estado: {job['status']})")
+    
+    try:
+        received = await append_chunk(job_id, job["filepath"], offset, request.stream(),
+                                      max_bytes=job["size_bytes"])
+    except OffsetMismatch as e:
+        raise HTTPException(409, f"Offset incorrecto, reanudar desde {e.expected}")
+    except UploadTooLarge:
+        abort_upload(job_id, job["filepath"])
+        fail_upload(job, 413, "Se recibieron más bytes de los declarados")
+    
+    if received == job["size_bytes"]:
+        info = await run_in_threadpool(finish_upload, job_id, job["filepath"])
+        job = await run_in_threadpool(finalize_upload, job, info)
+    
+    return {
+        "success": True,
+        "job_id": job_id,
+        "status": job["status"],
+        "received_bytes": received,
+        "sha256": job.get("sha256")
+    }
 
 
 @app.post("/api/video/analyze/{job_id}")
-async def analyze_video(job_id: str):
-    """Analiza un video con YOLO."""
+def analyze_video(job_id: str, request: Request):
+    """
+    Encola un video para análisis con YOLO.
     
-    if job_id not in jobs:
-        raise HTTPException(404, "Job no encontrado")
+    Responde 429 si la cola está llena o el cliente ya tiene el máximo de
+    trabajos en curso; si no, devuelve la posición en la cola.
+    """
     
-    job = jobs[job_id]
-    job["status"] = "processing"
+    job = get_job_or_404(job_id)
+    if job["status"] in ("queued", "processing"):
+        return {
+            "success": True,
+            "job_id": job_id,
+            "status": job["status"],
+            "queue_position": video_queue.position(job_id)
+        }
+    
+    cached = get_cached_results(job.get("sha256"))
+    if cached is not None:
+        job_store.update(job_id, status="completed", progress=100, results=cached, cached=True,
+                         artifacts_job=artifacts_job(cached), error=None, live=None)
+        return {"success": True, "job_id": job_id, "status": "completed", "cached": True}
+    
+    if job.get("video_evicted") and not os.path.exists(job["filepath"]):
+        raise HTTPException(410, "El video se borró por la política de retención; vuelve a subirlo")
+    if job["status"] == "uploading" or not os.path.exists(job["filepath"]):
+        raise HTTPException(409, "El video no se ha subido por completo")
     
+    # El estado pasa a 'queued' (y se borran los resultados previos) antes de
+    # encolar: un trabajo rápido puede terminar antes de que submit vuelva.
+    # Si no se admite, se restaura el trabajo tal como estaba.
+    previous_results = job_store.get_results(job_id)
+    job_store.update(job_id, status="queued", progress=0, error=None, live=None,
+                     results=None, cached=None, artifacts_job=None, owner=SERVER_ID)
+    
+    client = request.client.host if request.client else None
     try:
-        from services.video_analyzer import analyze_video_full
-        results = analyze_video_full(job["filepath"], job_id)
-        
-        job["status"] = "completed"
-        job["progress"] = 100
-        job["results"] = results
-        
-        return {"success": True, "job_id": job_id, "results": results}
-        
-    except Exception as e:
-        job["status"] = "error"
-        job["error"] = str(e)
-        raise HTTPException(500, str(e))
+        position = video_queue.submit(job_id, job["filepath"], client=client)
+    except (QueueFull, ClientLimitReached) as e:
+        job_store.update(job_id, status=job["status"], progress=job["progress"],
+                         error=job.get("error"), live=job.get("live"), results=previous_results,
+                         cached=job.get("cached"), artifacts_job=job.get("artifacts_job"))
+        message = ("Cola de análisis llena" if isinstance(e, QueueFull)
+                   else f"Máximo {VIDEO_MAX_JOBS_PER_CLIENT} análisis simultáneos por cliente")
+        raise HTTPException(429, message, headers={"Retry-After": str(VIDEO_RETRY_AFTER_SEC)})
+    
+    return {"success": True, "job_id": job_id, "status": "queued", "queue_position": position}
+
+
+@app.post("/api/video/cancel/{job_id}")
+def cancel_video(job_id: str):
+    """Cancela un análisis en cola o en proceso."""
+    
+    job = get_job_or_404(job_id)
+    if job["status"] not in ("queued", "processing"):
+        raise HTTPException(409, f"El trabajo no está en curso (estado: {job['status']})")
+    
+    if not video_queue.cancel(job_id):
+        # Trabajo huérfano (p. ej. tras un reinicio): se marca directamente
+        job_store.update(job_id, status="cancelled")
+    
+    return {"success": True, "job_id": job_id, "status": "cancelling"}
 
 
 # ============================================================
@@ -155,13 +598,47 @@ def get_available_teams():
 async def compare_teams(team1: str, team2: str, competition: str = "worldcup_2022"):
     """Compara dos equipos."""
     
-    try:
-        from services.team_analyzer import compare_teams_style
-        results = compare_teams_style(team1, team2, competition)
-        return {"success": True, "comparison": results}
-        
-    except Exception as e:
-        raise HTTPException(500, str(e))
+    from services.team_analyzer import compare_teams_style
+    results = await run_service(compare_teams_style, team1, team2, competition)
+    return {"success": True, "comparison": results}
+
+
+class TeamsBatchRequest(BaseModel):
+    teams: List[str]
+    competition: str = "worldcup_2022"
+
+
+class PlayersBatchRequest(BaseModel):
+    players: List[str]
+
+
+def check_batch(names: list):
+    """Valida el tamaño de una comparación en lote."""
+    if len(set(names)) < 2:
+        raise HTTPException(400, "Se necesitan al menos dos elementos distintos")
+    if len(names) > MAX_BATCH_SIZE:
+        raise HTTPException(400, f"Máximo {MAX_BATCH_SIZE} elementos por comparación")
+
+
+@app.post("/api/teams/compare/batch")
+async def compare_teams_batch(request: TeamsBatchRequest):
+    """Compara N equipos cargando los datos de cada uno una sola vez."""
+    
+    check_batch(request.teams)
+    
+    from services.team_analyzer import compare_teams_batch as compare_batch
+    results = await run_service(compare_batch, request.teams, request.competition)
+    return {"success": True, "comparison": results}
+
+
+@app.post("/api/teams/precompute")
+def precompute_teams(background_tasks: BackgroundTasks, competition: str = "worldcup_2022"):
+    """Precalcula en segundo plano la tabla de estilos de una competición."""
+    
+    from services.team_analyzer import precompute_competition_styles
+    background_tasks.add_task(precompute_competition_styles, competition)
+    
+    return {"success": True, "competition": competition, "status": "scheduled"}
 
 
 # ============================================================
@@ -181,13 +658,64 @@ def get_available_players():
 async def compare_players(player1: str, player2: str):
     """Compara dos jugadores."""
     
-    try:
-        from services.player_analyzer import compare_two_players
-        results = compare_two_players(player1, player2)
-        return {"success": True, "comparison": results}
-        
-    except Exception as e:
-        raise HTTPException(500, str(e))
+    from services.player_analyzer import compare_two_players
+    results = await run_service(compare_two_players, player1, player2)
+    return {"success": True, "comparison": results}
+
+
+@app.post("/api/players/compare/batch")
+async def compare_players_batch(request: PlayersBatchRequest):
+    """Compara N jugadores en una sola pasada sobre el índice de jugadores."""
+    
+    check_batch(request.players)
+    
+    from services.player_analyzer import compare_players_batch as compare_batch
+    results = await run_service(compare_batch, request.players)
+    return {"success": True, "comparison": results}
+
+
+# ============================================================
+# MÓDULO OART
+# ============================================================
+
+class FreezeFramePlayer(BaseModel):
+    location: List[float]
+    teammate: bool = False
+    actor: bool = False
+    keeper: bool = False
+
+
+class PassEvent(BaseModel):
+    location: List[float]
+    pass_end_location: List[float]
+    freeze_frame: List[FreezeFramePlayer] = []
+    minute: int = 45
+    period: int = 1
+    under_pressure: bool = False
+    play_pattern: str = "Regular Play"
+
+
+class OartScoreRequest(BaseModel):
+    events: List[PassEvent]
+
+
+@app.post("/api/oart/score")
+async def score_oart(request: OartScoreRequest):
+    """
+    OART de uno o varios pases con su freeze frame.
+    
+    Todas las opciones de la petición se evalúan en una sola llamada al modelo.
+    option_probs sigue el orden de los compañeros en cada freeze frame.
+    """
+    
+    if not request.events:
+        raise HTTPException(400, "Se necesita al menos un pase")
+    if len(request.events) > MAX_OART_EVENTS:
+        raise HTTPException(400, f"Máximo {MAX_OART_EVENTS} pases por petición")
+    
+    events = [event.dict() for event in request.events]
+    results = await run_service(score_events, events)
+    return {"success": True, "count": len(results), "results": results}
 
 
 # ============================================================
@@ -195,17 +723,196 @@ async def compare_players(player1: str, player2: str):
 # ============================================================
 
 @app.get("/api/jobs")
-def list_jobs():
-    """Lista todos los trabajos."""
-    return {"total": len(jobs), "jobs": list(jobs.values())}
+def list_jobs(status: str = None, limit: int = 50, cursor: str = None):
+    """
+    Lista trabajos (sin resultados), paginados por cursor.
+    
+    status acepta varios estados separados por comas.
+    """
+    limit = max(1, min(limit, 200))
+    
+    try:
+        page, next_cursor = job_store.list(status=status, limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(400, "Cursor inválido")
+    
+    return {
+        "total": job_store.count(status),
+        "jobs": page,
+        "next_cursor": next_cursor
+    }
+
+
+@app.get("/healthz")
+def healthz():
+    """Liveness: el proceso responde."""
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+def readyz():
+    """Readiness: 200 solo cuando terminó el calentamiento."""
+    ready = warmup.ready()
+    return JSONResponse(
+        {"ready": ready, "steps": warmup.status()},
+        status_code=200 if ready else 503
+    )
+
+
+@app.get("/api/health/models")
+def models_health():
+    """Estado de los modelos YOLO cargados en los workers."""
+    models = video_queue.model_status()
+    return {
+        "workers": VIDEO_WORKERS,
+        "warm_workers": sum(1 for m in models if m.get("warm")),
+        "models": models
+    }
+
+
+def parse_fields(fields: str):
+    """Lista de claves pedidas en fields= (None = todas)."""
+    if fields is None:
+        return None
+    return [f.strip() for f in fields.split(",") if f.strip()]
+
+
+def job_etag(job: dict, fields: str) -> str:
+    """ETag de los resultados de un trabajo completado."""
+    digest = hashlib.sha1(f"{job['id']}:{job['updated_at']}:{fields}".encode()).hexdigest()
+    # Débil: la misma representación puede viajar comprimida o no
+    return f'W/"{digest[:20]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in [tag.strip() for tag in header.split(",")]
 
 
 @app.get("/api/jobs/{job_id}")
-def get_job(job_id: str):
-    """Obtiene estado de un trabajo."""
-    if job_id not in jobs:
-        raise HTTPException(404, "Job no encontrado")
-    return jobs[job_id]
+def get_job(job_id: str, request: Request, fields: str = None):
+    """
+    Obtiene estado de un trabajo.
+    
+    fields limita las claves de results (p. ej. video_info,detection_summary);
+    con fields vacío se devuelve el trabajo sin resultados. Un trabajo
+    completado lleva ETag y responde 304 si el cliente ya tiene esa versión.
+    """
+    wanted = parse_fields(fields)
+    job = get_job_or_404(job_id)
+    
+    if job["status"] == "queued":
+        job["queue_position"] = video_queue.position(job_id)
+    
+    headers = {}
+    if job["status"] == "completed":
+        headers = {"ETag": job_etag(job, fields), "Cache-Control": "no-cache"}
+        if etag_matches(request, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+    
+    if wanted != []:
+        results = job_store.get_results(job_id)
+        if wanted is not None and results is not None:
+            results = {key: results[key] for key in wanted if key in results}
+        job["results"] = results
+    
+    return JSONResponse(job, headers=headers)
+
+
+@app.post("/api/jobs/{job_id}/pin")
+def pin_job(job_id: str):
+    """Fija un trabajo: su video y sus artefactos no se borran nunca."""
+    get_job_or_404(job_id)
+    job_store.update(job_id, pinned=True)
+    return {"success": True, "job_id": job_id, "pinned": True}
+
+
+@app.delete("/api/jobs/{job_id}/pin")
+def unpin_job(job_id: str):
+    """Quita la fijación de un trabajo."""
+    get_job_or_404(job_id)
+    job_store.update(job_id, pinned=None)
+    return {"success": True, "job_id": job_id, "pinned": False}
+
+
+@app.get("/api/storage")
+def storage_usage():
+    """Uso de disco por área, cuotas y resultado del último barrido."""
+    return {"usage": retention.usage(), "last_sweep": retention.last_sweep}
+
+
+@app.post("/api/storage/sweep")
+async def storage_sweep():
+    """Lanza un barrido de retención inmediato."""
+    return {"success": True, "sweep": await run_service(retention.sweep)}
+
+
+@app.get("/api/jobs/{job_id}/artifacts")
+def get_job_artifacts(job_id: str):
+    """Archivos generados por un análisis (video anotado, CSVs, figuras)."""
+    job = get_job_or_404(job_id)
+    files = list_artifacts(job.get("artifacts_job") or job_id)
+    for f in files:
+        f["url"] = f"/api/jobs/{job_id}/artifacts/{f['name']}"
+    return {"job_id": job_id, "artifacts": files}
+
+
+@app.get("/api/jobs/{job_id}/artifacts/{name}")
+def get_job_artifact(job_id: str, name: str, request: Request):
+    """
+    Descarga un artefacto con soporte de HTTP Range.
+    
+    Permite saltar dentro del video anotado sin descargarlo entero.
+    """
+    job = get_job_or_404(job_id)
+    path = artifact_path(job.get("artifacts_job") or job_id, name)
+    if path is None:
+        raise HTTPException(404, "Artefacto no encontrado")
+    return RangeFileResponse(path, request.headers)
+
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Progreso en vivo de un trabajo (Server-Sent Events)."""
+    get_job_or_404(job_id)
+    
+    async def stream():
+        queue = progress_broker.subscribe(job_id)
+        try:
+            job = job_store.get(job_id, include_results=False)
+            event = job["status"]
+            yield format_sse(event, job_event_data(job))
+            
+            while event not in FINAL_STATUSES:
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_SEC)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event, data)
+        finally:
+            progress_broker.unsubscribe(job_id, queue)
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+JOB_STATUSES = ["uploading", "uploaded", "queued", "processing", "completed", "error", "cancelled"]
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Métricas en formato de texto de Prometheus."""
+    counts = job_store.count_by_status()
+    for status in JOB_STATUSES:
+        metrics.video_jobs.set(counts.get(status, 0), status=status)
+    metrics.video_queue_depth.set(video_queue.pending_count())
+    return PlainTextResponse(metrics.render_metrics(), media_type="text/plain; version=0.0.4")
 
 
 # ============================================================
@@ -0,0 +1,175 @@
+"""
+Archivos generados por los análisis (videos anotados, CSVs, figuras).
+
+Cada trabajo guarda sus archivos en ARTIFACTS_DIR/<job_id>/. RangeFileResponse
+los sirve con soporte de HTTP Range (para poder saltar dentro de un video),
+ETag/Last-Modified y envío sin copia cuando el servidor lo permite.
+"""
+
+import mimetypes
+import os
+from email.utils import formatdate
+
+import anyio
+from starlette.responses import Response
+
+
+ARTIFACTS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "results", "artifacts"
+)
+
+# Guardar el video anotado con cajas e IDs de tracking
+VIDEO_ANNOTATE = os.environ.get("VIDEO_ANNOTATE", "1") == "1"
+
+# Los artefactos no cambian salvo que se repita el análisis (cambia el ETag)
+ARTIFACT_MAX_AGE_SEC = 3600
+
+mimetypes.add_type("text/csv", ".csv")
+
+
+def job_artifacts_dir(job_id: str) -> str:
+    return os.path.join(ARTIFACTS_DIR, job_id)
+
+
+def list_artifacts(job_id: str) -> list:
+    """Archivos de un trabajo con tamaño y tipo."""
+    directory = job_artifacts_dir(job_id)
+    if not os.path.isdir(directory):
+        return []
+
+    return [
+        {
+            "name": entry.name,
+            "size_bytes": entry.stat().st_size,
+            "content_type": content_type(entry.name)
+        }
+        for entry in sorted(os.scandir(directory), key=lambda e: e.name)
+        if entry.is_file()
+    ]
+
+
+def artifact_path(job_id: str, name: str):
+    """Ruta de un artefacto (None si no existe o el nombre no es válido)."""
+    if name != os.path.basename(name) or name.startswith("."):
+        return None
+
+    path = os.path.join(job_artifacts_dir(job_id), name)
+    return path if os.path.isfile(path) else None
+
+
+def content_type(name: str) -> str:
+    return mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+
+def parse_range(header: str, size: int):
+    """
+    Interpreta una cabecera Range de un solo rango.
+
+    Returns:
+        (start, end) inclusivo, None si hay que enviar el archivo completo
+        (sin Range o con varios rangos) o False si el rango no es satisfacible
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+
+    start, _, end = header[len("bytes="):].strip().partition("-")
+    try:
+        if start == "":
+            # Sufijo: los últimos N bytes
+            length = int(end)
+            if length <= 0:
+                return False
+            return max(size - length, 0), size - 1
+        start = int(start)
+        end = int(end) if end else size - 1
+    except ValueError:
+        return None
+
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+
+class RangeFileResponse(Response):
+    """
+    Respuesta de archivo con Range, validación condicional y envío sin copia.
+
+    Args:
+        path: Ruta del archivo
+        request_headers: Cabeceras de la petición
+        max_age: Segundos de Cache-Control
+    """
+
+    chunk_size = 256 * 1024
+
+    def __init__(self, path: str, request_headers, max_age: int = ARTIFACT_MAX_AGE_SEC):
+        stat = os.stat(path)
+        self.path = path
+        self.background = None
+
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        headers = {
+            "accept-ranges": "bytes",
+            "etag": etag,
+            "last-modified": formatdate(stat.st_mtime, usegmt=True),
+            "cache-control": f"private, max-age={max_age}",
+            "content-type": content_type(path)
+        }
+
+        self.start, self.end = 0, stat.st_size - 1
+        if etag in [tag.strip() for tag in request_headers.get("if-none-match", "").split(",")]:
+            self.status_code = 304
+            self.start, self.end = 0, -1
+        else:
+            # If-Range: el rango solo vale si el cliente tiene la misma versión
+            if_range = request_headers.get("if-range")
+            byte_range = None
+            if if_range is None or if_range == etag:
+                byte_range = parse_range(request_headers.get("range"), stat.st_size)
+
+            if byte_range is False:
+                self.status_code = 416
+                headers["content-range"] = f"bytes */{stat.st_size}"
+                self.start, self.end = 0, -1
+            elif byte_range is not None:
+                self.status_code = 206
+                self.start, self.end = byte_range
+                headers["content-range"] = f"bytes {self.start}-{self.end}/{stat.st_size}"
+            else:
+                self.status_code = 200
+
+        if self.status_code != 304:
+            headers["content-length"] = str(self.end - self.start + 1)
+        self.raw_headers = [(k.encode("latin-1"), v.encode("latin-1")) for k, v in headers.items()]
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+
+        count = self.end - self.start + 1
+        if count <= 0 or scope["method"] == "HEAD":
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if "http.response.zerocopysend" in scope.get("extensions", {}):
+            # El servidor hace sendfile() directamente desde el descriptor
+            with open(self.path, "rb") as f:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": f.fileno(),
+                    "offset": self.start,
+                    "count": count
+                })
+            return
+
+        async with await anyio.open_file(self.path, "rb") as f:
+            await f.seek(self.start)
+            while count > 0:
+                chunk = await f.read(min(self.chunk_size, count))
+                if not chunk:
+                    break
+                count -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": count > 0})
+        if count > 0:
+            # El archivo se acortó mientras se enviaba
+            await send({"type": "http.response.body", "body": b""})
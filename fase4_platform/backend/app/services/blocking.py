@@ -0,0 +1,81 @@
+"""
+Ejecución de trabajo bloqueante fuera del event loop.
+
+Las consultas a StatsBomb y el procesamiento con pandas bloquean. Se ejecutan
+en un pool de hilos acotado, con un límite de peticiones simultáneas y un
+tiempo máximo por petición, para que una comparación lenta no frene al resto
+de la API ni sature el servicio externo.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+
+SERVICE_WORKERS = int(os.environ.get("SERVICE_WORKERS", 4))
+SERVICE_MAX_CONCURRENCY = int(os.environ.get("SERVICE_MAX_CONCURRENCY", SERVICE_WORKERS))
+SERVICE_QUEUE_TIMEOUT_SEC = float(os.environ.get("SERVICE_QUEUE_TIMEOUT_SEC", 10))
+SERVICE_TIMEOUT_SEC = float(os.environ.get("SERVICE_TIMEOUT_SEC", 120))
+
+_executor = ThreadPoolExecutor(max_workers=SERVICE_WORKERS, thread_name_prefix="service")
+_semaphore = None
+
+
+class ServiceBusy(Exception):
+    """No hay capacidad para atender la petición."""
+
+
+class ServiceTimeout(Exception):
+    """La petición superó el tiempo máximo."""
+
+
+async def run_blocking(func, *args, timeout: float = SERVICE_TIMEOUT_SEC, **kwargs):
+    """
+    Ejecuta una función bloqueante en el pool de servicios.
+
+    Args:
+        func: Función a ejecutar
+        *args, **kwargs: Argumentos de la función
+        timeout: Segundos máximos de espera por el resultado
+
+    Raises:
+        ServiceBusy: Si no se obtiene un hueco en SERVICE_QUEUE_TIMEOUT_SEC
+        ServiceTimeout: Si la función tarda más de timeout
+    """
+    semaphore = _get_semaphore()
+
+    try:
+        await asyncio.wait_for(semaphore.acquire(), timeout=SERVICE_QUEUE_TIMEOUT_SEC)
+    except asyncio.TimeoutError:
+        raise ServiceBusy()
+
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(_executor, partial(func, *args, **kwargs))
+
+    # El hueco se libera cuando el hilo termina de verdad, aunque el cliente
+    # ya haya recibido el timeout
+    future.add_done_callback(lambda _: semaphore.release())
+
+    try:
+        return await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+    except asyncio.TimeoutError:
+        future.add_done_callback(_consume_exception)
+        raise ServiceTimeout()
+
+
+def shutdown():
+    _executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(SERVICE_MAX_CONCURRENCY)
+    return _semaphore
+
+
+def _consume_exception(future):
+    # Evita el aviso de excepción no recuperada en trabajos abandonados
+    if not future.cancelled():
+        future.exception()
@@ -0,0 +1,57 @@
+"""
+Caché en memoria con expiración (TTL) y desalojo LRU.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Caché LRU con tiempo de vida por entrada.
+
+    Args:
+        maxsize: Número máximo de entradas
+        ttl: Segundos que vive cada entrada (None = sin expiración)
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: float = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Devuelve el valor guardado o default si no existe o expiró."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or self._expired(item):
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key, value):
+        """Guarda un valor, desalojando la entrada menos usada si hace falta."""
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def _expired(self, item) -> bool:
+        return self.ttl is not None and time.monotonic() - item[0] > self.ttl
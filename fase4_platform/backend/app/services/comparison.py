@@ -0,0 +1,41 @@
+"""
+Comparaciones en matriz entre varios equipos o jugadores.
+"""
+
+import numpy as np
+
+
+TEAM_METRICS = ['goals', 'xg', 'goals_over_xg', 'conversion_rate', 'pass_accuracy',
+                'pressures_per_game', 'dribble_success']
+
+PLAYER_METRICS = ['goals', 'assists', 'xg', 'goals_over_xg', 'key_passes',
+                  'pass_accuracy', 'dribble_success_rate']
+
+
+def build_comparison_matrix(stats: dict, metrics: list) -> dict:
+    """
+    Compara todas las entidades entre sí para cada métrica.
+
+    Args:
+        stats: Dict nombre -> métricas (resultado de analyze_*)
+        metrics: Métricas a comparar
+
+    Returns:
+        Dict métrica -> {values, ranking, leader, diff}, donde diff[i][j] es
+        el valor de la entidad i menos el de la entidad j
+    """
+    names = list(stats)
+    comparison = {}
+
+    for metric in metrics:
+        values = np.array([float(stats[name].get(metric, 0) or 0) for name in names])
+        order = np.argsort(-values, kind='stable')
+
+        comparison[metric] = {
+            'values': [round(float(v), 2) for v in values],
+            'ranking': [names[i] for i in order],
+            'leader': names[order[0]] if names else None,
+            'diff': np.round(values[:, None] - values[None, :], 2).tolist()
+        }
+
+    return comparison
@@ -0,0 +1,143 @@
+"""
+Compresión de respuestas HTTP.
+
+Negocia brotli o gzip según Accept-Encoding y solo comprime respuestas que
+superan un tamaño mínimo. brotli es opcional: si el paquete no está instalado
+se usa gzip. Los streams de eventos y los archivos binarios (video, imágenes)
+pasan sin tocar.
+"""
+
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Tipos que no se comprimen: ya comprimidos o que necesitan llegar sin buffer
+SKIP_CONTENT_TYPES = ("text/event-stream", "video/", "image/", "application/zip")
+
+
+def choose_encoding(accept_encoding: str):
+    """Codificación preferida entre las aceptadas por el cliente (o None)."""
+    accepted = set()
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0"):
+            continue
+        accepted.add(name.strip().lower())
+
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    """Compresor incremental con la misma interfaz para gzip y brotli."""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._obj = brotli.Compressor(quality=brotli_quality)
+            self._compress = self._obj.process
+            self._finish = self._obj.finish
+        else:
+            self._obj = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self._compress = self._obj.compress
+            self._finish = self._obj.flush
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compress(data)
+
+    def finish(self) -> bytes:
+        return self._finish()
+
+
+class CompressionMiddleware:
+    """
+    Middleware ASGI que comprime las respuestas con brotli o gzip.
+
+    Args:
+        app: Aplicación ASGI
+        minimum_size: Bytes mínimos de la respuesta para comprimirla
+        gzip_level: Nivel de gzip (1-9)
+        brotli_quality: Calidad de brotli (0-11)
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6,
+                 brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        state = {"start": None, "compressor": None, "passthrough": False}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                state["passthrough"] = (
+                    "content-encoding" in headers
+                    or message["status"] in (204, 206, 304)
+                    or any(content_type.startswith(t) for t in SKIP_CONTENT_TYPES)
+                )
+                if state["passthrough"]:
+                    await send(message)
+                else:
+                    state["start"] = message
+                return
+
+            if message["type"] != "http.response.body" or state["passthrough"]:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if state["start"] is not None:
+                start, state["start"] = state["start"], None
+                if not more_body and len(body) < self.minimum_size:
+                    # Respuesta completa y pequeña: no vale la pena comprimir
+                    state["passthrough"] = True
+                    await send(start)
+                    await send(message)
+                    return
+
+                compressor = state["compressor"] = _Compressor(
+                    encoding, self.gzip_level, self.brotli_quality
+                )
+                data = compressor.compress(body)
+                headers = MutableHeaders(raw=start["headers"])
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    data += compressor.finish()
+                    headers["Content-Length"] = str(len(data))
+                await send(start)
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+
+            compressor = state["compressor"]
+            data = compressor.compress(body)
+            if not more_body:
+                data += compressor.finish()
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,285 @@
+"""
+Cola de trabajos para el análisis de video.
+
+Los análisis con YOLO se ejecutan en un pool de procesos, así el event loop de
+FastAPI queda libre para atender otras peticiones. Los workers reportan su
+progreso por una cola compartida que un hilo del proceso principal consume.
+
+La cola tiene control de admisión: un máximo de trabajos pendientes y de
+trabajos simultáneos por cliente. Los trabajos se pueden cancelar; si ya están
+corriendo, el worker detiene el bucle de frames en el siguiente reporte.
+
+Si un worker muere (falta de memoria, kill), el pool se recrea y los trabajos
+afectados se vuelven a encolar; el análisis se reanuda desde su último punto
+de control.
+"""
+
+import multiprocessing as mp
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from services.progress import JobCancelled
+
+
+# Cola de eventos y trabajos cancelados del worker (se asignan en _init_worker)
+_events = None
+_cancelled = None
+
+
+class QueueFull(Exception):
+    """La cola de video alcanzó su máximo de trabajos pendientes."""
+
+
+class ClientLimitReached(Exception):
+    """El cliente ya tiene el máximo de trabajos en curso."""
+
+
+def _init_worker(events, cancelled):
+    """Inicializa un proceso worker y precarga su modelo YOLO."""
+    global _events, _cancelled
+    _events = events
+    _cancelled = cancelled
+
+    from services import model_registry
+    try:
+        # Importar el analizador aquí (cv2, supervision) y no en el primer trabajo
+        import services.video_analyzer  # noqa: F401
+        model_registry.warmup()
+        _events.put((None, "model", model_registry.status()))
+    except Exception as e:
+        # El trabajo reintentará la carga y reportará el error
+        _events.put((None, "model", [{"pid": os.getpid(), "warm": False, "error": str(e)}]))
+
+
+def _warm_worker() -> int:
+    """Tarea vacía para forzar el arranque de un worker."""
+    return os.getpid()
+
+
+def _run_video_job(job_id: str, video_path: str) -> dict:
+    """Ejecuta un análisis de video dentro de un proceso worker."""
+    from services.artifacts import job_artifacts_dir, VIDEO_ANNOTATE
+    from services.video_analyzer import analyze_video_full
+
+    def report(progress):
+        _events.put((job_id, "progress", progress))
+
+    def should_stop():
+        return job_id in _cancelled
+
+    if should_stop():
+        raise JobCancelled()
+
+    _events.put((job_id, "processing", None))
+    return analyze_video_full(
+        video_path, job_id,
+        progress_callback=report,
+        should_stop=should_stop,
+        output_dir=job_artifacts_dir(job_id),
+        annotate=VIDEO_ANNOTATE
+    )
+
+
+class VideoJobQueue:
+    """
+    Cola de análisis de video servida por un pool de procesos.
+
+    Args:
+        on_event: Función (job_id, kind, payload) llamada desde un hilo del
+            proceso principal. kind es 'processing', 'progress', 'completed',
+            'cancelled' o 'error'.
+        max_workers: Número de procesos worker
+        max_pending: Máximo de trabajos en cola o en proceso
+        max_per_client: Máximo de trabajos en cola o en proceso por cliente
+        max_retries: Reintentos de un trabajo cuyo worker murió
+    """
+
+    def __init__(self, on_event, max_workers: int = 2, max_pending: int = 8,
+                 max_per_client: int = 2, max_retries: int = 2):
+        self.on_event = on_event
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_per_client = max_per_client
+        self.max_retries = max_retries
+        self._ctx = mp.get_context("spawn")
+        self._events = None
+        self._manager = None
+        self._cancelled = None
+        self._executor = None
+        self._listener = None
+        self._worker_models = {}
+
+        # job_id -> {"client", "video_path", "future", "running", "retries"} en orden de llegada
+        self._pending = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Arranca el pool de workers y el hilo que escucha sus eventos."""
+        self._events = self._ctx.Queue()
+        self._manager = self._ctx.Manager()
+        self._cancelled = self._manager.dict()
+        self._executor = self._new_executor()
+        self._listener = threading.Thread(target=self._listen, daemon=True)
+        self._listener.start()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # Los modelos de los workers del pool anterior ya no cuentan (un error
+        # de un worker muerto no debe marcar el pool nuevo como fallido)
+        self._worker_models = {}
+        executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=self._ctx,
+            initializer=_init_worker,
+            initargs=(self._events, self._cancelled)
+        )
+        # Arrancar todos los workers para que carguen el modelo de inmediato
+        for _ in range(self.max_workers):
+            executor.submit(_warm_worker)
+        return executor
+
+    def model_status(self) -> list:
+        """Estado de los modelos cargados en cada worker."""
+        return [entry for entries in self._worker_models.values() for entry in entries]
+
+    def shutdown(self):
+        """Detiene el pool y el hilo de eventos."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._events is not None:
+            self._events.put(None)
+        if self._manager is not None:
+            self._manager.shutdown()
+
+    def submit(self, job_id: str, video_path: str, client: str = None) -> int:
+        """
+        Encola un video para análisis.
+
+        Returns:
+            Posición en la cola (0 = se procesa de inmediato)
+
+        Raises:
+            QueueFull: Si hay max_pending trabajos pendientes
+            ClientLimitReached: Si el cliente tiene max_per_client trabajos
+        """
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                raise QueueFull()
+            if client is not None:
+                active = sum(1 for entry in self._pending.values() if entry["client"] == client)
+                if active >= self.max_per_client:
+                    raise ClientLimitReached()
+
+            entry = {"client": client, "video_path": video_path, "future": None,
+                     "running": False, "retries": 0}
+            self._pending[job_id] = entry
+            future = entry["future"] = self._executor.submit(_run_video_job, job_id, video_path)
+
+        future.add_done_callback(lambda f: self._finish(job_id, f))
+        return self.position(job_id)
+
+    def position(self, job_id: str) -> int:
+        """
+        Posición de un trabajo en la cola.
+
+        0 si ya se está procesando o hay un worker libre para él; None si no
+        está pendiente.
+        """
+        with self._lock:
+            if job_id not in self._pending:
+                return None
+            waiting = [jid for jid, entry in self._pending.items() if not entry["running"]]
+            running = len(self._pending) - len(waiting)
+
+        if job_id not in waiting:
+            return 0
+        return max(0, running + waiting.index(job_id) + 1 - self.max_workers)
+
+    def pending_count(self) -> int:
+        """Trabajos en cola o en proceso."""
+        return len(self._pending)
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancela un trabajo pendiente o en proceso.
+
+        Returns:
+            True si el trabajo estaba pendiente
+        """
+        with self._lock:
+            entry = self._pending.get(job_id)
+        if entry is None:
+            return False
+
+        if not entry["future"].cancel():
+            # Ya está en un worker: se detiene en el próximo reporte de progreso
+            self._cancelled[job_id] = True
+        return True
+
+    def _finish(self, job_id: str, future):
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            if self._retry(job_id, future):
+                return
+
+        with self._lock:
+            self._pending.pop(job_id, None)
+        self._cancelled.pop(job_id, None)
+
+        if future.cancelled():
+            self.on_event(job_id, "cancelled", None)
+        elif isinstance(future.exception(), JobCancelled):
+            self.on_event(job_id, "cancelled", None)
+        elif future.exception() is not None:
+            self.on_event(job_id, "error", str(future.exception()))
+        else:
+            self.on_event(job_id, "completed", future.result())
+
+    def _retry(self, job_id: str, future) -> bool:
+        """
+        Vuelve a encolar un trabajo cuyo worker murió.
+
+        Returns:
+            False si el trabajo agotó sus reintentos (o ya no está pendiente)
+        """
+        with self._lock:
+            entry = self._pending.get(job_id)
+            if entry is None or entry["future"] is not future or entry["retries"] >= self.max_retries:
+                return False
+            if job_id in self._cancelled:
+                return False
+
+            # Todos los trabajos del pool roto pasan por aquí: se recrea una sola vez
+            try:
+                new_future = self._executor.submit(_run_video_job, job_id, entry["video_path"])
+            except BrokenProcessPool:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = self._new_executor()
+                new_future = self._executor.submit(_run_video_job, job_id, entry["video_path"])
+
+            entry["retries"] += 1
+            entry["running"] = False
+            entry["future"] = new_future
+            attempt = entry["retries"]
+
+        new_future.add_done_callback(lambda f: self._finish(job_id, f))
+        self.on_event(job_id, "retrying", {"attempt": attempt, "max_retries": self.max_retries})
+        return True
+
+    def _listen(self):
+        while True:
+            event = self._events.get()
+            if event is None:
+                break
+
+            job_id, kind, payload = event
+            if kind == "model":
+                self._worker_models[payload[0]["pid"]] = payload
+                continue
+
+            if kind == "processing":
+                with self._lock:
+                    if job_id in self._pending:
+                        self._pending[job_id]["running"] = True
+            self.on_event(job_id, kind, payload)
@@ -0,0 +1,280 @@
+"""
+Almacén persistente de trabajos (SQLite).
+
+Los metadatos de cada trabajo viven en la tabla jobs, indexada por estado y
+fecha de creación; los resultados (que pueden ser grandes) se guardan aparte en
+job_results, así listar trabajos no tiene que leerlos. Al ser un archivo, el
+estado sobrevive a reinicios y se comparte entre workers de uvicorn.
+
+Cada proceso del servidor deja un latido en la tabla servers; un trabajo en
+curso cuyo dueño (meta 'owner') dejó de latir se puede reclamar con claim().
+"""
+
+import base64
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+
+# Campos con columna propia; el resto va en meta (JSON)
+_COLUMNS = ("id", "type", "status", "progress", "created_at", "updated_at")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    meta TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs (created_at, id);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs (status, created_at, id);
+CREATE TABLE IF NOT EXISTS job_results (
+    job_id TEXT PRIMARY KEY REFERENCES jobs (id) ON DELETE CASCADE,
+    results TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS servers (
+    id TEXT PRIMARY KEY,
+    heartbeat_at REAL NOT NULL
+);
+"""
+
+
+class JobStore:
+    """
+    Trabajos guardados en una base SQLite.
+
+    Args:
+        path: Ruta del archivo de base de datos
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        # Una conexión por hilo
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def create(self, job: dict) -> dict:
+        """Inserta un trabajo nuevo."""
+        job = dict(job)
+        job.setdefault("progress", 0)
+        job.setdefault("created_at", datetime.now().isoformat())
+        job["updated_at"] = job["created_at"]
+        results = job.pop("results", None)
+
+        meta = {k: v for k, v in job.items() if k not in _COLUMNS}
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, type, status, progress, created_at, updated_at, meta) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job["id"], job["type"], job["status"], job["progress"],
+                 job["created_at"], job["updated_at"], json.dumps(meta))
+            )
+            if results is not None:
+                self._save_results(conn, job["id"], results)
+
+        return self.get(job["id"])
+
+    def get(self, job_id: str, include_results: bool = True) -> dict:
+        """Devuelve un trabajo (o None si no existe)."""
+        row = self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+
+        job = self._row_to_job(row)
+        if include_results:
+            job["results"] = self.get_results(job_id)
+        return job
+
+    def get_results(self, job_id: str):
+        """Resultados de un trabajo (None si aún no hay)."""
+        row = self._conn().execute(
+            "SELECT results FROM job_results WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        return json.loads(row["results"]) if row else None
+
+    def update(self, job_id: str, unless_status: tuple = (), **fields) -> dict:
+        """
+        Actualiza campos de un trabajo.
+
+        Los campos con valor None se eliminan de meta. 'results' se guarda en
+        la tabla de resultados. La lectura y la escritura de meta van en una
+        misma transacción BEGIN IMMEDIATE, así dos escritores concurrentes
+        (hilos o workers de uvicorn) no pisan los campos del otro.
+
+        Args:
+            unless_status: No actualizar si el trabajo está en uno de estos
+                estados (se comprueba dentro de la misma transacción)
+
+        Returns:
+            El trabajo actualizado, o None si no existe o no se actualizó
+        """
+        results = fields.pop("results", ...)
+        with self._conn() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT status, meta FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None or row["status"] in unless_status:
+                return None
+
+            meta = json.loads(row["meta"])
+            columns = {"updated_at": datetime.now().isoformat()}
+            for key, value in fields.items():
+                if key in _COLUMNS:
+                    columns[key] = value
+                elif value is None:
+                    meta.pop(key, None)
+                else:
+                    meta[key] = value
+            columns["meta"] = json.dumps(meta)
+
+            assignments = ", ".join(f"{key} = ?" for key in columns)
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*columns.values(), job_id))
+
+            if results is None:
+                conn.execute("DELETE FROM job_results WHERE job_id = ?", (job_id,))
+            elif results is not ...:
+                self._save_results(conn, job_id, results)
+
+        return self.get(job_id, include_results=False)
+
+    def claim(self, job_id: str, owner: str, statuses: tuple, live_owners: set) -> dict:
+        """
+        Se adueña de un trabajo si su dueño actual ya no está vivo.
+
+        La comprobación y la escritura van en la misma transacción, así solo
+        un proceso reclama cada trabajo.
+
+        Args:
+            job_id: ID del trabajo
+            owner: Nuevo dueño
+            statuses: Estados en los que se puede reclamar
+            live_owners: Dueños vivos (no se les quita el trabajo)
+
+        Returns:
+            El trabajo reclamado, o None si no se pudo reclamar
+        """
+        with self._conn() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT status, meta FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None or row["status"] not in statuses:
+                return None
+            meta = json.loads(row["meta"])
+            if meta.get("owner") in live_owners:
+                return None
+            meta["owner"] = owner
+            conn.execute(
+                "UPDATE jobs SET meta = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(meta), datetime.now().isoformat(), job_id)
+            )
+        return self.get(job_id, include_results=False)
+
+    def heartbeat(self, server_id: str):
+        """Registra que un proceso del servidor sigue vivo."""
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO servers (id, heartbeat_at) VALUES (?, ?)",
+                (server_id, time.time())
+            )
+
+    def live_servers(self, max_age_sec: float) -> set:
+        """Procesos con un latido más reciente que max_age_sec (borra los demás)."""
+        limit = time.time() - max_age_sec
+        with self._conn() as conn:
+            conn.execute("DELETE FROM servers WHERE heartbeat_at < ?", (limit,))
+            return {row["id"] for row in conn.execute("SELECT id FROM servers")}
+
+    def remove_server(self, server_id: str):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM servers WHERE id = ?", (server_id,))
+
+    def delete(self, job_id: str):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def list(self, status: str = None, limit: int = 50, cursor: str = None) -> tuple:
+        """
+        Lista trabajos del más reciente al más antiguo, sin resultados.
+
+        Args:
+            status: Filtrar por estado (puede ser una lista separada por comas)
+            limit: Máximo de trabajos por página
+            cursor: Cursor devuelto por la página anterior
+
+        Returns:
+            (lista de trabajos, cursor de la página siguiente o None)
+        """
+        where, params = [], []
+
+        if status:
+            statuses = status.split(",")
+            where.append(f"status IN ({', '.join('?' for _ in statuses)})")
+            params.extend(statuses)
+
+        if cursor:
+            created_at, job_id = _decode_cursor(cursor)
+            where.append("(created_at, id) < (?, ?)")
+            params.extend([created_at, job_id])
+
+        sql = "SELECT * FROM jobs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        rows = self._conn().execute(sql, params).fetchall()
+        jobs = [self._row_to_job(row) for row in rows[:limit]]
+
+        next_cursor = None
+        if len(rows) > limit:
+            last = jobs[-1]
+            next_cursor = _encode_cursor(last["created_at"], last["id"])
+
+        return jobs, next_cursor
+
+    def count(self, status: str = None) -> int:
+        if status:
+            statuses = status.split(",")
+            sql = f"SELECT COUNT(*) FROM jobs WHERE status IN ({', '.join('?' for _ in statuses)})"
+            return self._conn().execute(sql, statuses).fetchone()[0]
+        return self._conn().execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    def count_by_status(self) -> dict:
+        rows = self._conn().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status")
+        return {row["status"]: row["n"] for row in rows}
+
+    @staticmethod
+    def _save_results(conn, job_id: str, results):
+        conn.execute(
+            "INSERT OR REPLACE INTO job_results (job_id, results) VALUES (?, ?)",
+            (job_id, json.dumps(results))
+        )
+
+    @staticmethod
+    def _row_to_job(row) -> dict:
+        job = {key: row[key] for key in _COLUMNS}
+        job.update(json.loads(row["meta"]))
+        return job
+
+
+def _encode_cursor(created_at: str, job_id: str) -> str:
+    return base64.urlsafe_b64encode(f"{created_at}|{job_id}".encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple:
+    created_at, job_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+    return created_at, job_id
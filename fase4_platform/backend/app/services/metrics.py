@@ -0,0 +1,198 @@
+"""
+Métricas de la API en formato de texto de Prometheus.
+
+Contadores, gauges e histogramas mínimos (sin dependencias externas) y un
+middleware ASGI que mide la latencia de cada ruta.
+"""
+
+import bisect
+import threading
+import time
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, help_text: str, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _format_labels(self, key: tuple, extra: str = "") -> str:
+        parts = [f'{name}="{value}"' for name, value in zip(self.labelnames, key)]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{self._format_labels(key)} {value}")
+        return lines
+
+
+class Counter(_Metric):
+    """Contador que solo crece."""
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """Valor que sube y baja."""
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def remove(self, **labels):
+        with self._lock:
+            self._values.pop(self._key(labels), None)
+
+
+class Histogram(_Metric):
+    """Distribución de observaciones en buckets acumulativos."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = [(key, (list(e[0]), e[1], e[2])) for key, e in self._values.items()]
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                labels = self._format_labels(key, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {total}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {count}")
+        return lines
+
+
+REGISTRY = []
+
+
+def render_metrics() -> str:
+    """Todas las métricas registradas en formato de texto de Prometheus."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ============================================================
+# MÉTRICAS DE LA PLATAFORMA
+# ============================================================
+
+http_requests = Counter(
+    "http_requests_total", "Peticiones HTTP atendidas", ("method", "route", "status")
+)
+http_latency = Histogram(
+    "http_request_duration_seconds", "Latencia de las peticiones HTTP", ("method", "route")
+)
+video_jobs = Gauge("video_jobs", "Trabajos de video por estado", ("status",))
+video_queue_depth = Gauge("video_queue_depth", "Trabajos de video en cola o en proceso")
+video_job_fps = Gauge("video_job_fps", "Frames por segundo de los trabajos en curso", ("job_id",))
+video_frames = Counter("video_frames_processed_total", "Frames de video procesados")
+video_throughput = Histogram(
+    "video_job_fps_final", "Frames por segundo medios de los trabajos terminados",
+    buckets=(1, 2, 5, 10, 15, 20, 30, 45, 60, 90, 120)
+)
+statsbomb_requests = Counter(
+    "statsbomb_requests_total", "Datos de StatsBomb pedidos, descargados o servidos desde caché",
+    ("resource", "source")
+)
+team_style_requests = Counter(
+    "team_style_requests_total", "Estilos de equipo servidos por origen", ("source",)
+)
+storage_bytes = Gauge("storage_bytes", "Bytes en disco por área", ("area",))
+storage_files = Gauge("storage_entries", "Archivos (o carpetas de artefactos) por área", ("area",))
+retention_evictions = Counter(
+    "retention_evictions_total", "Entradas borradas por la política de retención", ("area", "reason")
+)
+
+
+# ============================================================
+# MIDDLEWARE
+# ============================================================
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mide latencia y respuestas de cada ruta.
+
+    La ruta se etiqueta con su plantilla (/api/jobs/{job_id}), no con la URL
+    concreta, para que el número de series sea acotado.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._route_paths = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = self._route(scope)
+            method = scope["method"]
+            http_latency.observe(time.perf_counter() - start, method=method, route=route)
+            http_requests.inc(method=method, route=route, status=status[0])
+
+    def _route(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "other"
+
+        path = self._route_paths.get(endpoint)
+        if path is None:
+            app = scope.get("app")
+            for route in getattr(app, "routes", ()):
+                if getattr(route, "endpoint", None) is endpoint:
+                    path = route.path
+                    break
+            else:
+                path = getattr(endpoint, "__name__", "other")
+            self._route_paths[endpoint] = path
+        return path
@@ -0,0 +1,111 @@
+"""
+Registro de modelos YOLO a nivel de proceso.
+
+Cada combinación (pesos, dispositivo, backend) se carga una sola vez por
+proceso y se calienta con una inferencia sobre una imagen vacía. El backend
+(torch, onnx, onnx-int8) se elige con YOLO_BACKEND; ver detectors.py en
+fase2_computer_vision. Los workers de video cargan el modelo al arrancar, así
+cada trabajo reutiliza la instancia de su worker.
+"""
+
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+# Backends del detector compartidos con fase2_computer_vision
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "..", "..", "..", "..", "fase2_computer_vision", "src"
+)))
+
+# Configuración por defecto
+YOLO_WEIGHTS = os.environ.get("YOLO_WEIGHTS", "yolov8n.pt")
+YOLO_DEVICE = os.environ.get("YOLO_DEVICE", "cpu")
+YOLO_BACKEND = os.environ.get("YOLO_BACKEND", "torch")
+WARMUP_SIZE = 640
+
+# Clases de COCO del análisis
+PERSON_CLASS_ID = 0
+BALL_CLASS_ID = 32
+
+# Parámetros de detección
+DETECTION_CONF = 0.3
+DETECTION_CLASSES = [PERSON_CLASS_ID, BALL_CLASS_ID]
+
+# YOLO en uno de cada K frames; el resto se interpola con flujo óptico
+KEYFRAME_STRIDE = int(os.environ.get("KEYFRAME_STRIDE", 1))
+
+# (pesos, dispositivo, backend) -> entrada del registro
+_models = {}
+_lock = threading.Lock()
+
+
+def get_model(weights: str = YOLO_WEIGHTS, device: str = YOLO_DEVICE, backend: str = YOLO_BACKEND):
+    """
+    Devuelve el modelo YOLO del proceso, cargándolo si es necesario.
+
+    Args:
+        weights: Ruta o nombre de los pesos
+        device: Dispositivo de inferencia ('cpu', 'cuda:0', ...)
+        backend: Backend de inferencia ('torch', 'onnx', 'onnx-int8')
+
+    Returns:
+        Instancia de YOLO caliente
+    """
+    key = (weights, device, backend)
+
+    with _lock:
+        entry = _models.get(key)
+        if entry is None:
+            entry = _load(weights, device, backend)
+            _models[key] = entry
+        entry["uses"] += 1
+
+    return entry["model"]
+
+
+def warmup(weights: str = YOLO_WEIGHTS, device: str = YOLO_DEVICE, backend: str = YOLO_BACKEND):
+    """Carga y calienta un modelo sin usarlo para un trabajo."""
+    key = (weights, device, backend)
+
+    with _lock:
+        if key not in _models:
+            _models[key] = _load(weights, device, backend)
+
+
+def status() -> list:
+    """Estado de los modelos cargados en este proceso."""
+    with _lock:
+        return [
+            {k: v for k, v in entry.items() if k != "model"}
+            for entry in _models.values()
+        ]
+
+
+def _load(weights: str, device: str, backend: str) -> dict:
+    from detectors import load_detector
+
+    # La primera vez incluye exportar/cuantizar el modelo para ese backend
+    start = time.perf_counter()
+    model = load_detector(weights, backend, device)
+    load_time = time.perf_counter() - start
+
+    # Primera inferencia (inicializa el predictor y los kernels)
+    start = time.perf_counter()
+    blank = np.zeros((WARMUP_SIZE, WARMUP_SIZE, 3), dtype=np.uint8)
+    model(blank, verbose=False)
+    warmup_time = time.perf_counter() - start
+
+    return {
+        "model": model,
+        "weights": weights,
+        "device": device,
+        "backend": backend,
+        "pid": os.getpid(),
+        "load_time_sec": round(load_time, 3),
+        "warmup_time_sec": round(warmup_time, 3),
+        "warm": True,
+        "uses": 0
+    }
@@ -0,0 +1,70 @@
+"""
+Cálculo de OART para la API.
+
+Usa el OARTCalculator de fase1_statsbomb con el modelo de éxito de pase
+cargado una sola vez por proceso. Cada petición se resuelve con una única
+llamada al modelo, sin importar cuántos eventos traiga.
+"""
+
+import math
+import os
+import sys
+import threading
+
+# Raíz del proyecto (fase4_platform/backend/app/services -> raíz)
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", ".."))
+OART_SRC_DIR = os.path.join(PROJECT_DIR, "fase1_statsbomb", "notebooks", "src")
+PROCESSED_DIR = os.path.join(PROJECT_DIR, "fase1_statsbomb", "data", "processed")
+
+OART_MODEL_PATH = os.environ.get(
+    "OART_MODEL_PATH", os.path.join(PROCESSED_DIR, "pass_success_model.joblib")
+)
+OART_FEATURES_PATH = os.path.join(PROCESSED_DIR, "feature_list.txt")
+
+sys.path.append(OART_SRC_DIR)
+
+_calculator = None
+_lock = threading.Lock()
+
+
+def get_calculator():
+    """Devuelve el OARTCalculator del proceso, cargando el modelo la primera vez."""
+    global _calculator
+
+    with _lock:
+        if _calculator is None:
+            from oart import OARTCalculator
+
+            feature_list = None
+            if os.path.exists(OART_FEATURES_PATH):
+                with open(OART_FEATURES_PATH) as f:
+                    feature_list = [line.strip() for line in f if line.strip()]
+
+            _calculator = OARTCalculator(model_path=OART_MODEL_PATH, feature_list=feature_list)
+    return _calculator
+
+
+def score_events(events: list) -> list:
+    """
+    OART y probabilidad de cada opción para una lista de pases.
+
+    Args:
+        events: Eventos de pase con location, pass_end_location y freeze_frame
+
+    Returns:
+        Lista de resultados (NaN -> None para poder serializar a JSON)
+    """
+    results = get_calculator().calculate_events_oart(events, include_options=True)
+    return [
+        {key: _clean(value) for key, value in result.items()}
+        for result in results
+    ]
+
+
+def _clean(value):
+    if isinstance(value, int):
+        return value
+    if isinstance(value, list):
+        return [_clean(v) for v in value]
+    value = float(value)
+    return None if math.isnan(value) else round(value, 4)
@@ -2,27 +2,16 @@
 Servicio de análisis de jugadores.
 """
 
-from statsbombpy import sb
 import pandas as pd
-import numpy as np
+
+from services.player_index import get_player_index
+from services.comparison import build_comparison_matrix, PLAYER_METRICS
 
 
 def get_player_events(player_name: str) -> pd.DataFrame:
-    """Obtiene eventos de un jugador del Mundial 2022."""
-    
-    matches = sb.matches(competition_id=43, season_id=106)
-    
-    all_events = []
-    for _, match in matches.iterrows():
-        events = sb.events(match_id=match['match_id'])
-        player_events = events[events['player'].str.contains(player_name, na=False)]
-        if len(player_events) > 0:
-            all_events.append(player_events)
+    """Obtiene eventos de un jugador del Mundial 2022 (vía el índice de jugadores)."""
     
-    if not all_events:
-        return pd.DataFrame()
-    
-    return pd.concat(all_events, ignore_index=True)
+    return get_player_index("worldcup_2022").player_events(player_name)
 
 
 def analyze_single_player(player_name: str) -> dict:
@@ -50,7 +39,7 @@ def analyze_single_player(player_name: str) -> dict:
     
     return {
         'player': player_name,
-        'matches': events['match_id'].nunique(),
+        'matches': int(events['match_id'].nunique()),
         'total_actions': int(len(events)),
         'goals': int(len(goals)),
         'assists': int(len(assists)),
@@ -85,4 +74,19 @@ def compare_two_players(player1: str, player2: str) -> dict:
             'more_creative': player1 if stats1['key_passes'] > stats2['key_passes'] else player2,
             'better_dribbler': player1 if stats1['dribble_success_rate'] > stats2['dribble_success_rate'] else player2
         }
+    }
+
+
+def compare_players_batch(players: list) -> dict:
+    """Compara N jugadores: métricas de cada uno y matriz por métrica."""
+    
+    stats = {player: analyze_single_player(player) for player in players}
+    missing = [player for player, s in stats.items() if 'error' in s]
+    found = {player: s for player, s in stats.items() if 'error' not in s}
+    
+    return {
+        'players': list(found),
+        'not_found': missing,
+        'stats': found,
+        'comparison': build_comparison_matrix(found, PLAYER_METRICS)
     }
\ No newline at end of file
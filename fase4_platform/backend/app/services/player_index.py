@@ -0,0 +1,202 @@
+"""
+Índice invertido de jugadores.
+
+Guarda los eventos de una competición ordenados por jugador y un índice que
+mapea cada nombre normalizado (sin tildes, en minúsculas) a su rango de filas
+y a los partidos que jugó. Buscar a un jugador es entonces un corte del
+DataFrame, sin recorrer los partidos del torneo.
+"""
+
+import glob
+import hashlib
+import os
+import pickle
+import threading
+import time
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from services.statsbomb_data import competition_ids, get_matches, load_competition_events
+
+
+# Columnas que necesita el análisis de jugadores
+PLAYER_EVENT_COLUMNS = [
+    'match_id', 'index', 'player', 'team', 'type',
+    'shot_outcome', 'shot_statsbomb_xg',
+    'pass_outcome', 'pass_goal_assist', 'pass_shot_assist',
+    'dribble_outcome'
+]
+
+# Índices construidos, persistidos en disco
+PLAYER_INDEX_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "results", "player_index"
+)
+
+# Sube al cambiar PlayerIndex o PLAYER_EVENT_COLUMNS: invalida los pickles anteriores
+PLAYER_INDEX_SCHEMA = 2
+
+# Cada cuánto se vuelve a comprobar la versión de un índice cargado
+PLAYER_INDEX_CHECK_SEC = float(os.environ.get("PLAYER_INDEX_CHECK_SEC", 3600))
+
+# competición -> índice en memoria
+_indexes = {}
+# competición -> lock de su construcción (el global solo protege estos dicts)
+_build_locks = {}
+_lock = threading.Lock()
+
+
+def normalize_name(name: str) -> str:
+    """Normaliza un nombre: sin tildes, minúsculas y espacios simples."""
+    decomposed = unicodedata.normalize('NFKD', str(name))
+    ascii_name = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(ascii_name.lower().split())
+
+
+class PlayerIndex:
+    """
+    Almacén de eventos ordenado por jugador con índice de nombres.
+
+    Args:
+        events: Eventos de la competición (con columnas PLAYER_EVENT_COLUMNS)
+    """
+
+    def __init__(self, events: pd.DataFrame):
+        events = events[events['player'].notna()].copy()
+        events['player_key'] = events['player'].map(normalize_name)
+        self.events = events.sort_values(['player_key', 'match_id', 'index']).reset_index(drop=True)
+
+        # Rango de filas [inicio, fin) de cada jugador
+        keys = self.events['player_key'].to_numpy()
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else []
+        stops = np.r_[starts[1:], len(keys)] if len(keys) else []
+        self.ranges = {keys[a]: (int(a), int(b)) for a, b in zip(starts, stops)}
+
+        self.match_ids = {
+            key: sorted(int(m) for m in self.events['match_id'].iloc[a:b].unique())
+            for key, (a, b) in self.ranges.items()
+        }
+
+        # Palabra del nombre -> jugadores que la contienen
+        self.tokens = {}
+        for key in self.ranges:
+            for token in key.split():
+                self.tokens.setdefault(token, set()).add(key)
+
+    def lookup(self, query: str) -> list:
+        """
+        Jugadores que coinciden con una búsqueda.
+
+        Acepta el nombre completo o parte de él ("Messi", "Di María"); si
+        ninguna palabra coincide completa, busca como subcadena.
+        """
+        q = normalize_name(query)
+        if q in self.ranges:
+            return [q]
+
+        candidates = None
+        for token in q.split():
+            found = self.tokens.get(token, set())
+            candidates = found if candidates is None else candidates & found
+
+        if not candidates:
+            candidates = {key for key in self.ranges if q and q in key}
+
+        return sorted(candidates)
+
+    def player_events(self, query: str) -> pd.DataFrame:
+        """Eventos de los jugadores que coinciden con la búsqueda."""
+        keys = self.lookup(query)
+        if not keys:
+            return self.events.iloc[0:0]
+
+        slices = [self.events.iloc[slice(*self.ranges[key])] for key in keys]
+        return pd.concat(slices, ignore_index=True) if len(slices) > 1 else slices[0]
+
+    def players(self) -> list:
+        """Nombres originales de todos los jugadores indexados."""
+        return [self.events['player'].iat[a] for a, _ in self.ranges.values()]
+
+
+def get_player_index(competition: str = "worldcup_2022") -> PlayerIndex:
+    """
+    Devuelve el índice de una competición, construyéndolo si hace falta.
+
+    Cada PLAYER_INDEX_CHECK_SEC se comprueba su versión y, si cambió, se
+    reconstruye. Cada competición se construye bajo su propio lock: una
+    descarga larga no bloquea las búsquedas en otras competiciones.
+    """
+
+    with _lock:
+        entry = _indexes.get(competition)
+        if entry is not None and time.monotonic() - entry["checked_at"] < PLAYER_INDEX_CHECK_SEC:
+            return entry["index"]
+        build_lock = _build_locks.setdefault(competition, threading.Lock())
+
+    with build_lock:
+        with _lock:
+            entry = _indexes.get(competition)
+        if entry is not None and time.monotonic() - entry["checked_at"] < PLAYER_INDEX_CHECK_SEC:
+            return entry["index"]
+
+        try:
+            version = index_version(competition)
+        except Exception:
+            # Sin acceso a StatsBomb se sigue usando el índice que ya hay
+            if entry is None:
+                raise
+            version = entry["version"]
+
+        if entry is None or entry["version"] != version:
+            entry = {"index": _load_or_build(competition, version), "version": version}
+        entry["checked_at"] = time.monotonic()
+
+        with _lock:
+            _indexes[competition] = entry
+    return entry["index"]
+
+
+def index_version(competition: str) -> str:
+    """
+    Clave de versión del índice de una competición.
+
+    Combina la versión del esquema, las columnas, (competition_id, season_id)
+    y el conjunto de partidos: si StatsBomb publica partidos nuevos o cambia
+    el formato, el pickle guardado deja de valer.
+    """
+    comp_id, season_id = competition_ids(competition)
+    match_ids = sorted(int(m) for m in get_matches(competition)['match_id'])
+    digest = hashlib.sha256(repr((PLAYER_EVENT_COLUMNS, match_ids)).encode()).hexdigest()[:12]
+    return f"v{PLAYER_INDEX_SCHEMA}_{comp_id}_{season_id}_{digest}"
+
+
+def _load_or_build(competition: str, version: str) -> PlayerIndex:
+    path = os.path.join(PLAYER_INDEX_DIR, f"{competition}__{version}.pkl")
+
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    events = load_competition_events(competition, columns=PLAYER_EVENT_COLUMNS)
+    index = PlayerIndex(events)
+
+    # Escritura atómica (otros procesos pueden estar leyendo o construyendo el mismo)
+    os.makedirs(PLAYER_INDEX_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(index, f)
+    os.replace(tmp_path, path)
+
+    # Versiones anteriores de esta competición (y el formato sin versión)
+    stale = glob.glob(os.path.join(PLAYER_INDEX_DIR, f"{glob.escape(competition)}__*.pkl"))
+    stale.append(os.path.join(PLAYER_INDEX_DIR, f"{competition}.pkl"))
+    for old_path in stale:
+        if old_path != path:
+            try:
+                os.remove(old_path)
+            except FileNotFoundError:
+                pass
+
+    return index
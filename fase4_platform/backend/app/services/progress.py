@@ -0,0 +1,121 @@
+"""
+Progreso en vivo de los trabajos de video.
+
+ProgressReporter corre dentro del worker y resume el avance del análisis
+(frames, fps, ETA, detecciones parciales). ProgressBroker corre en el proceso
+de la API y reparte esos eventos a los clientes suscritos por Server-Sent Events.
+"""
+
+import asyncio
+import json
+import time
+
+
+class JobCancelled(Exception):
+    """El trabajo fue cancelado mientras se procesaba."""
+
+
+class ProgressReporter:
+    """
+    Calcula el progreso de un análisis y lo reporta cada cierto número de frames.
+
+    Args:
+        callback: Función que recibe el dict de progreso (o None)
+        total_frames: Frames totales del video
+        every: Cada cuántos frames reportar
+        should_stop: Función que indica si el trabajo se canceló (o None)
+        start_frame: Frame desde el que se reanuda el análisis (para los fps)
+    """
+
+    def __init__(self, callback, total_frames: int, every: int = 30, should_stop=None,
+                 start_frame: int = 0):
+        self.callback = callback
+        self.start_frame = start_frame
+        self.should_stop = should_stop
+        self.total_frames = total_frames
+        self.every = every
+        self.start = time.perf_counter()
+        self.detections = 0
+        self.player_detections = 0
+        self.ball_detections = 0
+
+    def update(self, frames_processed: int, players: int = 0, balls: int = 0, force: bool = False):
+        """
+        Acumula las detecciones de un frame (o de un tramo) y reporta si toca.
+
+        force reporta aunque frames_processed no sea múltiplo de every.
+
+        Raises:
+            JobCancelled: Si should_stop indica que el trabajo se canceló
+        """
+        self.player_detections += players
+        self.ball_detections += balls
+        self.detections += players + balls
+
+        if force or frames_processed % self.every == 0:
+            if self.should_stop and self.should_stop():
+                raise JobCancelled()
+            if self.callback:
+                self.callback(self.snapshot(frames_processed))
+
+    def snapshot(self, frames_processed: int) -> dict:
+        """Estado actual del análisis."""
+        elapsed = time.perf_counter() - self.start
+        fps = (frames_processed - self.start_frame) / elapsed if elapsed > 0 else 0.0
+        remaining = max(self.total_frames - frames_processed, 0)
+
+        return {
+            'progress': min(99, int(100 * frames_processed / self.total_frames)) if self.total_frames > 0 else 0,
+            'frames_processed': frames_processed,
+            'start_frame': self.start_frame,
+            'total_frames': self.total_frames,
+            'fps': round(fps, 2),
+            'eta_sec': round(remaining / fps, 1) if fps > 0 else None,
+            'detections': self.detections,
+            'player_detections': self.player_detections,
+            'ball_detections': self.ball_detections
+        }
+
+
+class ProgressBroker:
+    """
+    Reparte eventos de progreso a los suscriptores de cada trabajo.
+
+    publish() puede llamarse desde cualquier hilo; los suscriptores son colas
+    asyncio del event loop de la API.
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._subscribers = {}
+
+    def bind(self, loop):
+        """Asocia el broker al event loop de la API."""
+        self._loop = loop
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(job_id)
+        if subscribers is not None:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[job_id]
+
+    def publish(self, job_id: str, event: str, data: dict):
+        """Publica un evento para todos los suscriptores de un trabajo."""
+        if self._loop is None or job_id not in self._subscribers:
+            return
+        self._loop.call_soon_threadsafe(self._deliver, job_id, event, data)
+
+    def _deliver(self, job_id: str, event: str, data: dict):
+        for queue in self._subscribers.get(job_id, ()):
+            queue.put_nowait((event, data))
+
+
+def format_sse(event: str, data: dict) -> str:
+    """Formatea un evento Server-Sent Events."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
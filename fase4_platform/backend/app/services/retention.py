@@ -0,0 +1,311 @@
+"""
+Retención de archivos en disco.
+
+Mantiene los videos subidos, los artefactos de los análisis y la caché de
+resultados bajo un tamaño máximo y una edad máxima. Los videos ya analizados
+son los primeros en desalojarse (el resultado queda en la caché); los trabajos
+fijados (pinned) y los que están en curso nunca pierden sus archivos. Un hilo
+de fondo repite la limpieza periódicamente.
+"""
+
+import os
+import re
+import shutil
+import threading
+import time
+from datetime import datetime, timedelta
+
+from services.metrics import storage_bytes, storage_files, retention_evictions
+from services.uploads import abort_upload
+
+
+# Cuotas (tamaño total y edad máxima) por área
+UPLOAD_QUOTA_BYTES = int(os.environ.get("UPLOAD_QUOTA_MB", 20480)) * 1024 * 1024
+UPLOAD_MAX_AGE_SEC = float(os.environ.get("UPLOAD_MAX_AGE_HOURS", 72)) * 3600
+
+# Subidas reanudables sin recibir datos durante este tiempo se abortan
+UPLOAD_IDLE_SEC = float(os.environ.get("UPLOAD_IDLE_HOURS", 24)) * 3600
+ARTIFACTS_QUOTA_BYTES = int(os.environ.get("ARTIFACTS_QUOTA_MB", 10240)) * 1024 * 1024
+ARTIFACTS_MAX_AGE_SEC = float(os.environ.get("ARTIFACTS_MAX_AGE_DAYS", 14)) * 86400
+
+# Trabajos terminados que se borran de la base de datos
+JOB_MAX_AGE_SEC = float(os.environ.get("JOB_MAX_AGE_DAYS", 30)) * 86400
+
+# Intervalo del barrido de fondo
+RETENTION_SWEEP_SEC = float(os.environ.get("RETENTION_SWEEP_SEC", 600))
+
+# Estados cuyos archivos no se pueden tocar (las subidas paradas caducan por
+# UPLOAD_IDLE_SEC y pasan a error)
+ACTIVE_STATUSES = ("uploading", "queued", "processing")
+FINAL_STATUSES = ("completed", "error", "cancelled")
+NOT_UPLOADING = ("uploaded", "queued", "processing") + FINAL_STATUSES
+
+# Archivos de uploads/ que crea la plataforma: videos por hash y subidas en curso
+MANAGED_UPLOAD = re.compile(r"^([0-9a-f]{64}\.[^.]+|.+\.part)$")
+
+
+def scan(directory: str, dirs: bool = False) -> list:
+    """
+    Entradas de primer nivel de un directorio.
+
+    Args:
+        directory: Directorio a recorrer
+        dirs: Listar subdirectorios (con su tamaño total) en vez de archivos
+
+    Returns:
+        Lista de (mtime, tamaño, ruta)
+    """
+    if not os.path.isdir(directory):
+        return []
+
+    entries = []
+    for entry in os.scandir(directory):
+        if dirs and entry.is_dir():
+            size = sum(
+                os.path.getsize(os.path.join(root, name))
+                for root, _, names in os.walk(entry.path) for name in names
+            )
+            entries.append((entry.stat().st_mtime, size, entry.path))
+        elif not dirs and entry.is_file():
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    return entries
+
+
+def evict(entries: list, max_bytes: int, max_age_sec: float = None, keep=()) -> list:
+    """
+    Borra entradas viejas y, si no alcanza, las menos usadas hasta caber en max_bytes.
+
+    Args:
+        entries: Lista de (mtime, tamaño, ruta) ya en orden de desalojo
+        max_bytes: Tamaño máximo permitido
+        max_age_sec: Edad máxima (None = sin límite)
+        keep: Rutas que no se pueden borrar
+
+    Returns:
+        Lista de (ruta, tamaño, motivo) borradas
+    """
+    keep = {os.path.abspath(p) for p in keep}
+    now = time.time()
+    total = sum(size for _, size, _ in entries)
+    removed = []
+
+    for mtime, size, path in entries:
+        if os.path.abspath(path) in keep:
+            continue
+        if max_age_sec is not None and now - mtime > max_age_sec:
+            reason = "age"
+        elif total > max_bytes:
+            reason = "quota"
+        else:
+            continue
+
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        elif os.path.exists(path):
+            os.remove(path)
+        total -= size
+        removed.append((path, size, reason))
+
+    return removed
+
+
+def evict_lru(directory: str, max_bytes: int, keep=()) -> list:
+    """
+    Borra los archivos menos usados hasta que el directorio quepa en max_bytes.
+
+    Args:
+        directory: Directorio a limpiar (solo archivos de primer nivel)
+        max_bytes: Tamaño máximo permitido
+        keep: Rutas que no se pueden borrar
+
+    Returns:
+        Lista de rutas borradas
+    """
+    return [path for path, _, _ in evict(sorted(scan(directory)), max_bytes, keep=keep)]
+
+
+class RetentionManager:
+    """
+    Aplica las cuotas de disco de la plataforma.
+
+    Args:
+        job_store: JobStore con los trabajos
+        upload_dir: Directorio de videos subidos
+        artifacts_dir: Directorio de artefactos (una carpeta por trabajo)
+        cache_dir: Directorio de la caché de resultados
+        cache_quota_bytes: Tamaño máximo de la caché de resultados
+    """
+
+    def __init__(self, job_store, upload_dir: str, artifacts_dir: str, cache_dir: str,
+                 cache_quota_bytes: int):
+        self.job_store = job_store
+        self.areas = {
+            "uploads": {"dir": upload_dir, "quota_bytes": UPLOAD_QUOTA_BYTES,
+                        "max_age_sec": UPLOAD_MAX_AGE_SEC},
+            "artifacts": {"dir": artifacts_dir, "quota_bytes": ARTIFACTS_QUOTA_BYTES,
+                          "max_age_sec": ARTIFACTS_MAX_AGE_SEC},
+            "video_cache": {"dir": cache_dir, "quota_bytes": cache_quota_bytes,
+                            "max_age_sec": None}
+        }
+        self.last_sweep = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Arranca el barrido periódico en un hilo de fondo."""
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.sweep()
+            except Exception as e:
+                self.last_sweep = {"at": datetime.now().isoformat(), "error": str(e)}
+            self._stop.wait(RETENTION_SWEEP_SEC)
+
+    def sweep(self) -> dict:
+        """Barrido completo: trabajos caducados, videos, artefactos y caché."""
+        with self._lock:
+            start = time.perf_counter()
+            jobs = self._all_jobs()
+            expired = self._expire_jobs(jobs)
+            jobs = [job for job in jobs if job["id"] not in expired]
+
+            removed = {
+                "uploads": self._sweep_uploads(jobs),
+                "artifacts": self._sweep_artifacts(jobs),
+                "video_cache": self._sweep_area("video_cache", sorted(scan(self.areas["video_cache"]["dir"])))
+            }
+
+            self.last_sweep = {
+                "at": datetime.now().isoformat(),
+                "duration_sec": round(time.perf_counter() - start, 3),
+                "expired_jobs": len(expired),
+                "removed": {area: len(paths) for area, paths in removed.items()},
+                "freed_bytes": sum(size for paths in removed.values() for _, size, _ in paths)
+            }
+        self.usage()
+        return self.last_sweep
+
+    def enforce_uploads(self, keep=()) -> list:
+        """Aplica la cuota de videos (al subir o terminar un análisis)."""
+        with self._lock:
+            return self._sweep_uploads(self._all_jobs(), keep=keep)
+
+    def usage(self) -> dict:
+        """Uso de disco por área, con sus cuotas."""
+        usage = {}
+        for area, config in self.areas.items():
+            entries = scan(config["dir"], dirs=area == "artifacts")
+            used = sum(size for _, size, _ in entries)
+            storage_bytes.set(used, area=area)
+            storage_files.set(len(entries), area=area)
+            usage[area] = {
+                "entries": len(entries),
+                "bytes": used,
+                "quota_bytes": config["quota_bytes"],
+                "used_pct": round(100 * used / config["quota_bytes"], 1) if config["quota_bytes"] else None,
+                "max_age_sec": config["max_age_sec"]
+            }
+        return usage
+
+    def _sweep_uploads(self, jobs: list, keep=()) -> list:
+        keep = set(keep)
+        analyzed = set()
+        for job in jobs:
+            if not job.get("filepath"):
+                continue
+            if job["status"] in ACTIVE_STATUSES or job.get("pinned"):
+                keep.add(job["filepath"])
+            elif job["status"] == "completed":
+                analyzed.add(os.path.abspath(job["filepath"]))
+
+        # Solo se desalojan archivos de la plataforma (no los videos de ejemplo
+        # del repositorio); primero los ya analizados, del menos al más usado
+        entries = sorted(
+            (e for e in scan(self.areas["uploads"]["dir"])
+             if MANAGED_UPLOAD.match(os.path.basename(e[2]))),
+            key=lambda e: (os.path.abspath(e[2]) not in analyzed, e[0])
+        )
+        removed = self._sweep_area("uploads", entries, keep)
+
+        # Trabajos que se quedaron sin video
+        removed_paths = {os.path.abspath(path) for path, _, _ in removed}
+        for job in jobs:
+            if job.get("filepath") and os.path.abspath(job["filepath"]) in removed_paths:
+                self.job_store.update(job["id"], video_evicted=True)
+        return removed
+
+    def _sweep_artifacts(self, jobs: list) -> list:
+        keep = set()
+        for job in jobs:
+            if job["status"] in ACTIVE_STATUSES or job.get("pinned"):
+                keep.add(os.path.join(self.areas["artifacts"]["dir"], job["id"]))
+                if job.get("artifacts_job"):
+                    keep.add(os.path.join(self.areas["artifacts"]["dir"], job["artifacts_job"]))
+
+        entries = sorted(scan(self.areas["artifacts"]["dir"], dirs=True))
+        return self._sweep_area("artifacts", entries, keep)
+
+    def _sweep_area(self, area: str, entries: list, keep=()) -> list:
+        config = self.areas[area]
+        removed = evict(entries, config["quota_bytes"], config["max_age_sec"], keep)
+        for _, _, reason in removed:
+            retention_evictions.inc(area=area, reason=reason)
+        return removed
+
+    def _expire_jobs(self, jobs: list) -> set:
+        """
+        Borra los trabajos terminados más viejos que JOB_MAX_AGE_SEC (salvo
+        fijados) y da por abandonadas las subidas sin actividad.
+
+        Los artefactos de un trabajo borrado se conservan si otro trabajo los
+        sigue usando (artifacts_job de un resultado que vino de la caché).
+        """
+        limit = (datetime.now() - timedelta(seconds=JOB_MAX_AGE_SEC)).isoformat()
+        expired = set()
+        for job in jobs:
+            if job["status"] == "uploading" and time.time() - _last_upload_activity(job) > UPLOAD_IDLE_SEC:
+                # Solo si sigue subiéndose (un último bloque pudo completarla)
+                updated = self.job_store.update(
+                    job["id"], unless_status=NOT_UPLOADING, status="error", error="Subida abandonada"
+                )
+                if updated is not None:
+                    job.update(updated)
+                    abort_upload(job["id"], job["filepath"])
+                    retention_evictions.inc(area="uploads", reason="idle")
+                continue
+            if job["status"] in FINAL_STATUSES and not job.get("pinned") and job["updated_at"] < limit:
+                self.job_store.delete(job["id"])
+                retention_evictions.inc(area="jobs", reason="age")
+                expired.add(job["id"])
+
+        referenced = {
+            job["artifacts_job"] for job in jobs
+            if job.get("artifacts_job") and job["id"] not in expired
+        }
+        for job_id in expired - referenced:
+            shutil.rmtree(os.path.join(self.areas["artifacts"]["dir"], job_id), ignore_errors=True)
+        return expired
+
+    def _all_jobs(self) -> list:
+        jobs, cursor = [], None
+        while True:
+            page, cursor = self.job_store.list(limit=500, cursor=cursor)
+            jobs.extend(page)
+            if cursor is None:
+                return jobs
+
+
+def _last_upload_activity(job: dict) -> float:
+    """Último momento en que una subida recibió datos (o se creó)."""
+    last = datetime.fromisoformat(job["updated_at"]).timestamp()
+    if job.get("filepath") and os.path.exists(job["filepath"]):
+        last = max(last, os.path.getmtime(job["filepath"]))
+    return last
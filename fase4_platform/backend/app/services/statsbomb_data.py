@@ -0,0 +1,80 @@
+"""
+Acceso a los datos de StatsBomb.
+
+Centraliza las descargas de partidos y eventos para que los servicios de
+equipos y jugadores compartan la misma caché.
+"""
+
+from statsbombpy import sb
+import pandas as pd
+import os
+
+from services.cache import TTLCache
+from services.metrics import statsbomb_requests
+
+
+# Competiciones soportadas (competition_id, season_id)
+COMPETITIONS = {
+    "worldcup_2022": (43, 106)
+}
+DEFAULT_COMPETITION = (11, 27)
+
+# Los eventos de un partido terminado no cambian: solo se limita el tamaño
+MATCH_EVENTS_CACHE_SIZE = int(os.environ.get("MATCH_EVENTS_CACHE_SIZE", 16))
+_matches_cache = TTLCache(maxsize=32)
+_events_cache = TTLCache(maxsize=MATCH_EVENTS_CACHE_SIZE)
+
+
+def competition_ids(competition: str) -> tuple:
+    """Devuelve (competition_id, season_id) de una competición."""
+    return COMPETITIONS.get(competition, DEFAULT_COMPETITION)
+
+
+def get_matches(competition: str = "worldcup_2022") -> pd.DataFrame:
+    """Partidos de una competición."""
+
+    matches = _matches_cache.get(competition)
+    if matches is None:
+        comp_id, season_id = competition_ids(competition)
+        matches = sb.matches(competition_id=comp_id, season_id=season_id)
+        _matches_cache.set(competition, matches)
+        statsbomb_requests.inc(resource="matches", source="fetch")
+    else:
+        statsbomb_requests.inc(resource="matches", source="cache")
+    return matches
+
+
+def get_match_events(match_id: int) -> pd.DataFrame:
+    """Eventos de un partido, con la columna match_id añadida."""
+
+    events = _events_cache.get(match_id)
+    if events is None:
+        events = sb.events(match_id=match_id)
+        events['match_id'] = match_id
+        _events_cache.set(match_id, events)
+        statsbomb_requests.inc(resource="events", source="fetch")
+    else:
+        statsbomb_requests.inc(resource="events", source="cache")
+    return events
+
+
+def load_competition_events(competition: str = "worldcup_2022", columns: list = None) -> pd.DataFrame:
+    """
+    Eventos de todos los partidos de una competición.
+
+    Args:
+        competition: Clave de la competición
+        columns: Columnas a conservar (None = todas)
+
+    Returns:
+        DataFrame con los eventos concatenados
+    """
+
+    all_events = []
+    for match_id in get_matches(competition)['match_id']:
+        events = get_match_events(match_id)
+        if columns is not None:
+            events = events.reindex(columns=columns)
+        all_events.append(events)
+
+    return pd.concat(all_events, ignore_index=True)
@@ -1,21 +1,39 @@
 """
 Servicio de análisis de equipos con StatsBomb.
+
+Los estilos calculados se guardan en una caché (equipo, competición) con TTL y
+desalojo LRU. Para torneos terminados se puede precalcular la tabla de estilos
+de toda la competición, que se guarda en disco y se usa antes de ir a StatsBomb.
 """
 
-from statsbombpy import sb
 import pandas as pd
-import numpy as np
+import json
+import os
+
+from services.cache import TTLCache
+from services.metrics import team_style_requests
+from services.comparison import build_comparison_matrix, TEAM_METRICS
+from services.statsbomb_data import get_matches, get_match_events, load_competition_events
+
+# Caché de estilos por (equipo, competición)
+TEAM_STYLE_TTL_SEC = float(os.environ.get("TEAM_STYLE_TTL_SEC", 24 * 3600))
+TEAM_STYLE_CACHE_SIZE = int(os.environ.get("TEAM_STYLE_CACHE_SIZE", 256))
+_style_cache = TTLCache(maxsize=TEAM_STYLE_CACHE_SIZE, ttl=TEAM_STYLE_TTL_SEC)
+
+# Tablas precalculadas por competición
+TEAM_STYLE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "results", "team_styles"
+)
+
+# competición -> (mtime, tabla) ya leída del disco
+_tables = {}
 
 
 def get_team_events(team_name: str, competition: str = "worldcup_2022") -> pd.DataFrame:
     """Obtiene todos los eventos de un equipo."""
     
-    if competition == "worldcup_2022":
-        comp_id, season_id = 43, 106
-    else:
-        comp_id, season_id = 11, 27
-    
-    matches = sb.matches(competition_id=comp_id, season_id=season_id)
+    matches = get_matches(competition)
     team_matches = matches[
         (matches['home_team'] == team_name) | 
         (matches['away_team'] == team_name)
@@ -23,18 +41,14 @@ def get_team_events(team_name: str, competition: str = "worldcup_2022") -> pd.Da
     
     all_events = []
     for _, match in team_matches.iterrows():
-        events = sb.events(match_id=match['match_id'])
-        events['match_id'] = match['match_id']
-        all_events.append(events)
+        all_events.append(get_match_events(match['match_id']))
     
     df = pd.concat(all_events, ignore_index=True)
     return df[df['team'] == team_name]
 
 
-def analyze_team_style(team_name: str, competition: str = "worldcup_2022") -> dict:
-    """Analiza el estilo de juego de un equipo."""
-    
-    events = get_team_events(team_name, competition)
+def calculate_team_style(team_name: str, events: pd.DataFrame) -> dict:
+    """Calcula las métricas de estilo a partir de los eventos de un equipo."""
     
     # Pases
     passes = events[events['type'] == 'Pass']
@@ -59,10 +73,10 @@ def analyze_team_style(team_name: str, competition: str = "worldcup_2022") -> di
     
     return {
         'team': team_name,
-        'matches': num_matches,
+        'matches': int(num_matches),
         'goals': int(len(goals)),
         'xg': float(xg),
-        'goals_over_xg': round(len(goals) - xg, 2),
+        'goals_over_xg': round(float(len(goals) - xg), 2),
         'shots': int(len(shots)),
         'conversion_rate': round(len(goals) / len(shots) * 100, 1) if len(shots) > 0 else 0,
         'passes': int(len(passes)),
@@ -72,6 +86,139 @@ def analyze_team_style(team_name: str, competition: str = "worldcup_2022") -> di
     }
 
 
+def analyze_team_style(team_name: str, competition: str = "worldcup_2022") -> dict:
+    """Analiza el estilo de juego de un equipo (con caché)."""
+    
+    style = _cached_style(team_name, competition)
+    
+    if style is None:
+        events = get_team_events(team_name, competition)
+        style = calculate_team_style(team_name, events)
+        team_style_requests.inc(source="computed")
+    
+    _style_cache.set((team_name, competition), style)
+    return dict(style)
+
+
+def analyze_teams_style(teams: list, competition: str = "worldcup_2022") -> dict:
+    """
+    Analiza el estilo de varios equipos en una sola pasada.
+    
+    Los equipos que no están en caché se calculan juntos: cada partido en
+    el que juega alguno de ellos se descarga una sola vez.
+    
+    Returns:
+        Dict equipo -> métricas de estilo (en el orden recibido)
+    """
+    
+    styles = {team: _cached_style(team, competition) for team in teams}
+    missing = [team for team, style in styles.items() if style is None]
+    
+    if missing:
+        matches = get_matches(competition)
+        involved = matches[matches['home_team'].isin(missing) | matches['away_team'].isin(missing)]
+        
+        events_by_team = {team: [] for team in missing}
+        for match_id in involved['match_id']:
+            events = get_match_events(match_id)
+            for team, team_events in events[events['team'].isin(missing)].groupby('team'):
+                events_by_team[team].append(team_events)
+        
+        for team in missing:
+            if not events_by_team[team]:
+                raise ValueError(f"No se encontraron partidos de {team}")
+            events = pd.concat(events_by_team[team], ignore_index=True)
+            styles[team] = calculate_team_style(team, events)
+            _style_cache.set((team, competition), styles[team])
+            team_style_requests.inc(source="computed")
+    
+    return {team: dict(style) for team, style in styles.items()}
+
+
+def _cached_style(team_name: str, competition: str):
+    """Estilo desde la caché o la tabla precalculada (None si no existe)."""
+    
+    style = _style_cache.get((team_name, competition))
+    if style is not None:
+        team_style_requests.inc(source="cache")
+        return style
+    
+    style = load_competition_styles(competition).get(team_name)
+    if style is not None:
+        _style_cache.set((team_name, competition), style)
+        team_style_requests.inc(source="precomputed")
+    return style
+
+
+def precompute_competition_styles(competition: str = "worldcup_2022") -> dict:
+    """
+    Calcula el estilo de todos los equipos de una competición.
+    
+    Cada partido se descarga una sola vez. La tabla se guarda en
+    TEAM_STYLE_DIR y se cargan sus entradas en la caché.
+    
+    Returns:
+        Dict equipo -> métricas de estilo
+    """
+    
+    df = load_competition_events(competition)
+    
+    styles = {
+        team: calculate_team_style(team, team_events)
+        for team, team_events in df.groupby('team')
+    }
+    
+    os.makedirs(TEAM_STYLE_DIR, exist_ok=True)
+    with open(_table_path(competition), 'w') as f:
+        json.dump(styles, f, indent=2)
+    
+    for team, style in styles.items():
+        _style_cache.set((team, competition), style)
+    
+    return styles
+
+
+def load_competition_styles(competition: str) -> dict:
+    """
+    Tabla precalculada de una competición (vacía si no existe).
+    
+    Se lee del disco una vez y se guarda en memoria; solo se vuelve a leer
+    si el archivo cambia (otra mtime), p. ej. tras precalcularla de nuevo.
+    """
+    
+    path = _table_path(competition)
+    try:
+        mtime = os.path.getmtime(path)
+    except FileNotFoundError:
+        _tables.pop(competition, None)
+        return {}
+    
+    cached = _tables.get(competition)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    
+    with open(path) as f:
+        styles = json.load(f)
+    _tables[competition] = (mtime, styles)
+    return styles
+
+
+def warm_style_cache(competition: str = "worldcup_2022") -> dict:
+    """Carga la tabla de estilos en la caché, calculándola si no existe."""
+    
+    styles = load_competition_styles(competition)
+    if not styles:
+        return precompute_competition_styles(competition)
+    
+    for team, style in styles.items():
+        _style_cache.set((team, competition), style)
+    return styles
+
+
+def _table_path(competition: str) -> str:
+    return os.path.join(TEAM_STYLE_DIR, f"{competition}.json")
+
+
 def compare_teams_style(team1: str, team2: str, competition: str) -> dict:
     """Compara estilos de dos equipos."""
     
@@ -87,4 +234,16 @@ def compare_teams_style(team1: str, team2: str, competition: str) -> dict:
             'more_pressing': team1 if style1['pressures_per_game'] > style2['pressures_per_game'] else team2,
             'more_efficient': team1 if style1['conversion_rate'] > style2['conversion_rate'] else team2
         }
+    }
+
+
+def compare_teams_batch(teams: list, competition: str = "worldcup_2022") -> dict:
+    """Compara N equipos: estilos de cada uno y matriz por métrica."""
+    
+    styles = analyze_teams_style(teams, competition)
+    
+    return {
+        'teams': list(styles),
+        'styles': styles,
+        'comparison': build_comparison_matrix(styles, TEAM_METRICS)
     }
\ No newline at end of file
@@ -0,0 +1,255 @@
+"""
+Subida de videos por bloques.
+
+Los videos se escriben a disco en bloques de tamaño fijo mientras se calcula su
+hash SHA-256, así la memoria por subida es constante sin importar el tamaño del
+archivo. Los formularios multipart se leen del cuerpo de la petición a medida
+que llega (sin el archivo temporal de UploadFile), así cada video se escribe
+una sola vez.
+
+También soporta subidas reanudables: el cliente envía el archivo en varias
+peticiones indicando el offset de cada bloque.
+"""
+
+import asyncio
+import hashlib
+import os
+from collections import deque
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:
+    from multipart.multipart import MultipartParser, parse_options_header
+
+
+# Tamaño de bloque y límite de subida
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_MB", 4096)) * 1024 * 1024
+
+# Margen para las cabeceras multipart al comparar Content-Length con el límite
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+# Hash parcial de las subidas reanudables en curso (job_id -> (sha256, bytes hasheados))
+_hashers = {}
+
+# Un bloque a la vez por subida (job_id -> asyncio.Lock)
+_locks = {}
+
+
+class UploadTooLarge(Exception):
+    """El archivo supera el tamaño máximo permitido."""
+
+
+class OffsetMismatch(Exception):
+    """El bloque no empieza donde termina lo ya recibido."""
+
+    def __init__(self, expected: int):
+        super().__init__(f"Offset esperado: {expected}")
+        self.expected = expected
+
+
+class InvalidMultipart(Exception):
+    """El cuerpo no es un formulario multipart con el archivo esperado."""
+
+
+class MultipartFile:
+    """
+    Campo de archivo de un cuerpo multipart/form-data, leído en streaming.
+
+    start() lee hasta las cabeceras del archivo y devuelve su nombre; chunks()
+    entrega después su contenido a medida que llega.
+
+    Args:
+        content_type: Cabecera Content-Type de la petición
+        stream: Iterador asíncrono con el cuerpo (request.stream())
+        field: Nombre del campo del formulario
+    """
+
+    def __init__(self, content_type: str, stream, field: str = "file"):
+        kind, params = parse_options_header(content_type)
+        boundary = params.get(b"boundary")
+        if kind != b"multipart/form-data" or not boundary:
+            raise InvalidMultipart("Se esperaba multipart/form-data")
+
+        self.field = field.encode()
+        self.filename = None
+        self._stream = stream.__aiter__()
+        self._data = deque()
+        self._headers = {}
+        self._header = [b"", b""]
+        self._in_file = False
+        self._file_done = False
+        self._parser = MultipartParser(boundary, {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": lambda data, start, end: self._append_header(0, data[start:end]),
+            "on_header_value": lambda data, start, end: self._append_header(1, data[start:end]),
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end
+        })
+
+    async def start(self) -> str:
+        """Lee hasta el inicio del archivo y devuelve su nombre."""
+        while self.filename is None:
+            await self._feed()
+        return self.filename
+
+    async def chunks(self):
+        """Contenido del archivo, por bloques."""
+        while True:
+            while self._data:
+                yield self._data.popleft()
+            if self._file_done:
+                return
+            await self._feed()
+
+    async def _feed(self):
+        try:
+            chunk = await self._stream.__anext__()
+        except StopAsyncIteration:
+            raise InvalidMultipart("Formulario incompleto o sin el campo de archivo")
+        if chunk:
+            self._parser.write(chunk)
+
+    def _on_part_begin(self):
+        self._headers = {}
+
+    def _append_header(self, k: int, data: bytes):
+        self._header[k] += data
+
+    def _on_header_end(self):
+        self._headers[self._header[0].lower()] = self._header[1]
+        self._header = [b"", b""]
+
+    def _on_headers_finished(self):
+        _, params = parse_options_header(self._headers.get(b"content-disposition", b""))
+        if self.filename is None and params.get(b"name") == self.field and b"filename" in params:
+            self.filename = params[b"filename"].decode("utf-8", errors="replace")
+            self._in_file = True
+
+    def _on_part_data(self, data, start: int, end: int):
+        if self._in_file:
+            self._data.append(bytes(data[start:end]))
+
+    def _on_part_end(self):
+        if self._in_file:
+            self._in_file = False
+            self._file_done = True
+
+
+async def save_upload(chunks, dest_path: str, max_bytes: int = MAX_UPLOAD_BYTES) -> dict:
+    """
+    Escribe a disco un archivo que llega por bloques.
+
+    Args:
+        chunks: Iterador asíncrono con el contenido (p. ej. MultipartFile.chunks())
+        dest_path: Ruta de destino
+        max_bytes: Tamaño máximo permitido
+
+    Returns:
+        Dict con size_bytes y sha256
+    """
+    sha = hashlib.sha256()
+    size = 0
+
+    try:
+        with open(dest_path, "wb") as out:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge()
+                sha.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        _remove(dest_path)
+        raise
+
+    return {"size_bytes": size, "sha256": sha.hexdigest()}
+
+
+async def append_chunk(job_id: str, dest_path: str, offset: int, stream,
+                       max_bytes: int = MAX_UPLOAD_BYTES) -> int:
+    """
+    Añade un bloque a una subida reanudable.
+
+    Args:
+        job_id: ID del trabajo
+        dest_path: Ruta del archivo parcial
+        offset: Posición del primer byte del bloque
+        stream: Iterador asíncrono con el cuerpo de la petición
+        max_bytes: Tamaño máximo permitido
+
+    Returns:
+        Bytes recibidos en total
+    """
+    # Dos PUT con el mismo offset no pueden añadir a la vez: el segundo ve
+    # el offset nuevo y responde OffsetMismatch
+    async with _locks.setdefault(job_id, asyncio.Lock()):
+        received = received_bytes(dest_path)
+        if offset != received:
+            raise OffsetMismatch(received)
+
+        # El hash guardado solo vale si cubre justo lo que hay en disco (tras un
+        # reinicio, un bloque cortado o uno recibido por otro worker no es así)
+        sha, hashed = _hashers.pop(job_id, (None, None))
+        if hashed != received:
+            sha = await asyncio.to_thread(_hash_file, dest_path)
+
+        with open(dest_path, "ab") as out:
+            async for chunk in stream:
+                received += len(chunk)
+                if received > max_bytes:
+                    raise UploadTooLarge()
+                sha.update(chunk)
+                out.write(chunk)
+
+        _hashers[job_id] = (sha, received)
+
+    return received
+
+
+def finish_upload(job_id: str, dest_path: str) -> dict:
+    """
+    Cierra una subida reanudable y devuelve su tamaño y hash.
+
+    Si no hay un hash válido en este proceso se recalcula leyendo el archivo:
+    llamar fuera del event loop.
+    """
+    sha, hashed = _hashers.pop(job_id, (None, None))
+    _locks.pop(job_id, None)
+    size = received_bytes(dest_path)
+    if hashed != size:
+        sha = _hash_file(dest_path)
+    return {"size_bytes": size, "sha256": sha.hexdigest()}
+
+
+def discard_upload(job_id: str):
+    """Olvida el estado en memoria de una subida (abortada o abandonada)."""
+    _hashers.pop(job_id, None)
+    _locks.pop(job_id, None)
+
+
+def abort_upload(job_id: str, dest_path: str):
+    """Descarta una subida reanudable."""
+    discard_upload(job_id)
+    _remove(dest_path)
+
+
+def received_bytes(path: str) -> int:
+    """Bytes ya escritos de una subida."""
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def _hash_file(path: str, chunk_size: int = UPLOAD_CHUNK_SIZE):
+    sha = hashlib.sha256()
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                sha.update(chunk)
+    return sha
+
+
+def _remove(path: str):
+    if os.path.exists(path):
+        os.remove(path)
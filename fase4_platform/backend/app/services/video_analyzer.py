@@ -2,21 +2,57 @@
 Servicio de análisis de video con YOLO.
 """
 
-from ultralytics import YOLO
 import supervision as sv
 import cv2
 import numpy as np
 import os
+import sys
+from contextlib import closing
 
+# Pipeline de video compartido con fase2_computer_vision
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "..", "..", "..", "..", "fase2_computer_vision", "src"
+)))
+from video_pipeline import track_frames, is_keyframe
+from detection_buffer import DetectionBuffer, track_stats
+from checkpoint import Checkpointer, video_fingerprint
 
-def analyze_video_full(video_path: str, job_id: str) -> dict:
+from services.model_registry import (
+    get_model, YOLO_WEIGHTS, YOLO_BACKEND, DETECTION_CONF, DETECTION_CLASSES, KEYFRAME_STRIDE
+)
+from services.progress import ProgressReporter, JobCancelled
+
+
+def open_video_writer(path: str, fps: float, size: tuple):
+    """VideoWriter en H.264 si está disponible (reproducible en navegador), si no mp4v."""
+    for codec in ('avc1', 'mp4v'):
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*codec), fps, size)
+        if writer.isOpened():
+            return writer
+        writer.release()
+    raise RuntimeError(f"No se pudo crear el video {path}")
+
+
+def analyze_video_full(video_path: str, job_id: str, progress_callback=None, should_stop=None,
+                       output_dir: str = None, annotate: bool = False) -> dict:
     """
     Analiza un video completo con YOLO y tracking.
+    
+    Args:
+        video_path: Ruta al video
+        job_id: ID del trabajo
+        progress_callback: Función que recibe el dict de progreso
+            (frames, fps, ETA y detecciones parciales)
+        should_stop: Función que indica si hay que cancelar el análisis
+        output_dir: Carpeta donde guardar tracking.csv (y tracked.mp4) y los
+            puntos de control para reanudar el análisis si el worker muere
+        annotate: Guardar el video anotado con cajas e IDs de tracking
     """
     
-    # Cargar modelo
-    model = YOLO('yolov8n.pt')
+    # Modelo caliente del proceso
+    model = get_model()
     tracker = sv.ByteTrack()
+    buffer = DetectionBuffer()
     
     # Abrir video
     cap = cv2.VideoCapture(video_path)
@@ -25,69 +61,99 @@ def analyze_video_full(video_path: str, job_id: str) -> dict:
     width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
     height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
     
+    # Reanudar desde el último punto de control de este trabajo
+    checkpointer = None
+    start_frame = 0
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+        checkpointer = Checkpointer(
+            os.path.join(output_dir, 'checkpoint'),
+            video_fingerprint(video_path, weights=os.path.basename(YOLO_WEIGHTS), backend=YOLO_BACKEND,
+                              conf=DETECTION_CONF, classes=sorted(DETECTION_CLASSES), stride=KEYFRAME_STRIDE)
+        )
+        restored = checkpointer.load()
+        if restored is not None:
+            start_frame, tracker, buffer = restored
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+    
+    # Video anotado (al reanudar se dibuja al final a partir de las detecciones)
+    writer = None
+    if output_dir is not None and annotate and start_frame == 0:
+        writer = open_video_writer(os.path.join(output_dir, 'tracked.mp4'), fps, (width, height))
+        box_annotator = sv.BoxAnnotator()
+        label_annotator = sv.LabelAnnotator()
+    
     # Procesar frames
-    all_detections = []
-    frame_num = 0
+    class_ids = {name: class_id for class_id, name in model.names.items()}
+    reporter = ProgressReporter(progress_callback, total_frames, should_stop=should_stop,
+                                start_frame=start_frame)
+    
+    # Detectar por lotes y aplicar tracking frame a frame
+    try:
+        with closing(track_frames(cap, model, tracker, DETECTION_CONF, DETECTION_CLASSES,
+                                  start_frame=start_frame, stride=KEYFRAME_STRIDE)) as tracked:
+            for frame_num, frame, detections in tracked:
+                # Guardar
+                buffer.append(frame_num, detections, is_keyframe(frame_num, KEYFRAME_STRIDE))
+                frame_players = int(np.count_nonzero(detections.class_id == class_ids['person']))
+                
+                if writer is not None:
+                    labels = [f"#{tracker_id}" for tracker_id in detections.tracker_id]
+                    frame = box_annotator.annotate(frame, detections=detections)
+                    frame = label_annotator.annotate(frame, detections=detections, labels=labels)
+                    writer.write(frame)
+                
+                # Reportar progreso
+                reporter.update(frame_num + 1, frame_players, len(detections) - frame_players)
+                
+                # Punto de control (solo antes de un keyframe: el tracker está al día)
+                if checkpointer is not None and is_keyframe(frame_num + 1, KEYFRAME_STRIDE):
+                    checkpointer.maybe_save(frame_num + 1, tracker, buffer)
+    except JobCancelled:
+        if checkpointer is not None:
+            checkpointer.clear()
+        raise
+    finally:
+        cap.release()
     
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-        
-        # Detectar
-        results = model(frame, verbose=False, conf=0.3, classes=[0, 32])[0]
-        detections = sv.Detections.from_ultralytics(results)
-        
-        # Tracking
-        detections = tracker.update_with_detections(detections)
-        
-        # Guardar
-        for i in range(len(detections)):
-            x1, y1, x2, y2 = detections.xyxy[i]
-            tracker_id = int(detections.tracker_id[i]) if detections.tracker_id is not None else i
-            
-            all_detections.append({
-                'frame': frame_num,
-                'tracker_id': tracker_id,
-                'class': model.names[detections.class_id[i]],
-                'center_x': float((x1 + x2) / 2),
-                'center_y': float((y1 + y2) / 2)
-            })
-        
-        frame_num += 1
-    
-    cap.release()
+    # Artefactos
+    artifacts = []
+    if writer is not None:
+        writer.release()
+        artifacts.append('tracked.mp4')
+    elif output_dir is not None and annotate:
+        render_tracked_video(video_path, os.path.join(output_dir, 'tracked.mp4'), buffer)
+        artifacts.append('tracked.mp4')
+    if output_dir is not None:
+        buffer.to_dataframe(model.names).to_csv(os.path.join(output_dir, 'tracking.csv'), index=False,
+                  columns=['frame', 'tracker_id', 'class', 'center_x', 'center_y', 'source'])
+        artifacts.append('tracking.csv')
     
     # Calcular métricas
-    players = [d for d in all_detections if d['class'] == 'person']
-    balls = [d for d in all_detections if d['class'] == 'sports ball']
-    
-    # Métricas por jugador
-    player_ids = set(d['tracker_id'] for d in players)
-    player_metrics = []
-    
-    for pid in player_ids:
-        p_detections = sorted([d for d in players if d['tracker_id'] == pid], 
-                             key=lambda x: x['frame'])
-        
-        if len(p_detections) < 2:
-            continue
-        
-        # Distancia total
-        total_dist = 0
-        for i in range(1, len(p_detections)):
-            dx = p_detections[i]['center_x'] - p_detections[i-1]['center_x']
-            dy = p_detections[i]['center_y'] - p_detections[i-1]['center_y']
-            total_dist += np.sqrt(dx**2 + dy**2)
-        
-        player_metrics.append({
-            'tracker_id': pid,
-            'frames_tracked': len(p_detections),
-            'distance_px': round(total_dist, 2)
-        })
+    columns = buffer.columns()
+    players = columns['class_id'] == class_ids['person']
+    balls = columns['class_id'] == class_ids['sports ball']
+    
+    # Métricas por jugador (una sola ordenación para todos los tracks)
+    center_x, center_y = buffer.centers()
+    stats = track_stats(columns['tracker_id'][players], columns['frame'][players],
+                        center_x[players], center_y[players])
+    player_metrics = [
+        {
+            'tracker_id': int(pid),
+            'frames_tracked': int(frames),
+            'distance_px': round(float(distance), 2)
+        }
+        for pid, frames, distance in zip(stats['ids'], stats['frames'], stats['distance'])
+        if frames >= 2
+    ]
     
     player_metrics = sorted(player_metrics, key=lambda x: x['distance_px'], reverse=True)
     
+    # El análisis terminó: los puntos de control ya no hacen falta
+    if checkpointer is not None:
+        checkpointer.clear()
+    
     return {
         'video_info': {
             'duration_sec': round(total_frames / fps, 2),
@@ -96,10 +162,54 @@ def analyze_video_full(video_path: str, job_id: str) -> dict:
             'total_frames': total_frames
         },
         'detection_summary': {
-            'total_detections': len(all_detections),
-            'player_detections': len(players),
-            'ball_detections': len(balls),
-            'unique_players': len(player_ids)
+            'total_detections': len(buffer),
+            'player_detections': int(players.sum()),
+            'ball_detections': int(balls.sum()),
+            'unique_players': len(stats['ids'])
         },
-        'player_metrics': player_metrics[:15]
-    }
\ No newline at end of file
+        'player_metrics': player_metrics[:15],
+        'artifacts': {'job_id': job_id, 'files': sorted(artifacts)},
+        'resumed_from_frame': start_frame or None
+    }
+
+
+def render_tracked_video(video_path: str, output_path: str, buffer: DetectionBuffer):
+    """
+    Dibuja el video anotado a partir de detecciones ya guardadas.
+    
+    Se usa al reanudar un análisis: el video anotado a medias no se puede
+    continuar, así que se vuelve a generar solo decodificando (sin YOLO).
+    """
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    writer = open_video_writer(output_path, fps, size)
+    box_annotator = sv.BoxAnnotator()
+    label_annotator = sv.LabelAnnotator()
+    
+    # Las filas están en orden de frame: cada frame es un rango contiguo
+    columns = buffer.columns()
+    xyxy = np.column_stack([columns['x1'], columns['y1'], columns['x2'], columns['y2']])
+    bounds = np.searchsorted(columns['frame'], np.arange(int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) + 1))
+    
+    frame_num = 0
+    try:
+        while cap.isOpened():
+            ret, frame = cap.read()
+            if not ret:
+                break
+            rows = slice(*bounds[frame_num:frame_num + 2]) if frame_num + 1 < len(bounds) else slice(0, 0)
+            detections = sv.Detections(
+                xyxy=xyxy[rows],
+                confidence=columns['confidence'][rows],
+                class_id=columns['class_id'][rows].astype(int),
+                tracker_id=columns['tracker_id'][rows].astype(int)
+            )
+            labels = [f"#{tracker_id}" for tracker_id in detections.tracker_id]
+            frame = box_annotator.annotate(frame, detections=detections)
+            frame = label_annotator.annotate(frame, detections=detections, labels=labels)
+            writer.write(frame)
+            frame_num += 1
+    finally:
+        cap.release()
+        writer.release()
\ No newline at end of file
@@ -0,0 +1,91 @@
+"""
+Caché de resultados de video por contenido.
+
+Los videos se identifican por su hash SHA-256. El resultado de un análisis se
+guarda por (hash, pesos y backend del modelo, confianza, clases, paso de
+keyframes), así volver a subir un video ya analizado devuelve el resultado sin
+pasar por YOLO. Los directorios de videos y resultados se mantienen bajo un
+tamaño máximo desalojando los archivos usados hace más tiempo.
+"""
+
+import hashlib
+import json
+import os
+
+from services.model_registry import (
+    YOLO_WEIGHTS, YOLO_BACKEND, DETECTION_CONF, DETECTION_CLASSES, KEYFRAME_STRIDE
+)
+from services.retention import evict_lru
+
+
+VIDEO_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "results", "video_cache"
+)
+VIDEO_CACHE_QUOTA_BYTES = int(os.environ.get("VIDEO_CACHE_QUOTA_MB", 1024)) * 1024 * 1024
+
+
+def cache_key(sha256: str, weights: str = YOLO_WEIGHTS, conf: float = DETECTION_CONF,
+              classes: list = DETECTION_CLASSES, stride: int = KEYFRAME_STRIDE,
+              backend: str = YOLO_BACKEND) -> str:
+    """Clave del resultado para un video y una configuración de detección."""
+    raw = f"{sha256}|{os.path.basename(weights)}|{conf}|{sorted(classes)}"
+    if stride != 1:
+        raw += f"|k{stride}"
+    if backend != "torch":
+        raw += f"|{backend}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def get_cached_results(sha256: str):
+    """Resultado guardado para un video (None si no existe)."""
+    if not sha256:
+        return None
+
+    path = _result_path(cache_key(sha256))
+    if not os.path.exists(path):
+        return None
+
+    with open(path) as f:
+        results = json.load(f)
+    os.utime(path)  # marca de uso para el desalojo LRU
+    return results
+
+
+def save_cached_results(sha256: str, results: dict):
+    """Guarda el resultado de un video y aplica la cuota del directorio."""
+    if not sha256:
+        return
+
+    os.makedirs(VIDEO_CACHE_DIR, exist_ok=True)
+    path = _result_path(cache_key(sha256))
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(results, f)
+    os.replace(tmp_path, path)
+
+    evict_lru(VIDEO_CACHE_DIR, VIDEO_CACHE_QUOTA_BYTES)
+
+
+def store_by_hash(tmp_path: str, directory: str, sha256: str, ext: str) -> str:
+    """
+    Mueve un video subido a su ruta por contenido.
+
+    Si ya existe un archivo con el mismo hash, descarta la copia nueva.
+
+    Returns:
+        Ruta definitiva del video
+    """
+    final_path = os.path.join(directory, f"{sha256}{ext}")
+
+    if os.path.exists(final_path):
+        os.remove(tmp_path)
+        os.utime(final_path)
+    else:
+        os.replace(tmp_path, final_path)
+
+    return final_path
+
+
+def _result_path(key: str) -> str:
+    return os.path.join(VIDEO_CACHE_DIR, f"{key}.json")
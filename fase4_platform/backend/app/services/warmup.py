@@ -0,0 +1,88 @@
+"""
+Calentamiento del backend al arrancar.
+
+Importa los módulos pesados, espera a que los workers carguen YOLO y precarga
+las cachés de equipos y jugadores en un hilo aparte. /readyz solo responde OK
+cuando todos los pasos obligatorios terminaron bien.
+"""
+
+import importlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class Warmup:
+    """Pasos de calentamiento ejecutados en orden en un hilo de fondo."""
+
+    def __init__(self):
+        self._steps = OrderedDict()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def add(self, name: str, func, required: bool = True):
+        """
+        Registra un paso.
+
+        Args:
+            name: Nombre del paso
+            func: Función sin argumentos que hace el trabajo
+            required: Si un fallo del paso impide estar listo
+        """
+        self._steps[name] = {"func": func, "required": required, "status": "pending"}
+
+    def start(self):
+        """Lanza los pasos en segundo plano."""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def ready(self) -> bool:
+        """True cuando todos los pasos terminaron y los obligatorios sin error."""
+        with self._lock:
+            return all(
+                step["status"] == "done" or (step["status"] == "error" and not step["required"])
+                for step in self._steps.values()
+            )
+
+    def status(self) -> dict:
+        """Estado de cada paso."""
+        with self._lock:
+            return {
+                name: {key: value for key, value in step.items() if key != "func"}
+                for name, step in self._steps.items()
+            }
+
+    def _run(self):
+        for name, step in self._steps.items():
+            self._set(name, status="running")
+            start = time.perf_counter()
+            try:
+                step["func"]()
+                self._set(name, status="done")
+            except Exception as e:
+                self._set(name, status="error", error=str(e))
+            self._set(name, duration_sec=round(time.perf_counter() - start, 3))
+
+    def _set(self, name: str, **fields):
+        with self._lock:
+            self._steps[name].update(fields)
+
+
+def import_modules(modules: list):
+    """Importa una lista de módulos para que el primer request no pague el coste."""
+    for module in modules:
+        importlib.import_module(module)
+
+
+def wait_until(check, timeout: float, interval: float = 0.5):
+    """
+    Espera a que check() devuelva True.
+
+    Raises:
+        TimeoutError: Si no se cumple en timeout segundos
+    """
+    deadline = time.monotonic() + timeout
+    while not check():
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"No se completó en {timeout:.0f}s")
+        time.sleep(interval)
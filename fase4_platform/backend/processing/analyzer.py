@@ -3,31 +3,51 @@ Módulo de análisis de video de fútbol.
 Integra YOLO, tracking y métricas.
 """
 
-from ultralytics import YOLO
 import supervision as sv
 import cv2
 import numpy as np
-import pandas as pd
 import os
+import sys
+from contextlib import closing
 
+# Registro de modelos compartido con los servicios de la app
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+from services.model_registry import (
+    get_model, YOLO_WEIGHTS, YOLO_DEVICE, YOLO_BACKEND, DETECTION_CONF, DETECTION_CLASSES, KEYFRAME_STRIDE,
+    PERSON_CLASS_ID
+)
+from services.progress import ProgressReporter, JobCancelled
 
-def analyze_football_video(video_path: str, job_id: str, progress_callback=None):
+# Pipeline de video compartido con fase2_computer_vision
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "..", "..", "..", "fase2_computer_vision", "src"
+)))
+from video_pipeline import track_frames, is_keyframe
+from chunked_tracking import track_video_parallel, TrackingCancelled, COLUMNS
+from detection_buffer import DetectionBuffer, track_stats
+from checkpoint import Checkpointer, video_fingerprint
+
+
+def analyze_football_video(video_path: str, job_id: str, progress_callback=None, should_stop=None,
+                           workers: int = 1, checkpoint_dir: str = None):
     """
     Analiza un video de fútbol completo.
     
     Args:
         video_path: Ruta al video
         job_id: ID del trabajo
-        progress_callback: Función para reportar progreso
+        progress_callback: Función que recibe el dict de progreso
+            (frames, fps, ETA y detecciones parciales)
+        should_stop: Función que indica si hay que cancelar el análisis
+        workers: Procesos entre los que repartir el video por tramos
+            (1 = secuencial en este proceso)
+        checkpoint_dir: Carpeta de puntos de control; si el proceso muere, el
+            siguiente intento reanuda desde el último (solo con workers=1)
     
     Returns:
         dict con resultados del análisis
     """
     
-    # Cargar modelo
-    model = YOLO('yolov8n.pt')
-    tracker = sv.ByteTrack()
-    
     # Abrir video
     cap = cv2.VideoCapture(video_path)
     fps = cap.get(cv2.CAP_PROP_FPS)
@@ -36,70 +56,75 @@ def analyze_football_video(video_path: str, job_id: str, progress_callback=None)
     height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
     
     # Almacenar detecciones
-    all_detections = []
-    
-    frame_num = 0
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-        
-        # Detectar
-        results = model(frame, verbose=False, conf=0.3, classes=[0, 32])[0]
-        detections = sv.Detections.from_ultralytics(results)
+    if workers > 1:
+        reporter = ProgressReporter(progress_callback, total_frames, should_stop=should_stop)
+        buffer, names = track_in_chunks(video_path, workers, reporter)
+    else:
+        # Modelo caliente del proceso
+        model = get_model()
+        tracker = sv.ByteTrack()
+        buffer, names = DetectionBuffer(), model.names
+        person_id = class_id_of(names, 'person')
         
-        # Tracking
-        detections = tracker.update_with_detections(detections)
+        # Reanudar desde el último punto de control
+        checkpointer = None
+        start_frame = 0
+        if checkpoint_dir is not None:
+            checkpointer = Checkpointer(checkpoint_dir, video_fingerprint(
+                video_path, weights=os.path.basename(YOLO_WEIGHTS), backend=YOLO_BACKEND,
+                conf=DETECTION_CONF, classes=sorted(DETECTION_CLASSES), stride=KEYFRAME_STRIDE
+            ))
+            restored = checkpointer.load()
+            if restored is not None:
+                start_frame, tracker, buffer = restored
+                cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+        reporter = ProgressReporter(progress_callback, total_frames, should_stop=should_stop,
+                                    start_frame=start_frame)
         
-        # Guardar detecciones
-        for i in range(len(detections)):
-            x1, y1, x2, y2 = detections.xyxy[i]
-            tracker_id = detections.tracker_id[i] if detections.tracker_id is not None else i
-            
-            all_detections.append({
-                'frame': frame_num,
-                'time_sec': float(frame_num / fps),
-                'tracker_id': int(tracker_id),
-                'class': model.names[detections.class_id[i]],
-                'center_x': float((x1 + x2) / 2),
-                'center_y': float((y1 + y2) / 2)
-            })
+        # Detectar por lotes y aplicar tracking frame a frame
+        try:
+            with closing(track_frames(cap, model, tracker, DETECTION_CONF, DETECTION_CLASSES,
+                                      start_frame=start_frame, stride=KEYFRAME_STRIDE)) as tracked:
+                for frame_num, frame, detections in tracked:
+                    # Guardar detecciones
+                    buffer.append(frame_num, detections, is_keyframe(frame_num, KEYFRAME_STRIDE))
+                    frame_players = int(np.count_nonzero(detections.class_id == person_id))
+                    
+                    # Reportar progreso
+                    reporter.update(frame_num + 1, frame_players, len(detections) - frame_players)
+                    
+                    # Punto de control (solo antes de un keyframe: el tracker está al día)
+                    if checkpointer is not None and is_keyframe(frame_num + 1, KEYFRAME_STRIDE):
+                        checkpointer.maybe_save(frame_num + 1, tracker, buffer)
+        except JobCancelled:
+            if checkpointer is not None:
+                checkpointer.clear()
+            raise
         
-        frame_num += 1
-        
-        # Reportar progreso
-        if progress_callback and frame_num % 30 == 0:
-            progress = int(100 * frame_num / total_frames)
-            progress_callback(progress)
+        if checkpointer is not None:
+            checkpointer.clear()
     
     cap.release()
     
-    # Crear DataFrame
-    df = pd.DataFrame(all_detections)
+    # Crear DataFrame (sobre las columnas del buffer, sin copiar)
+    df = buffer.to_dataframe(names, fps)
     
     # Calcular métricas
     players = df[df['class'] == 'person']
     ball = df[df['class'] == 'sports ball']
     
-    # Métricas por jugador
-    player_metrics = []
-    for tracker_id in players['tracker_id'].unique():
-        player_data = players[players['tracker_id'] == tracker_id].sort_values('frame')
-        
-        if len(player_data) < 2:
-            continue
-        
-        # Calcular distancia
-        dx = player_data['center_x'].diff()
-        dy = player_data['center_y'].diff()
-        distances = np.sqrt(dx**2 + dy**2)
-        total_distance = float(distances.sum())
-        
-        player_metrics.append({
+    # Métricas por jugador (una sola ordenación para todos los tracks)
+    stats = track_stats(players['tracker_id'].to_numpy(), players['frame'].to_numpy(),
+                        players['center_x'].to_numpy(), players['center_y'].to_numpy())
+    player_metrics = [
+        {
             'tracker_id': int(tracker_id),
-            'frames_tracked': int(len(player_data)),
-            'total_distance_px': round(total_distance, 2)
-        })
+            'frames_tracked': int(frames),
+            'total_distance_px': round(float(distance), 2)
+        }
+        for tracker_id, frames, distance in zip(stats['ids'], stats['frames'], stats['distance'])
+        if frames >= 2
+    ]
     
     # Ordenar por distancia
     player_metrics = sorted(player_metrics, key=lambda x: x['total_distance_px'], reverse=True)
@@ -123,4 +148,38 @@ def analyze_football_video(video_path: str, job_id: str, progress_callback=None)
         'analysis_complete': True
     }
     
-    return results
\ No newline at end of file
+    return results
+
+
+def track_in_chunks(video_path: str, workers: int, reporter: ProgressReporter) -> tuple:
+    """
+    Tracking repartido por tramos entre varios procesos, con IDs unidos.
+    
+    Returns:
+        (DetectionBuffer con las detecciones, nombres de clases del modelo)
+    """
+    frames_done = [0]
+    class_col = COLUMNS.index('class_id')
+    
+    def on_chunk(n_frames, rows):
+        players = int((rows[:, class_col] == PERSON_CLASS_ID).sum())
+        frames_done[0] += n_frames
+        reporter.update(frames_done[0], players, len(rows) - players, force=True)
+    
+    try:
+        rows, names = track_video_parallel(
+            video_path, YOLO_WEIGHTS, workers=workers, device=YOLO_DEVICE, backend=YOLO_BACKEND,
+            conf=DETECTION_CONF, classes=DETECTION_CLASSES, stride=KEYFRAME_STRIDE,
+            on_chunk=on_chunk, should_stop=reporter.should_stop
+        )
+    except TrackingCancelled:
+        raise JobCancelled()
+    
+    buffer = DetectionBuffer(capacity=max(len(rows), 1))
+    buffer.extend({name: rows[:, k] for k, name in enumerate(COLUMNS)})
+    return buffer, names
+
+
+def class_id_of(names: dict, class_name: str) -> int:
+    """ID de una clase a partir de los nombres del modelo."""
+    return next(class_id for class_id, name in names.items() if name == class_name)
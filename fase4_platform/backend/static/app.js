@@ -84,23 +84,49 @@ async function handleVideoUpload(file) {
         const uploadData = await uploadRes.json();
         const jobId = uploadData.job_id;
         
-        // Analyze
-        statusText.textContent = 'Analizando con YOLO...';
-        progressBar.style.width = '50%';
+        // Video ya analizado: el servidor devuelve el resultado guardado
+        if (uploadData.status === 'completed') {
+            const jobRes = await fetch(`${API_URL}/api/jobs/${jobId}`);
+            const cachedJob = await jobRes.json();
+            progressBar.style.width = '100%';
+            statusText.textContent = '¡Completado! (resultado en caché)';
+            displayVideoResults(cachedJob.results, jobId);
+            return;
+        }
+        
+        // Analyze (el servidor encola el trabajo y responde de inmediato)
+        statusText.textContent = 'En cola...';
+        progressBar.style.width = '0%';
         
         const analyzeRes = await fetch(`${API_URL}/api/video/analyze/${jobId}`, {
             method: 'POST'
         });
         
+        if (analyzeRes.status === 429) {
+            const busy = await analyzeRes.json();
+            throw new Error(`${busy.detail}. Inténtalo de nuevo en unos segundos`);
+        }
         if (!analyzeRes.ok) throw new Error('Error al analizar');
         
-        const analyzeData = await analyzeRes.json();
+        const job = await watchJob(jobId, (job) => {
+            if (job.status === 'processing' && job.frames_processed !== undefined) {
+                const eta = job.eta_sec !== null ? ` · ETA ${Math.round(job.eta_sec)}s` : '';
+                statusText.textContent = `Analizando con YOLO... ${job.progress}% ` +
+                    `(${job.frames_processed}/${job.total_frames} frames · ${job.fps} fps${eta} · ` +
+                    `${job.player_detections} jugadores, ${job.ball_detections} balón)`;
+                progressBar.style.width = `${job.progress}%`;
+            } else if (job.status === 'processing') {
+                statusText.textContent = 'Analizando con YOLO...';
+            } else if (job.status === 'queued' && job.queue_position) {
+                statusText.textContent = `En cola (posición ${job.queue_position})...`;
+            }
+        });
         
         progressBar.style.width = '100%';
         statusText.textContent = '¡Completado!';
         
         // Show results
-        displayVideoResults(analyzeData.results);
+        displayVideoResults(job.results, jobId);
         
     } catch (error) {
         statusText.textContent = `Error: ${error.message}`;
@@ -108,10 +134,47 @@ async function handleVideoUpload(file) {
     }
 }
 
-function displayVideoResults(results) {
+function watchJob(jobId, onUpdate) {
+    // Progreso en vivo por Server-Sent Events
+    return new Promise((resolve, reject) => {
+        const source = new EventSource(`${API_URL}/api/jobs/${jobId}/events`);
+        
+        const handle = (e) => {
+            const job = JSON.parse(e.data);
+            onUpdate(job);
+            
+            if (job.status === 'completed') {
+                source.close();
+                resolve(job);
+            } else if (job.status === 'error') {
+                source.close();
+                reject(new Error(job.error || 'Error al analizar'));
+            } else if (job.status === 'cancelled') {
+                source.close();
+                reject(new Error('Análisis cancelado'));
+            }
+        };
+        
+        ['uploaded', 'queued', 'processing', 'progress', 'completed', 'error', 'cancelled']
+            .forEach(name => source.addEventListener(name, handle));
+    });
+}
+
+function displayVideoResults(results, jobId) {
     const container = document.getElementById('videoResults');
     container.style.display = 'block';
     
+    // Artefactos servidos con HTTP Range: el video se puede adelantar sin descargarlo
+    const files = (results.artifacts && results.artifacts.files) || [];
+    const artifactUrl = (name) => `${API_URL}/api/jobs/${jobId}/artifacts/${name}`;
+    const trackedVideo = files.includes('tracked.mp4')
+        ? `<h4>🎬 Video con Tracking</h4>
+           <video controls preload="metadata" src="${artifactUrl('tracked.mp4')}" style="width: 100%;"></video>`
+        : '';
+    const downloads = files.filter(name => name !== 'tracked.mp4')
+        .map(name => `<a class="btn btn-primary" href="${artifactUrl(name)}" download>⬇️ ${name}</a>`)
+        .join(' ');
+    
     container.innerHTML = `
         <h3>📊 Resultados del Análisis</h3>
         
@@ -155,6 +218,9 @@ function displayVideoResults(results) {
                 `).join('')}
             </tbody>
         </table>
+        
+        ${trackedVideo}
+        ${downloads ? `<p>${downloads}</p>` : ''}
     `;
 }
 
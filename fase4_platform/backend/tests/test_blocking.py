@@ -0,0 +1,154 @@
+"""
+Concurrencia de las comparaciones de StatsBomb.
+
+services.statsbomb_data se sustituye por un módulo local lento, así las
+pruebas no dependen de la red. Se comprueba que una comparación lenta no
+frena a los endpoints rápidos, que el pool lleno responde 503 y que una
+llamada demasiado lenta responde 504.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+import types
+
+import pytest
+
+# Límites pequeños para que las pruebas sean rápidas (se leen al importar)
+os.environ.update({
+    "SERVICE_WORKERS": "2",
+    "SERVICE_MAX_CONCURRENCY": "2",
+    "SERVICE_QUEUE_TIMEOUT_SEC": "0.3",
+    "SERVICE_TIMEOUT_SEC": "1.5",
+    "JOBS_DB": os.path.join(tempfile.mkdtemp(), "jobs.db"),
+    "WARMUP_CACHES": "0"
+})
+
+pd = pytest.importorskip("pandas")
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("fastapi")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+import main  # noqa: E402
+from services import blocking  # noqa: E402
+
+FAST_LATENCY_SEC = 0.25
+
+# Espera máxima del stub (se corta al terminar cada prueba)
+MAX_STUB_DELAY_SEC = 5
+
+
+@pytest.fixture
+def slow_statsbomb(monkeypatch):
+    """
+    Sustituye statsbomb_data por un stub que tarda `delay` segundos por consulta.
+
+    Devuelve un dict cuyo 'delay' se puede cambiar en cada prueba. Una
+    comparación de dos equipos consulta los partidos dos veces.
+    """
+    state = {"delay": 0.0}
+    release = threading.Event()
+
+    def get_matches(competition="worldcup_2022"):
+        release.wait(state["delay"])
+        return pd.DataFrame({"match_id": [1], "home_team": ["Local"], "away_team": ["Visitante"]})
+
+    def get_match_events(match_id):
+        return pd.DataFrame({
+            "match_id": [match_id] * 4,
+            "team": ["Local", "Local", "Visitante", "Visitante"],
+            "type": ["Pass", "Shot", "Pass", "Pressure"],
+            "pass_outcome": [None, None, "Incomplete", None],
+            "shot_outcome": [None, "Goal", None, None],
+            "shot_statsbomb_xg": [None, 0.4, None, None],
+            "dribble_outcome": [None] * 4
+        })
+
+    stub = types.ModuleType("services.statsbomb_data")
+    stub.get_matches = get_matches
+    stub.get_match_events = get_match_events
+    stub.load_competition_events = lambda competition="worldcup_2022", columns=None: get_match_events(1)
+
+    monkeypatch.setitem(sys.modules, "services.statsbomb_data", stub)
+    # team_analyzer se vuelve a importar sobre el stub en la primera petición
+    monkeypatch.delitem(sys.modules, "services.team_analyzer", raising=False)
+    # El semáforo queda ligado al event loop de cada prueba
+    monkeypatch.setattr(blocking, "_semaphore", None)
+
+    yield state
+
+    # Libera los hilos que siguen esperando y vacía el pool antes de la siguiente prueba
+    release.set()
+    for future in [blocking._executor.submit(time.sleep, 0) for _ in range(blocking.SERVICE_WORKERS)]:
+        future.result(timeout=MAX_STUB_DELAY_SEC)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def compare(client, n: int):
+    # Una competición distinta por petición para no acertar en la caché de estilos
+    return await client.get("/api/teams/compare", params={
+        "team1": "Local", "team2": "Visitante", "competition": f"stub_{n}_{time.monotonic_ns()}"
+    })
+
+
+def make_client():
+    transport = httpx.ASGITransport(app=main.app)
+    return httpx.AsyncClient(transport=transport, base_url="http://test", timeout=10)
+
+
+def test_fast_endpoint_not_blocked_by_slow_comparisons(slow_statsbomb):
+    slow_statsbomb["delay"] = 0.5
+
+    async def scenario():
+        async with make_client() as client:
+            slow = [asyncio.create_task(compare(client, i)) for i in range(2)]
+            await asyncio.sleep(0.1)
+
+            latencies = []
+            for _ in range(5):
+                start = time.perf_counter()
+                response = await client.get("/api/teams/available")
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200
+
+            return latencies, await asyncio.gather(*slow)
+
+    latencies, slow = run(scenario())
+
+    assert max(latencies) < FAST_LATENCY_SEC
+    assert [r.status_code for r in slow] == [200, 200]
+    assert slow[0].json()["comparison"]["comparison"]["more_goals"] == "Local"
+
+
+def test_full_pool_returns_503(slow_statsbomb):
+    slow_statsbomb["delay"] = 0.5
+
+    async def scenario():
+        async with make_client() as client:
+            return await asyncio.gather(*[compare(client, i) for i in range(4)])
+
+    codes = sorted(r.status_code for r in run(scenario()))
+
+    # SERVICE_MAX_CONCURRENCY=2: dos se atienden y el resto no consigue hueco
+    assert codes == [200, 200, 503, 503]
+
+
+def test_slow_comparison_returns_504(slow_statsbomb):
+    slow_statsbomb["delay"] = MAX_STUB_DELAY_SEC
+
+    async def scenario():
+        async with make_client() as client:
+            start = time.perf_counter()
+            response = await compare(client, 0)
+            return response, time.perf_counter() - start
+
+    response, elapsed = run(scenario())
+
+    assert response.status_code == 504
+    assert elapsed < MAX_STUB_DELAY_SEC